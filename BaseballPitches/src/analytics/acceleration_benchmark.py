@@ -0,0 +1,69 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module times one acceleration calculation per step, comparing the
+original path (building a list for every force with calculate_drag,
+calculate_magnus, and add_forces, then dividing by the mass) against the fused
+forces.acceleration function for a single pitch and for a batch of pitches.
+
+Run it from the src directory with:
+    python -m analytics.acceleration_benchmark
+"""
+
+from timeit import repeat
+from numpy import array, tile
+from baseball.pitches import Pitch
+from npgphysics import forces
+
+def time_per_call(statement, number, repetitions=5):
+    """Return the best time (in seconds) per call of statement."""
+    return min(repeat(statement, number=number, repeat=repetitions)) / number
+
+def run(number=20000, batch_size=10000):
+    """Time each acceleration path and return a list of (name, seconds per
+    step per pitch) tuples.
+    """
+    mass, area, cd = Pitch.mass, Pitch.area, Pitch.drag_coefficient
+    velocity = list(Pitch.default_velocity)
+    spin = [0.00, 0.024, 0.02]
+    f_gravity = forces.calculate_gravity(mass)
+    params = forces.acceleration_constants(mass, area, cd)
+
+    def original():
+        net_force = forces.add_forces([f_gravity,
+                                       forces.calculate_drag(velocity, area,
+                                                             cd),
+                                       forces.calculate_magnus(velocity,
+                                                               spin)])
+        return [f / mass for f in net_force]
+
+    def fused_scalar():
+        return forces.acceleration(velocity, spin, params)
+
+    velocity_array = array(velocity)
+    spin_array = array(spin)
+
+    def fused_array():
+        return forces.acceleration(velocity_array, spin_array, params)
+
+    velocities = tile(velocity_array, (batch_size, 1))
+    spins = tile(spin_array, (batch_size, 1))
+
+    def fused_batch():
+        return forces.acceleration(velocities, spins, params)
+
+    return [('original (lists + NumPy per force)',
+             time_per_call(original, number)),
+            ('fused, scalar fast path', time_per_call(fused_scalar, number)),
+            ('fused, single (3,) array', time_per_call(fused_array, number)),
+            ('fused, (%d, 3) batch' % batch_size,
+             time_per_call(fused_batch, max(number // batch_size, 10))
+             / batch_size)]
+
+if __name__ == '__main__':
+    results = run()
+    reference = results[0][1]
+    for name, seconds in results:
+        print("%-36s %10.3f us/step  %7.1fx" % (name, seconds * 1e6,
+                                               reference / seconds))
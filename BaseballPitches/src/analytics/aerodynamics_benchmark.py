@@ -0,0 +1,78 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module measures what the tabulated aerodynamics of
+npgphysics.aerodynamics cost compared to the constant drag coefficient and
+linear Magnus effect: the time of one derivative evaluation for a single
+pitch and per pitch of a batch, and the time of whole throws with RK4.
+
+Run it from the src directory with:
+    python -m analytics.aerodynamics_benchmark
+"""
+
+from timeit import repeat
+from numpy import array, concatenate, tile
+from baseball import play_ball
+from baseball.batch import PitchBatch
+from baseball.pitches import Pitch, equations_of_motion
+from npgphysics.aerodynamics import AerodynamicTables
+
+def best_times(functions, number, repetitions=7):
+    """Return the best time (in seconds) per call of each function. The
+    functions take turns, so that a busy spell of the machine does not
+    favor one of them."""
+    times = [float('inf')] * len(functions)
+    for _ in range(repetitions):
+        for i, function in enumerate(functions):
+            times[i] = min(times[i], repeat(function, number=number,
+                                            repeat=1)[0] / number)
+    return times
+
+def run(number=20000, batch_size=10000, dt=0.001):
+    """Time the constant and the tabulated model and return a list of
+    (name, constant seconds, tabulated seconds) tuples, per pitch."""
+    tables = AerodynamicTables()
+    constants = (Pitch.mass, Pitch.area, Pitch.drag_coefficient)
+    spin = array([0.0, 0.024, 0.02])
+    state = concatenate((Pitch.default_position, Pitch.default_velocity))
+    states = tile(state, (batch_size, 1))
+    spins = tile(spin, (batch_size, 1))
+    batch_number = max(number // batch_size, 10)
+    results = []
+
+    for name, y, s, calls, size in (('derivative, single pitch', state, spin,
+                                     number, 1),
+                                    ('derivative, (%d, 6) batch'
+                                     % batch_size, states, spins,
+                                     batch_number, batch_size)):
+        functions = []
+        for model in (None, tables):
+            f = equations_of_motion(s, *constants, aerodynamics=model)
+            functions.append(lambda f=f: f(0.1, y))
+        results.append((name,) + tuple(t / size for t in
+                                       best_times(functions, calls)))
+
+    def throw_pitches(model):
+        for p in play_ball.predefined_pitches():
+            p.throw(play_ball.distance, dt, 'rk4', aerodynamics=model)
+
+    def throw_batch(model):
+        batch = PitchBatch.from_pitches(play_ball.predefined_pitches() * 100)
+        batch.throw(play_ball.distance, dt, False, 'rk4',
+                    aerodynamics=model)
+
+    results.append(('7 pitches with rk4, per pitch',) + tuple(
+        t / 7 for t in best_times([lambda: throw_pitches(None),
+                                   lambda: throw_pitches(tables)], 1)))
+    results.append(('batch of 700 with rk4, per pitch',) + tuple(
+        t / 700 for t in best_times([lambda: throw_batch(None),
+                                     lambda: throw_batch(tables)], 1)))
+    return results
+
+if __name__ == '__main__':
+    print("%-36s %12s %12s %9s" % ('', 'constant', 'tabulated', 'overhead'))
+    for name, constant, tabulated in run():
+        print("%-36s %9.3f us %9.3f us %8.0f%%"
+              % (name, constant * 1e6, tabulated * 1e6,
+                 (tabulated / constant - 1) * 100))
@@ -0,0 +1,309 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module replaces the hand-collected runtime data in quick_plot.py with a
+reproducible benchmark. It times play_ball.just_throw() (and any other
+simulation engine registered in the engines dictionary) across a sweep of
+increments, records the iterations per pitch, wall time, peak memory and
+steps per second to a JSON file together with information about the machine,
+compares the run against a stored baseline, and redraws the runtime vs.
+iterations figure from stored results.
+
+Run it from the src directory, for example:
+    python -m analytics.benchmark --output run.json --baseline baseline.json
+    python -m analytics.benchmark --output baseline.json --save-baseline
+    python -m analytics.benchmark --plot runtime.png --load run.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+from math import log
+
+import numpy
+from baseball import kernels, play_ball
+from baseball.batch import PitchBatch
+
+default_increments = [0.01, 0.001, 0.0005, 0.0002, 0.0001]
+
+def scalar_engine(increment, backend='python'):
+    """Throw the seven predefined pitches one at a time with
+    play_ball.just_throw. Return the mean number of iterations per pitch.
+    """
+    thrown = play_ball.just_throw(increment, backend)
+    return sum(len(p.trail) - 1 for p in thrown) / len(thrown)
+
+def batch_engine(increment, backend='python'):
+    """Throw the seven predefined pitches together with PitchBatch. Return the
+    mean number of iterations per pitch.
+    """
+    batch = PitchBatch.from_pitches(play_ball.predefined_pitches())
+    batch.throw(play_ball.distance, increment, keep_trails=False,
+                backend=backend)
+    return batch.steps.mean()
+
+# Each engine is a function that takes an increment, simulates the pitches and
+# returns the mean number of iterations per pitch. Every backend in
+# baseball.kernels that is installed gets its own scalar and batch engine,
+# e.g. 'scalar-numba'.
+engines = {'scalar': scalar_engine,
+           'batch': batch_engine}
+for _backend in kernels.available_backends():
+    if _backend != 'python':
+        engines['scalar-' + _backend] = partial(scalar_engine,
+                                                backend=_backend)
+        engines['batch-' + _backend] = partial(batch_engine, backend=_backend)
+
+def machine_metadata():
+    """Return a dictionary describing the machine and software versions."""
+    return {'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'python': sys.version.split()[0],
+            'numpy': numpy.__version__}
+
+def measure(engine, increment, repetitions=3, memory=True):
+    """Time one engine at one increment.
+
+    Parameters
+    ----------
+        engine : string
+            The name of the engine in the engines dictionary.
+        increment : float
+            The time increment (in seconds) passed to the engine.
+        repetitions : int
+            The number of timed runs. The fastest run is reported.
+        memory : bool
+            If True, make one extra run under tracemalloc to record the peak
+            memory. It is kept out of the timed runs because tracing slows
+            allocation down.
+
+    Returns
+    -------
+        dict
+            The engine, increment, iterations per pitch, wall time (s), peak
+            memory (bytes, or None) and steps per second.
+    """
+    function = engines[engine]
+    # an untimed run at a coarse increment, so that one-time costs such as
+    # compiling a kernel are not counted
+    function(default_increments[0])
+    best = float('inf')
+    iterations = 0
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        iterations = function(increment)
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        function(increment)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    pitch_count = len(play_ball.predefined_pitches())
+    return {'engine': engine,
+            'increment': increment,
+            'iterations': float(iterations),
+            'seconds': best,
+            'peak_bytes': peak,
+            'steps_per_second': iterations * pitch_count / best}
+
+def run(engine_names=None, increments=None, repetitions=3, memory=True):
+    """Run the benchmark for each engine and increment and return the results
+    as a dictionary that can be written with save.
+    """
+    engine_names = engine_names or sorted(engines)
+    increments = increments or default_increments
+    results = [measure(e, i, repetitions, memory)
+               for e in engine_names for i in increments]
+    return {'metadata': machine_metadata(), 'results': results}
+
+def speedups(data, reference='scalar'):
+    """Return the speedup of each result over the reference engine at the
+    same increment, as a dictionary keyed by (engine, increment). Results
+    without a reference run are left out.
+    """
+    base = {r['increment']: r['steps_per_second'] for r in data['results']
+            if r['engine'] == reference}
+    return {(r['engine'], r['increment']):
+            r['steps_per_second'] / base[r['increment']]
+            for r in data['results'] if r['increment'] in base}
+
+def save(data, path):
+    """Write benchmark data to a JSON file."""
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def load(path):
+    """Read benchmark data from a JSON file."""
+    with open(path) as f:
+        return json.load(f)
+
+def scaling_exponent(results):
+    """Fit runtime = c * iterations**k to a list of results by least squares
+    on a log-log scale and return k. A linear algorithm has k close to 1; the
+    NumPy version of the code that was plotted in quick_plot.py had k close
+    to 2.
+    """
+    points = [(log(r['iterations']), log(r['seconds'])) for r in results
+              if r['iterations'] > 0 and r['seconds'] > 0]
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x)**2 for x, _ in points)
+    if sxx == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / sxx
+
+def compare(data, baseline, tolerance=0.25, max_exponent=1.2):
+    """Compare benchmark data against a baseline.
+
+    Parameters
+    ----------
+        data, baseline : dict
+            Benchmark data as returned by run or load.
+        tolerance : float
+            The allowed relative slowdown of the time per step before a
+            result is flagged as a regression.
+        max_exponent : float
+            The largest allowed scaling exponent (see scaling_exponent)
+            before an engine is flagged as growing faster than linearly.
+
+    Returns
+    -------
+        list of string
+            A description of each regression. The list is empty if there are
+            none.
+    """
+    regressions = []
+    reference = {}
+    if baseline is not None:
+        reference = {(r['engine'], r['increment']): r
+                     for r in baseline['results']}
+    for r in data['results']:
+        old = reference.get((r['engine'], r['increment']))
+        if old is None:
+            continue
+        ratio = (old['steps_per_second'] / r['steps_per_second'])
+        if ratio > 1 + tolerance:
+            regressions.append("%s at increment %g: %.0f steps/s vs. %.0f "
+                               "steps/s in the baseline (%.2fx slower)"
+                               % (r['engine'], r['increment'],
+                                  r['steps_per_second'],
+                                  old['steps_per_second'], ratio))
+
+    for engine in sorted(set(r['engine'] for r in data['results'])):
+        exponent = scaling_exponent([r for r in data['results']
+                                     if r['engine'] == engine])
+        if exponent is not None and exponent > max_exponent:
+            regressions.append("%s: runtime grows as iterations**%.2f "
+                               "(expected linear)" % (engine, exponent))
+    return regressions
+
+def plot(datasets, path=None):
+    """Draw runtime vs. iterations for one or more benchmark runs in the same
+    style as quick_plot.py. If path is given, the figure is saved to that file
+    instead of being shown.
+    """
+    import matplotlib
+    if path is not None:
+        matplotlib.use('Agg')
+    from matplotlib import pyplot
+
+    markers = ['s', '^', 'o', 'D', 'v', 'P']
+    colors = ['blue', 'red', 'green', 'purple', 'orange', 'teal']
+    series = {}
+    for name, data in datasets:
+        for r in data['results']:
+            label = r['engine'] if len(datasets) == 1 else \
+                "%s (%s)" % (r['engine'], name)
+            series.setdefault(label, []).append((r['iterations'],
+                                                 r['seconds']))
+
+    for i, (label, points) in enumerate(sorted(series.items())):
+        x, y = zip(*sorted(points))
+        pyplot.scatter(x, y, marker=markers[i % len(markers)], label=label,
+                       facecolors='none', edgecolors=colors[i % len(colors)])
+        pyplot.plot(x, y, linewidth=1.2, linestyle='--',
+                    color=colors[i % len(colors)])
+
+    pyplot.xlabel('Iterations')
+    pyplot.ylabel('Runtime (s)')
+    pyplot.title('Runtime vs. Iterations')
+    pyplot.legend(loc='upper left')
+
+    if path is None:
+        pyplot.show()
+    else:
+        pyplot.savefig(path)
+        pyplot.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--engines', nargs='+', choices=sorted(engines),
+                        help="engines to benchmark (default: all)")
+    parser.add_argument('--increments', nargs='+', type=float,
+                        help="time increments in seconds")
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip the peak memory measurement")
+    parser.add_argument('--output', help="JSON file to write results to")
+    parser.add_argument('--baseline', help="JSON file to compare against")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="write the results to --baseline instead of "
+                             "comparing against it")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown (default 0.25)")
+    parser.add_argument('--load', nargs='+', default=[],
+                        help="plot stored results instead of running")
+    parser.add_argument('--plot', help="save the runtime figure to this file")
+    args = parser.parse_args(argv)
+
+    if args.load:
+        datasets = [(os.path.basename(p), load(p)) for p in args.load]
+        plot(datasets, args.plot)
+        return 0
+
+    data = run(args.engines, args.increments, args.repetitions,
+               not args.no_memory)
+    speedup = speedups(data)
+    for r in data['results']:
+        peak = r['peak_bytes']
+        ratio = speedup.get((r['engine'], r['increment']))
+        print("%-12s dt=%-8g %10.1f iterations %9.4f s %12.0f steps/s %s %s"
+              % (r['engine'], r['increment'], r['iterations'], r['seconds'],
+                 r['steps_per_second'],
+                 "" if ratio is None else "%7.1fx" % ratio,
+                 "" if peak is None else "%.1f MiB" % (peak / 2**20)))
+    if args.output:
+        save(data, args.output)
+
+    if args.baseline and args.save_baseline:
+        save(data, args.baseline)
+        return 0
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        baseline = load(args.baseline)
+    regressions = compare(data, baseline, args.tolerance)
+    for message in regressions:
+        print("REGRESSION: " + message)
+
+    if args.plot:
+        plot([('current', data)], args.plot)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module measures the cold start of the simulation code. Each module is
+imported in a fresh interpreter, the way a worker process or a CLI call would
+import it, and the wall time of the whole process and of the import alone are
+recorded together with any heavy optional dependency (matplotlib, scipy,
+numba) that the import pulled in. The simulation path should need none of
+them until plotting or a compiled backend is actually used.
+
+Run it from the src directory with:
+    python -m analytics.import_benchmark
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+# the modules a simulation-only user imports
+default_modules = ['baseball.pitches', 'baseball.batch', 'baseball.play_ball',
+                   'baseball.cli']
+
+# dependencies that must only be loaded when plotting or compiling (or never)
+heavy_modules = ['matplotlib', 'scipy', 'numba']
+
+# imported in the child process to time one import
+_script = """
+import sys, time, json
+start = time.perf_counter()
+import %s
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds,
+                  'loaded': [m for m in %r if m in sys.modules]}))
+"""
+
+def measure(module, repetitions=5):
+    """Import a module in fresh interpreters and time it.
+
+    Parameters
+    ----------
+        module : string
+            The dotted name of the module to import.
+        repetitions : int
+            The number of interpreters to start. The fastest run is reported.
+
+    Returns
+    -------
+        dict
+            The module, the wall time (s) of the whole process, the time (s)
+            of the import alone, and the heavy modules it loaded.
+    """
+    best_process = best_import = float('inf')
+    loaded = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c',
+                                 _script % (module, heavy_modules)],
+                                check=True, capture_output=True, text=True)
+        best_process = min(best_process, time.perf_counter() - start)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        best_import = min(best_import, result['seconds'])
+        loaded = result['loaded']
+    return {'module': module,
+            'process_seconds': best_process,
+            'import_seconds': best_import,
+            'loaded': loaded}
+
+def run(modules=None, repetitions=5):
+    """Measure each module and return a list of results. The first result is
+    numpy on its own, which every module needs and which sets the floor.
+    """
+    modules = ['numpy'] + (modules or default_modules)
+    return [measure(m, repetitions) for m in modules]
+
+def check(results, max_seconds=0.5):
+    """Return a description of each module that loaded a heavy dependency or
+    took longer than max_seconds to start. The list is empty if there are
+    none.
+    """
+    problems = []
+    for r in results:
+        if r['loaded']:
+            problems.append("%s imports %s" % (r['module'],
+                                               ', '.join(r['loaded'])))
+        if r['process_seconds'] > max_seconds:
+            problems.append("%s: cold start took %.3f s (limit %.3f s)"
+                            % (r['module'], r['process_seconds'],
+                               max_seconds))
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('modules', nargs='*', help="modules to import "
+                        "(default: %s)" % ' '.join(default_modules))
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=0.5,
+                        help="allowed cold start per module (default 0.5)")
+    args = parser.parse_args(argv)
+
+    results = run(args.modules, args.repetitions)
+    for r in results:
+        print("%-20s %8.1f ms process %8.1f ms import %s"
+              % (r['module'], r['process_seconds'] * 1000,
+                 r['import_seconds'] * 1000,
+                 "(loads %s)" % ', '.join(r['loaded']) if r['loaded'] else ""))
+    problems = check(results, args.max_seconds)
+    for message in problems:
+        print("REGRESSION: " + message)
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
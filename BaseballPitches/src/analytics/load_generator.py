@@ -0,0 +1,197 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module measures the throughput of the simulation service in
+baseball.service. A number of concurrent clients each send /throw requests
+over keep-alive connections with slightly different spins, and the client-side
+latency percentiles and requests per second are reported.
+
+With --compare, two services are started in this process on temporary Unix
+sockets, one with micro-batching and one that simulates every request on its
+own with the scalar Pitch path (max_batch=1, no window), and both are measured
+with the same load. Batching only pays off once the batches are large enough
+to beat the scalar path spread over every worker, so compare with the number
+of clients and workers that the service will really see.
+
+Run it from the src directory, for example:
+    python -m analytics.load_generator --compare --clients 64 --requests 5
+    python -m analytics.load_generator --port 8765 --clients 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from numpy import array, percentile
+from numpy.random import default_rng
+from baseball.service import SimulationService, default_window
+
+async def request(reader, writer, method, path, payload=None):
+    """Send one HTTP request over an open connection and return the status
+    and the decoded JSON body of the response."""
+    body = b'' if payload is None else json.dumps(payload).encode()
+    writer.write(b'%s %s HTTP/1.1\r\nHost: localhost\r\n'
+                 b'Content-Type: application/json\r\nContent-Length: %d\r\n'
+                 b'\r\n' % (method.encode(), path.encode(), len(body)) + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def connect(port=None, unix=None, host='127.0.0.1'):
+    if unix is not None:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, port)
+
+async def generate(clients, requests, port=None, unix=None, dt=0.001,
+                   integrator='rk4', seed=0):
+    """Run the load and return the client-side results.
+
+    Parameters
+    ----------
+        clients : int
+            The number of concurrent connections.
+        requests : int
+            The number of requests each client sends, one after the other.
+        port, unix
+            The TCP port or Unix socket of the service.
+        dt, integrator
+            The settings sent with each pitch.
+        seed : int
+            The seed of the random spins.
+
+    Returns
+    -------
+        dict
+            The number of requests and errors, the wall time (s), the
+            requests per second and the latency percentiles (ms).
+    """
+    rng = default_rng(seed)
+    spins = rng.normal([0.0, 0.024, 0.02], 0.005,
+                       (clients, requests, 3)).tolist()
+    latencies = []
+    errors = 0
+
+    async def client(i):
+        nonlocal errors
+        reader, writer = await connect(port, unix)
+        try:
+            for spin in spins[i]:
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, 'POST', '/throw',
+                                          {'pitch': 'Slider', 'spin': spin,
+                                           'dt': dt,
+                                           'integrator': integrator})
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(i) for i in range(clients)])
+    seconds = time.perf_counter() - start
+    p50, p90, p99 = percentile(array(latencies) * 1000, [50, 90, 99])
+    return {'requests': len(latencies), 'errors': errors, 'seconds': seconds,
+            'requests_per_second': len(latencies) / seconds,
+            'latency_ms': {'p50': p50, 'p90': p90, 'p99': p99,
+                           'max': max(latencies) * 1000}}
+
+async def server_metrics(port=None, unix=None):
+    """Return the /metrics report of a running service."""
+    reader, writer = await connect(port, unix)
+    try:
+        return (await request(reader, writer, 'GET', '/metrics'))[1]
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def compare(clients, requests, workers=None, threads=False, **options):
+    """Measure a batching service and a one-request-per-throw service (each
+    request thrown with Pitch.iter_throw) with the same load and return both
+    results, keyed by 'batched' and 'unbatched'."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, window, max_batch in (('unbatched', 0, 1),
+                                        ('batched', default_window, 4096)):
+            unix = os.path.join(directory, name + '.sock')
+            service = SimulationService(window, max_batch, workers, threads)
+            await service.start(unix=unix)
+            try:
+                # start the workers before timing
+                await generate(1, 1, unix=unix)
+                results[name] = await generate(clients, requests, unix=unix,
+                                               **options)
+                results[name]['server'] = await server_metrics(unix=unix)
+            finally:
+                await service.stop()
+    return results
+
+def describe(name, result):
+    latency = result['latency_ms']
+    text = ("%-10s %6d requests in %7.2f s: %8.0f requests/s, latency p50 "
+            "%.1f ms, p90 %.1f ms, p99 %.1f ms"
+            % (name, result['requests'], result['seconds'],
+               result['requests_per_second'], latency['p50'], latency['p90'],
+               latency['p99']))
+    if 'server' in result and 'batch_size' in result['server']:
+        batch = result['server']['batch_size']
+        text += ", batch size mean %.1f max %d" % (batch['mean'],
+                                                    batch['max'])
+    if result['errors']:
+        text += ", %d errors" % result['errors']
+    return text
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--unix')
+    parser.add_argument('--compare', action='store_true',
+                        help="start a batched and an unbatched service and "
+                             "compare them")
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=10,
+                        help="requests per client")
+    parser.add_argument('--dt', type=float, default=0.001)
+    parser.add_argument('--integrator', default='rk4')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--threads', action='store_true')
+    args = parser.parse_args(argv)
+
+    options = {'dt': args.dt, 'integrator': args.integrator}
+    if args.compare:
+        results = asyncio.run(compare(args.clients, args.requests,
+                                      args.workers, args.threads, **options))
+        for name in ('unbatched', 'batched'):
+            print(describe(name, results[name]))
+        print("speedup: %.1fx" % (results['batched']['requests_per_second']
+                                  / results['unbatched']
+                                  ['requests_per_second']))
+        return 0
+
+    if args.port is None and args.unix is None:
+        args.port = 8765
+
+    async def run():
+        result = await generate(args.clients, args.requests, args.port,
+                                args.unix, **options)
+        result['server'] = await server_metrics(args.port, args.unix)
+        return result
+
+    print(describe('service', asyncio.run(run())))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,9 @@ Created on Sep 10, 2018
 
 This module is used to plot empirical runtime data that was collected by
 timing the execution of the play_ball.just_throw() method. 
+
+The data below was collected by hand. To measure the current code and redraw
+this figure from stored results, use analytics/benchmark.py instead.
 """
 
 from matplotlib import pyplot
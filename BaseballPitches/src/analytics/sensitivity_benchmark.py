@@ -0,0 +1,109 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module compares two ways of getting the Jacobian of the time to the plate
+and the plate location of a pitch with respect to its nine parameters: one
+throw that integrates the variational equations (baseball.sensitivity), and
+forward finite differences, which throw the pitch once more per parameter. It
+times both for a single pitch (the finite differences as ten Pitch.throw
+calls) and per pitch of a batch (as one PitchBatch of ten copies per pitch),
+and reports how far each is from central differences.
+
+Run it from the src directory with:
+    python -m analytics.sensitivity_benchmark
+    python -m analytics.sensitivity_benchmark --batch-size 1000 --dt 0.005
+"""
+
+import argparse
+import sys
+from timeit import repeat
+from numpy import abs as absolute, array, concatenate, eye
+from baseball import play_ball, sensitivity
+from baseball.batch import PitchBatch
+from baseball.pitches import Pitch, Slider
+from baseball.solver import spin_scale
+
+def best_time(function, number=1, repetitions=3):
+    """Return the best time (in seconds) per call of function."""
+    return min(repeat(function, number=number, repeat=repetitions)) / number
+
+def pitch_differences(pitch_class, distance, dt, integrator, step=1e-6):
+    """The Jacobian of one pitch by forward differences of Pitch.throw."""
+    nominal = pitch_class()
+    values = array(nominal.position + nominal.velocity + nominal.spin)
+    steps = step * concatenate(([1.0] * 6, [spin_scale] * 3))
+    outcomes = []
+    for offset in concatenate(([[0.0] * 9], eye(9) * steps)):
+        p = values + offset
+        pitch = pitch_class.__new__(pitch_class)
+        Pitch.__init__(pitch, p[0:3].tolist(), p[3:6].tolist(),
+                       p[6:9].tolist())
+        pitch.throw(distance, dt, integrator)
+        outcomes.append([pitch.outcome.time, pitch.outcome.plate_y,
+                         pitch.outcome.plate_z])
+    outcomes = array(outcomes)
+    return ((outcomes[1:] - outcomes[0]) / steps[:, None]).T
+
+def batch_of(size):
+    pitch_list = play_ball.predefined_pitches()
+    return PitchBatch.from_pitches(
+        (pitch_list * (size // len(pitch_list) + 1))[:size])
+
+def run(batch_size=700, dt=0.001, integrator='rk4'):
+    """Return a list of (name, variational seconds, finite difference
+    seconds, variational error, finite difference error) tuples, per pitch.
+    The errors are the largest differences from central differences."""
+    distance = play_ball.distance
+    results = []
+
+    reference = sensitivity.finite_differences(
+        PitchBatch.from_pitches([Slider()]), distance, dt, integrator,
+        central=True)[0]
+    tangent = sensitivity.throw(Slider(), distance, dt,
+                                integrator).plate_jacobian[0]
+    forward = pitch_differences(Slider, distance, dt, integrator)
+    results.append((
+        'single pitch (Pitch.throw)',
+        best_time(lambda: sensitivity.throw(Slider(), distance, dt,
+                                            integrator)),
+        best_time(lambda: pitch_differences(Slider, distance, dt,
+                                            integrator)),
+        absolute(tangent - reference).max(),
+        absolute(forward - reference).max()))
+
+    reference = sensitivity.finite_differences(
+        batch_of(batch_size), distance, dt, integrator, central=True)
+    tangent = sensitivity.throw_batch(batch_of(batch_size), distance, dt,
+                                      integrator, False).plate_jacobian
+    forward = sensitivity.finite_differences(batch_of(batch_size), distance,
+                                             dt, integrator)
+    results.append((
+        'batch of %d, per pitch' % batch_size,
+        best_time(lambda: sensitivity.throw_batch(
+            batch_of(batch_size), distance, dt, integrator, False))
+        / batch_size,
+        best_time(lambda: sensitivity.finite_differences(
+            batch_of(batch_size), distance, dt, integrator)) / batch_size,
+        absolute(tangent - reference).max(),
+        absolute(forward - reference).max()))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--batch-size', type=int, default=700)
+    parser.add_argument('--dt', type=float, default=0.001)
+    parser.add_argument('--integrator', default='rk4')
+    args = parser.parse_args(argv)
+    print("%-30s %12s %12s %8s %11s %11s"
+          % ('', 'variational', 'differences', 'speedup', 'var. error',
+             'diff. error'))
+    for name, tangent, forward, tangent_error, forward_error in run(
+            args.batch_size, args.dt, args.integrator):
+        print("%-30s %9.3f ms %9.3f ms %7.2fx %11.2e %11.2e"
+              % (name, tangent * 1e3, forward * 1e3, forward / tangent,
+                 tangent_error, forward_error))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
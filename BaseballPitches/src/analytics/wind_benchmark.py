@@ -0,0 +1,92 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module measures how much a wind field (npgphysics.wind) slows the
+simulation down: the step throughput of a batch of pitches in still air, in a
+uniform wind, in a steady wind that grows linearly across the field (both
+evaluated without interpolation, see npgphysics.wind), in a steady gridded
+wind that is not linear and in a time-varying one, and the time of one wind
+evaluation per pitch.
+
+Run it from the src directory with:
+    python -m analytics.wind_benchmark
+    python -m analytics.wind_benchmark --batch-size 10000
+"""
+
+import argparse
+import sys
+from timeit import repeat
+from numpy import arange, exp, sin, tile
+from baseball import play_ball
+from baseball.batch import PitchBatch
+from npgphysics.wind import WindField
+
+def stadium_winds():
+    """Return a uniform wind and steady and time-varying wind fields over
+    the path of the pitches, on a 25 cm grid."""
+    uniform = WindField.uniform([0.0, 0.0, -3.0])
+    shear = WindField.from_function(
+        lambda x, y, z: (1.5 + 0.1 * y, 0 * x, -2.0 + 0.05 * x),
+        origin=(0, 0, -2), spacing=0.25, shape=(81, 13, 17))
+    steady = WindField.from_function(
+        lambda x, y, z: (1.5 + 0.1 * y + 0.5 * sin(x), 0 * x,
+                         -2.0 + 0.05 * x * x + 0 * z),
+        origin=(0, 0, -2), spacing=0.25, shape=(81, 13, 17))
+    gusty = WindField.from_function(
+        lambda x, y, z, t: (2 * exp(-(x - 10 * t) ** 2) + 0 * y,
+                            0 * x, -3 * sin(5 * t) + 0 * z),
+        origin=(0, 0, -2), spacing=0.25, shape=(81, 13, 17),
+        times=arange(0, 1, 0.05))
+    return [('still air', None), ('uniform wind', uniform),
+            ('linear shear', shear), ('steady wind', steady),
+            ('time-varying wind', gusty)]
+
+def best_time(function, number=1, repetitions=3):
+    """Return the best time (in seconds) per call of function."""
+    return min(repeat(function, number=number, repeat=repetitions)) / number
+
+def run(batch_size=700, dt=0.001, integrator='rk4', repetitions=5):
+    """Throw the same batch in each wind and return a list of (name, pitch
+    steps per second, interpolation seconds per pitch) tuples. The winds take
+    turns in every repetition, so that a busy spell of the machine does not
+    favor one of them."""
+    pitch_list = play_ball.predefined_pitches()
+    pitch_list = (pitch_list * (batch_size // len(pitch_list) + 1))[
+        :batch_size]
+    positions = tile(play_ball.pitches.Pitch.default_position,
+                     (batch_size, 1))
+    winds = stadium_winds()
+    steps = [0] * len(winds)
+    seconds = [float('inf')] * len(winds)
+    for _ in range(repetitions):
+        for i, (name, wind) in enumerate(winds):
+            batch = PitchBatch.from_pitches(pitch_list)
+            seconds[i] = min(seconds[i], best_time(
+                lambda: batch.throw(play_ball.distance, dt, False,
+                                    integrator, wind=wind), 1, 1))
+            steps[i] = int(batch.steps.sum())
+    results = []
+    for (name, wind), count, time in zip(winds, steps, seconds):
+        sample = (best_time(lambda: wind.velocity(positions, 0.2), 200)
+                  / batch_size if wind is not None else 0.0)
+        results.append((name, count / time, sample))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--batch-size', type=int, default=700)
+    parser.add_argument('--dt', type=float, default=0.001)
+    parser.add_argument('--integrator', default='rk4')
+    args = parser.parse_args(argv)
+    results = run(args.batch_size, args.dt, args.integrator)
+    reference = results[0][1]
+    print("%-20s %16s %10s %18s" % ('', 'pitch steps/s', 'slowdown',
+                                   'interpolation'))
+    for name, rate, sample in results:
+        print("%-20s %16.0f %9.2fx %15.3f us"
+              % (name, rate, reference / rate, sample * 1e6))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module lets the package be run with python -m baseball. See baseball.cli.
+"""
+
+import sys
+
+from baseball.cli import main
+
+sys.exit(main())
@@ -3,9 +3,17 @@ Created on Sep 6, 2018
 @author: Nick Geary
 
 This module plots the trajectory of pitches. 
+
+In headless mode the figure is drawn with the Agg backend and saved straight
+to a PNG or SVG file, without pyplot or a display.
 """
 
-from matplotlib import pyplot
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from numpy import asarray, linspace, unique
+from baseball.outcome import strike_zone_bottom, strike_zone_top, \
+    strike_zone_half_width
 
 lw = 1.0    # line width
 
@@ -29,17 +37,61 @@ def get_axis(input_list, i):
     """
     return [a[i] for a in input_list]
 
+def decimate(points, max_points):
+    """Return at most max_points evenly spaced rows of points, always keeping
+    the first and last rows.
+    
+    Parameters
+    ----------
+        points : array_like
+            An (N, 3) array (or a trail) of positions.
+        max_points : int
+            The largest number of rows to return.
+            
+    Examples
+    --------
+        >>> decimate([[0, 0, 0], [1, 1, 1], [2, 2, 2], [3, 3, 3]], 2)
+        array([[0, 0, 0],
+               [3, 3, 3]])
+    """
+    points = asarray(points)
+    if len(points) <= max_points:
+        return points
+    return points[unique(linspace(0, len(points) - 1,
+                                  max(max_points, 2)).round().astype(int))]
+
 class BaseballPlotter:
     """This class is used to build a figure with two subplots, add the
     trajectory of pitches to the subplots, and add an outline of the strike
     zone to the subplots.
     """
     
-    def __init__(self):
+    def __init__(self, headless=False, figsize=None, dpi=100):
         """Build a figure with two subplots. Set face color, min/max values,
         axis labels, and title.
+        
+        Parameters
+        ----------
+            headless : bool
+                If True, draw with the Agg backend without pyplot so that the
+                figure can be saved on a machine without a display. Use save
+                instead of show_plots.
+            figsize : (float, float)
+                The size of the figure in inches.
+            dpi : float
+                The resolution of the figure in dots per inch.
         """
-        self.figure, (self.axes_1, self.axes_2) = pyplot.subplots(2, 1)
+        self.headless = headless
+        if headless:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.figure = Figure(figsize=figsize, dpi=dpi)
+            FigureCanvasAgg(self.figure)
+            self.axes_1, self.axes_2 = self.figure.subplots(2, 1)
+        else:
+            from matplotlib import pyplot
+            self.figure, (self.axes_1, self.axes_2) = pyplot.subplots(
+                2, 1, figsize=figsize, dpi=dpi)
+        self._legend_handles = ([], [])
         self.figure.patch.set_facecolor('tan')
         
         self.axes_1.set_ylim(ymin=0.0, ymax=2.0)
@@ -60,26 +112,126 @@ class BaseballPlotter:
                 The pitch to add to the subplots. The pitch.trail attribute
                 should be populated before this function is called.        
         """
+        trail = decimate(pitch.trail, self.max_points())
+        
         # plot Y (height) versus X (depth)
-        self.axes_1.plot(get_axis(pitch.trail, 0), get_axis(pitch.trail, 1), 
+        self.axes_1.plot(trail[:, 0], trail[:, 1], 
                          color=pitch.color, label=pitch.label, linewidth=lw)
         
         # plot Z (width) versus X (depth)
-        self.axes_2.plot(get_axis(pitch.trail, 0), get_axis(pitch.trail, 2),
+        self.axes_2.plot(trail[:, 0], trail[:, 2],
                          color=pitch.color, label=pitch.label, linewidth=lw)  
         
+    def max_points(self):
+        """Return the number of points per trail that is worth drawing, which
+        is two per horizontal pixel of a subplot."""
+        return max(int(2 * self.axes_1.bbox.width), 2)
+        
+    def add_trails(self, trails, colors=None, labels=None, alpha=1.0):
+        """Add many trajectories to both subplots at once. Each subplot gets a
+        single LineCollection, which draws much faster than one line per
+        pitch, and every trail is first decimated to screen resolution.
+        
+        Parameters
+        ----------
+            trails : list of array_like
+                The trajectories, each an (N, 3) array or a trail.
+            colors : color constant or list of color constant
+                The color of all trails or of each trail.
+            labels : list of string
+                The label of each trail. Each distinct label is added to the
+                legend once.
+            alpha : float
+                The opacity of the lines.
+        """
+        max_points = self.max_points()
+        trails = [decimate(t, max_points) for t in trails]
+        colors = 'gray' if colors is None else colors
+        for axes, column in ((self.axes_1, 1), (self.axes_2, 2)):
+            axes.add_collection(LineCollection(
+                [t[:, [0, column]] for t in trails], colors=colors,
+                linewidths=lw, alpha=alpha))
+            axes.autoscale_view(scaley=False)
+        
+        if labels is not None:
+            color_list = ([colors] * len(labels) if isinstance(colors, str)
+                          else list(colors))
+            known = set(self._legend_handles[1])
+            for label, color in zip(labels, color_list):
+                if label not in known:
+                    known.add(label)
+                    self._legend_handles[0].append(
+                        Line2D([], [], color=color, linewidth=lw))
+                    self._legend_handles[1].append(label)
+                    
+    def add_pitches(self, pitches, alpha=1.0):
+        """Add many thrown pitches to both subplots at once. See add_trails.
+        
+        Parameters
+        ----------
+            pitches : list of baseball.Pitch or baseball.batch.PitchBatch
+                The pitches to add. Their trails should be populated before
+                this function is called.
+        """
+        if hasattr(pitches, 'trails'):
+            self.add_trails(pitches.trails, pitches.colors, pitches.labels,
+                            alpha)
+        else:
+            self.add_trails([p.trail for p in pitches],
+                            [p.color for p in pitches],
+                            [p.label for p in pitches], alpha)
+        
+    def add_store(self, store, indices=None, alpha=1.0):
+        """Add stored trajectories to both subplots without simulating them
+        again. See add_trails.
+        
+        Parameters
+        ----------
+            store : baseball.store.TrajectoryStore
+                The store to read the trajectories from.
+            indices : slice, array of bool or array of int
+                The trajectories to add. Defaults to all of them.
+        """
+        index = store.index if indices is None else store.index[indices]
+        self.add_trails(store.trails(indices),
+                        [store.colors[i] for i in index['color_id']],
+                        [store.labels[i] for i in index['label_id']], alpha)
+        
     def plot_strike_zone(self):
         """Add the outline of the strike zone to both subplots."""
-        self.axes_1.axhline(y=0.45, linestyle='--', color='red',
-                            label="Strike zone", linewidth=lw)
-        self.axes_1.axhline(y=1.05, linestyle='--', color='red', linewidth=lw)
-        self.axes_2.axhline(y=0.235, linestyle='--', color='red',
+        self.axes_1.axhline(y=strike_zone_bottom, linestyle='--', color='red',
                             label="Strike zone", linewidth=lw)
-        self.axes_2.axhline(y=-0.235, linestyle='--', color='red',
+        self.axes_1.axhline(y=strike_zone_top, linestyle='--', color='red',
                             linewidth=lw)
+        self.axes_2.axhline(y=strike_zone_half_width, linestyle='--',
+                            color='red', label="Strike zone", linewidth=lw)
+        self.axes_2.axhline(y=-strike_zone_half_width, linestyle='--',
+                            color='red', linewidth=lw)
+    
+    def _add_legends(self):
+        for axes, loc in ((self.axes_1, "lower left"),
+                          (self.axes_2, "upper left")):
+            handles, labels = axes.get_legend_handles_labels()
+            axes.legend(handles + self._legend_handles[0],
+                        labels + self._legend_handles[1], loc=loc)
     
     def show_plots(self):
         """Enable the legends and display the figure with two subplots."""
-        self.axes_1.legend(loc="lower left")
-        self.axes_2.legend(loc="upper left")
+        from matplotlib import pyplot
+        self._add_legends()
         pyplot.show()
+        
+    def save(self, path, **kwargs):
+        """Enable the legends and save the figure to a file. The format is
+        taken from the extension of path (e.g. '.png' or '.svg').
+        
+        Parameters
+        ----------
+            path : string
+                The file to write.
+            **kwargs
+                Passed on to matplotlib.figure.Figure.savefig.
+        """
+        self._add_legends()
+        self.figure.savefig(path, facecolor=self.figure.get_facecolor(),
+                            **kwargs)
@@ -0,0 +1,297 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module simulates many baseball pitches at once. Instead of stepping each
+Pitch object through its own loop, the positions, velocities, and spins of a
+whole batch are stored as (N, 3) arrays and advanced together, so the cost of
+each step is shared by every pitch that is still in the air.
+"""
+
+from math import pi
+from numpy import arange, argsort, array, bincount, broadcast_to, \
+    concatenate, cumsum, flatnonzero, split, zeros
+from baseball import instrument, kernels, pitches
+from baseball.outcome import NO_EVENT, Outcome, calculate_break, \
+    empty_outcomes, event_names, locate_events
+from baseball.trail import Trail
+from npgmath import integrators
+
+class PitchBatch:
+    """A batch of baseball pitches that are thrown together. By default the
+    pitches use the same physical constants (mass, drag coefficient, and
+    radius) as the Pitch class. If other constants are given, the mass,
+    drag_coefficient, radius and area attributes are (N,) arrays instead.
+    """
+
+    mass = pitches.Pitch.mass
+    drag_coefficient = pitches.Pitch.drag_coefficient
+    radius = pitches.Pitch.radius
+    area = pitches.Pitch.area
+
+    def __init__(self, p, v, s, l=None, c=None, mass=None,
+                 drag_coefficient=None, radius=None):
+        """Initialize a batch of baseball pitches to be thrown.
+
+        Parameters
+        ----------
+            p : array_like
+                An (N, 3) array with the release point of each pitch.
+            v : array_like
+                An (N, 3) array with the initial velocity of each pitch.
+            s : array_like
+                An (N, 3) array with the spin of each pitch.
+            l : list of string
+                The label of each pitch. Defaults to "Custom Pitch".
+            c : list of color constant
+                The color of each pitch. Defaults to 'gray'.
+            mass : float or array_like
+                The mass (in kilograms) of all pitches or of each pitch.
+                Defaults to Pitch.mass.
+            drag_coefficient : float or array_like
+                The drag coefficient of all pitches or of each pitch.
+                Defaults to Pitch.drag_coefficient.
+            radius : float or array_like
+                The radius (in meters) of all pitches or of each pitch.
+                Defaults to Pitch.radius.
+        """
+        self.position = array(p, dtype=float).reshape(-1, 3)
+        self.velocity = array(v, dtype=float).reshape(-1, 3)
+        self.spin = array(s, dtype=float).reshape(-1, 3)
+        n = len(self.position)
+        if len(self.velocity) != n or len(self.spin) != n:
+            raise ValueError("positions, velocities and spins must have the "
+                             "same number of rows")
+        self.initial_position = self.position.copy()
+        self.initial_velocity = self.velocity.copy()
+        self.labels = list(l) if l is not None else ["Custom Pitch"] * n
+        self.colors = list(c) if c is not None else ['gray'] * n
+        self.steps = zeros(n, dtype=int)
+        self.trails = None
+        self.events, self.times, self.event_states = empty_outcomes(n)
+        if (mass is not None or drag_coefficient is not None
+                or radius is not None):
+            self.mass = self._per_pitch(mass, self.mass)
+            self.drag_coefficient = self._per_pitch(drag_coefficient,
+                                                    self.drag_coefficient)
+            self.radius = self._per_pitch(radius, self.radius)
+            self.area = pi * self.radius**2
+
+    def _per_pitch(self, value, default):
+        value = default if value is None else value
+        return broadcast_to(array(value, dtype=float), (len(self),)).copy()
+
+    def constants(self, indices=None):
+        """Return the mass, area and drag coefficient of the given pitches
+        (all of them if indices is None), in the form expected by
+        pitches.equations_of_motion: floats if every pitch uses the same
+        constants, (n, 1) arrays otherwise."""
+        if isinstance(self.mass, float):
+            return self.mass, self.area, self.drag_coefficient
+        if indices is None:
+            indices = slice(None)
+        return (self.mass[indices, None], self.area[indices, None],
+                self.drag_coefficient[indices, None])
+
+    @classmethod
+    def from_pitches(cls, pitch_list):
+        """Build a batch from a list of Pitch objects (e.g. the predefined
+        subclasses in the pitches module).
+
+        Parameters
+        ----------
+            pitch_list : list of baseball.Pitch
+                The pitches to copy into the batch.
+        """
+        constants = array([[p.mass, p.drag_coefficient, p.radius]
+                           for p in pitch_list]).reshape(-1, 3)
+        if (constants == [cls.mass, cls.drag_coefficient, cls.radius]).all():
+            constants = [None, None, None]
+        else:
+            constants = constants.T
+        return cls([p.position for p in pitch_list],
+                   [p.velocity for p in pitch_list],
+                   [p.spin for p in pitch_list],
+                   [p.label for p in pitch_list],
+                   [p.color for p in pitch_list], *constants)
+
+    def __len__(self):
+        return len(self.position)
+
+    def throw(self, distance, dt, keep_trails=True, integrator=None,
+              backend=None, aerodynamics=None, wind=None):
+        """Calculate the trajectories of all pitches from their release points
+        to the specified distance towards the batter using the Euler Method or
+        the given integrator. Pitches that cross the plate (x = distance) or
+        hit the ground (y = 0) are masked out and no longer cost anything per
+        step.
+
+        After the call, the position and velocity attributes hold the final
+        state of each pitch and the steps attribute holds the number of steps
+        each pitch took. The exact plate crossing or ground impact of each
+        pitch is located inside its last step and stored in the events (see
+        baseball.outcome), times, and event_states attributes.
+
+        Parameters
+        ----------
+            distance : float
+                The distance (in meters) to throw the pitches.
+            dt : float
+                The time (in seconds) to let the balls travel before making a
+                new calculation. For an adaptive integrator, this is only the
+                size of the first step; all pitches in the air share the same
+                step, chosen so that every one of them meets the tolerance.
+            keep_trails : bool
+                If True, store the trajectory of each pitch as an (M, 3) array
+                in the trails attribute. The trails match the trail attribute
+                that Pitch.throw would produce for the same pitch. Turn this
+                off for large batches where only the final state is needed.
+            integrator : string or npgmath.integrators.Integrator
+                The integrator to use. If None, the Euler Method is used.
+            backend : string
+                'python', 'numba' or 'auto' (see baseball.kernels). If None,
+                the BASEBALL_BACKEND environment variable decides.
+            aerodynamics : npgphysics.aerodynamics.AerodynamicTables
+                Tabulated drag and lift coefficients and spin decay to use
+                instead of the constant drag coefficients and the linear
+                Magnus effect. Always runs on the 'python' backend.
+            wind : npgphysics.wind.WindField
+                The wind that the pitches fly through, interpolated for all
+                pitches in the air at once. Always runs on the 'python'
+                backend.
+        """
+
+        profiler = instrument.active
+        if profiler is None:
+            self._throw(distance, dt, keep_trails, integrator, backend,
+                        aerodynamics, wind)
+            return
+        with profiler.measure("batch of %d" % len(self), len(self)):
+            self._throw(distance, dt, keep_trails, integrator, backend,
+                        aerodynamics, wind)
+
+    def _throw(self, distance, dt, keep_trails, integrator, backend,
+               aerodynamics, wind):
+        """Throw the batch. See throw."""
+
+        integrator = integrators.get_integrator(integrator)
+        backend = kernels.resolve(backend, integrator)
+        if aerodynamics is not None or wind is not None:
+            backend = 'python'
+        if backend != 'python':
+            instrument.timed('kernel', kernels.throw_batch)(
+                self, distance, dt, integrator, backend, keep_trails)
+            return
+        state = concatenate((self.position, self.velocity), axis=1)
+        # the positions after each step, of the pitches that took it
+        history = [state[:, :3].copy()] if keep_trails else None
+        rows = [arange(len(self))] if keep_trails else None
+        step = instrument.timed('step', integrator.step)
+        force = instrument.wrapper('force')
+        append = (instrument.timed('trail', history.append) if keep_trails
+                  else None)
+        locate = instrument.timed('locate', self._locate)
+        steps = int(self.steps.sum())
+
+        def equations(indices):
+            derivative = pitches.equations_of_motion(
+                self.spin[indices], *self.constants(indices), aerodynamics,
+                wind)
+            return derivative if force is None else force(derivative)
+
+        # indices of the pitches that haven't crossed the plate (x = distance)
+        # or hit the ground (y = 0)
+        active = flatnonzero((state[:, 0] < distance) & (state[:, 1] > 0))
+        derivative = equations(active) if active.size else None
+        t = 0.0
+        while active.size:
+            t0 = t
+            old_state = state[active]
+            t, new_state, dt = step(derivative, t, old_state, dt)
+            state[active] = new_state
+            self.steps[active] += 1
+            if keep_trails:
+                append(new_state[:, :3].copy())
+                rows.append(active)
+            flying = (new_state[:, 0] < distance) & (new_state[:, 1] > 0)
+            if not flying.all():
+                locate(distance, active[~flying], t0, old_state[~flying], t,
+                       new_state[~flying], aerodynamics, wind)
+                active = active[flying]
+                # the derivative only changes with the set of pitches
+                if active.size:
+                    derivative = equations(active)
+        instrument.count_steps(int(self.steps.sum()) - steps)
+
+        self.position = state[:, :3].copy()
+        self.velocity = state[:, 3:].copy()
+        if keep_trails:
+            # group the points by pitch, keeping them in step order
+            rows = concatenate(rows)
+            order = argsort(rows, kind='stable')
+            points = concatenate(history)[order]
+            ends = cumsum(bincount(rows, minlength=len(self)))
+            self.trails = split(points, ends[:-1])
+
+    def _locate(self, distance, indices, t0, state0, t1, state1,
+                aerodynamics=None, wind=None):
+        """Find where the given pitches crossed the plate or hit the ground
+        during their last step and store the outcomes."""
+        derivative = pitches.equations_of_motion(self.spin[indices],
+                                                 *self.constants(indices),
+                                                 aerodynamics, wind)
+        code, time, state = locate_events(distance, t0, state0,
+                                          derivative(t0, state0), t1 - t0,
+                                          state1, derivative(t1, state1))
+        self.events[indices] = code
+        self.times[indices] = time
+        self.event_states[indices] = state
+
+    @property
+    def plate_y(self):
+        """The height (in meters) of each pitch at its event."""
+        return self.event_states[:, 1]
+
+    @property
+    def plate_z(self):
+        """The width (in meters) of each pitch at its event."""
+        return self.event_states[:, 2]
+
+    @property
+    def breaks(self):
+        """An (N, 2) array with the vertical and horizontal break (in meters)
+        of each pitch at its event. See baseball.outcome.calculate_break."""
+        return calculate_break(self.initial_position, self.initial_velocity,
+                               self.event_states[:, :3])
+
+    def outcome(self, i):
+        """Return the outcome of the i-th pitch as a baseball.outcome.Outcome,
+        or None if it was never thrown."""
+        if self.events[i] == NO_EVENT:
+            return None
+        return Outcome(event_names[int(self.events[i])], float(self.times[i]),
+                       self.event_states[i, :3].tolist(),
+                       self.event_states[i, 3:].tolist())
+
+    def to_pitches(self):
+        """Return a list of Pitch objects with the current state of the
+        batch. If trails were kept, they are copied onto the pitches so they
+        can be passed to baseball_plotter.BaseballPlotter.add_to_plot.
+        """
+        pitch_list = []
+        per_pitch = not isinstance(self.mass, float)
+        for i in range(len(self)):
+            cls = pitches.Pitch
+            if per_pitch:
+                cls = pitches.with_constants(cls, self.mass[i],
+                                             self.drag_coefficient[i],
+                                             self.radius[i])
+            pitch = cls(self.position[i].tolist(), self.velocity[i].tolist(),
+                        self.spin[i].tolist(), self.labels[i], self.colors[i])
+            if self.trails is not None:
+                points = self.trails[i]
+                pitch.trail = Trail(points[0], len(points))
+                pitch.trail.extend(points[1:])
+            pitch.outcome = self.outcome(i)
+            pitch_list.append(pitch)
+        return pitch_list
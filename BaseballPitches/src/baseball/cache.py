@@ -0,0 +1,233 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module caches the results of Pitch.throw. A throw is identified by a hash
+of everything that affects the trajectory: the release point, velocity and
+spin of the pitch, its physical constants, the air density in
+npgphysics.forces, and every argument of the throw, including the settings of
+the integrator and the tables of the aerodynamics and the wind. Results are
+kept in a bounded in-memory LRU cache and, optionally, in a directory of .npz
+files so they survive between processes.
+"""
+
+import os
+import struct
+from collections import OrderedDict
+from hashlib import sha256
+
+from numpy import array, ascontiguousarray, float64, load, savez
+from baseball.outcome import NO_EVENT, Outcome, event_names
+from baseball.trail import Trail
+from npgmath import integrators
+from npgphysics import forces
+
+# bump this whenever a change to the simulation invalidates cached results
+cache_version = 2
+
+event_codes = {name: code for code, name in event_names.items()}
+
+def _floats(values):
+    return struct.pack('<%dd' % len(values), *[float(v) for v in values])
+
+def _arrays(*values):
+    """Pack the shapes and contents of arrays (e.g. tables or grids)."""
+    packed = []
+    for value in values:
+        value = ascontiguousarray(value, dtype=float64)
+        packed.append(repr(value.shape).encode() + value.tobytes())
+    return b';'.join(packed)
+
+def throw_key(pitch, distance, dt, integrator=None, retention='full', k=None,
+              backend=None, aerodynamics=None, wind=None):
+    """Return the hash that identifies a throw.
+
+    Parameters
+    ----------
+        pitch : baseball.Pitch
+            The pitch to be thrown.
+        distance, dt, integrator, retention, k, backend, aerodynamics, wind
+            The arguments that will be passed to Pitch.throw.
+
+    Returns
+    -------
+        string
+            A hexadecimal SHA-256 digest.
+    """
+    digest = sha256()
+    digest.update(b'%d;' % cache_version)
+    digest.update(_floats(list(pitch.position) + list(pitch.velocity)
+                          + list(pitch.spin)))
+    digest.update(_floats([pitch.mass, pitch.drag_coefficient, pitch.radius,
+                           pitch.area, forces.air_density, forces.g,
+                           distance]))
+    # 'auto' stands for the increment that baseball.stepsize chooses
+    digest.update(b'dt=auto;' if dt == 'auto' else _floats([dt]))
+    if integrator is not None:
+        settings = integrators.get_integrator(integrator).settings()
+        digest.update(repr(settings).encode())
+    digest.update(repr((retention, k, backend)).encode())
+    if aerodynamics is not None:
+        decay = aerodynamics.spin_decay
+        digest.update(b'aerodynamics;' + _arrays(
+            aerodynamics.speeds, aerodynamics.spin_factors,
+            aerodynamics.drag, aerodynamics.lift_ratio,
+            [float('nan') if decay is None else decay]))
+    if wind is not None:
+        digest.update(b'wind;' + _arrays(wind.velocities, wind.origin,
+                                         wind.spacing,
+                                         [wind.start, wind.interval]))
+    return digest.hexdigest()
+
+class CacheEntry:
+    """The result of one throw: the trail (as an (N, 3) array), the final
+    position and velocity, and the outcome."""
+
+    def __init__(self, trail, position, velocity, outcome):
+        self.trail = trail
+        self.position = position
+        self.velocity = velocity
+        self.outcome = outcome
+
+class TrajectoryCache:
+    """A cache in front of Pitch.throw with an in-memory LRU tier and an
+    optional on-disk tier.
+
+    Attributes
+    ----------
+        hits : int
+            The number of throws answered from memory.
+        disk_hits : int
+            The number of throws answered from disk.
+        misses : int
+            The number of throws that had to be simulated.
+        evictions : int
+            The number of entries dropped from memory to stay within maxsize.
+    """
+
+    def __init__(self, maxsize=128, directory=None):
+        """Create an empty cache.
+
+        Parameters
+        ----------
+            maxsize : int
+                The largest number of throws kept in memory.
+            directory : string
+                If given, every result is also written to this directory and
+                looked up there when it is not in memory.
+        """
+        self.maxsize = maxsize
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return the hit, miss and eviction counts as a dictionary."""
+        return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._entries)}
+
+    def clear(self):
+        """Drop every entry from memory. Files on disk are kept."""
+        self._entries.clear()
+
+    def throw(self, pitch, distance, dt, integrator=None, retention='full',
+              k=None, backend=None, aerodynamics=None, wind=None):
+        """Throw a pitch, or restore the result of an identical earlier throw.
+        Either way, the pitch ends up with the same trail, position,
+        velocity and outcome that Pitch.throw would give it.
+
+        Only the new part of the trail is cached, so a pitch that already has
+        a trail is thrown directly, without the cache, unless retention is
+        'full'. The other modes thin the trail the pitch already had as well.
+
+        Parameters
+        ----------
+            pitch : baseball.Pitch
+                The pitch to throw.
+            distance, dt, integrator, retention, k, backend, aerodynamics, wind
+                The arguments to Pitch.throw.
+        """
+        if retention != 'full' and len(pitch.trail) > 1:
+            self.misses += 1
+            pitch.throw(distance, dt, integrator, retention, k, backend,
+                        aerodynamics, wind)
+            return
+        key = throw_key(pitch, distance, dt, integrator, retention, k,
+                        backend, aerodynamics, wind)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        else:
+            entry = self._load(key)
+            if entry is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                start = len(pitch.trail) - 1
+                pitch.throw(distance, dt, integrator, retention, k, backend,
+                            aerodynamics, wind)
+                entry = CacheEntry(array(pitch.trail)[start:].copy(),
+                                   list(pitch.position),
+                                   list(pitch.velocity), pitch.outcome)
+                self._save(key, entry)
+                self._insert(key, entry)
+                return
+            self._insert(key, entry)
+        self._restore(pitch, entry)
+
+    def _insert(self, key, entry):
+        self._entries[key] = entry
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _restore(self, pitch, entry):
+        if not isinstance(pitch.trail, Trail):
+            pitch.trail = Trail(pitch.position)
+        pitch.trail.extend(entry.trail[1:])
+        pitch.position = list(entry.position)
+        pitch.velocity = list(entry.velocity)
+        outcome = entry.outcome
+        pitch.outcome = None if outcome is None else Outcome(
+            outcome.event, outcome.time, list(outcome.position),
+            list(outcome.velocity))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def _save(self, key, entry):
+        if self.directory is None:
+            return
+        outcome = entry.outcome
+        if outcome is None:
+            event = [NO_EVENT, 0.0] + [0.0] * 6
+        else:
+            event = ([event_codes[outcome.event], outcome.time]
+                     + list(outcome.position) + list(outcome.velocity))
+        temporary = self._path(key) + '.tmp.npz'
+        savez(temporary, trail=entry.trail,
+              final=array(entry.position + entry.velocity), event=array(event))
+        os.replace(temporary, self._path(key))
+
+    def _load(self, key):
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+        with load(self._path(key)) as data:
+            trail = data['trail']
+            final = data['final'].tolist()
+            event = data['event'].tolist()
+        outcome = None
+        if int(event[0]) != NO_EVENT:
+            outcome = Outcome(event_names[int(event[0])], event[1], event[2:5],
+                              event[5:8])
+        return CacheEntry(trail, final[:3], final[3:], outcome)
@@ -0,0 +1,217 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module is the command line entry point of the simulator. It has three
+subcommands: simulate throws pitches and prints where they end up, plot draws
+their trajectories, and bench runs the benchmarks in the analytics package.
+Only the modules a subcommand needs are imported, so simulate starts without
+matplotlib.
+
+Run it from the src directory, for example:
+    python -m baseball simulate Slider Curveball --integrator rk4
+    python -m baseball simulate --profile
+    python -m baseball simulate --integrator rk4 --dt auto --tolerance 1e-4
+    python -m baseball plot --output pitches.png
+    python -m baseball bench --engines batch --increments 0.001
+    python -m baseball bench --imports
+"""
+
+import argparse
+import sys
+
+from baseball import kernels, pitches, play_ball, stepsize
+
+# the predefined pitches, by class name
+pitch_names = ['Knuckleball', 'FourSeamFastball', 'TwoSeamFastball', 'Slider',
+               'Curveball', 'Changeup', 'Screwball']
+
+def make_pitches(names=None):
+    """Return a new instance of each named predefined pitch, or of all seven
+    if no names are given."""
+    if not names:
+        return play_ball.predefined_pitches()
+    return [getattr(pitches, name)() for name in names]
+
+def throw_all(pitch_list, distance, dt, integrator=None, batch=False,
+              keep_trails=True, backend=None, aerodynamics=None, wind=None,
+              tolerance=None):
+    """Throw a list of pitches one at a time, or together as a PitchBatch,
+    and return the thrown pitches. If dt is 'auto', each type of pitch is
+    thrown at the coarsest increment that meets the tolerance (a batch at the
+    finest of those); see baseball.stepsize."""
+    increments = [dt] * len(pitch_list)
+    if dt == 'auto':
+        increments = auto_increments(pitch_list, distance, integrator,
+                                     tolerance, aerodynamics, wind)
+    if not batch:
+        for p, increment in zip(pitch_list, increments):
+            p.throw(distance, increment, integrator, backend=backend,
+                    aerodynamics=aerodynamics, wind=wind)
+        return pitch_list
+    from baseball.batch import PitchBatch
+    thrown = PitchBatch.from_pitches(pitch_list)
+    thrown.throw(distance, min(increments), keep_trails, integrator, backend,
+                 aerodynamics, wind)
+    return thrown.to_pitches()
+
+def auto_increments(pitch_list, distance, integrator=None, tolerance=None,
+                    aerodynamics=None, wind=None):
+    """Return the increment that stepsize chooses for each pitch in the list,
+    studying each type of pitch once."""
+    if tolerance is None:
+        tolerance = stepsize.default_tolerance
+    return [stepsize.increment_for(p, distance, integrator, tolerance,
+                                   aerodynamics, wind) for p in pitch_list]
+
+def tables(args):
+    """Return the aerodynamic tables selected on the command line, if
+    any."""
+    if not args.aerodynamics:
+        return None
+    from npgphysics.aerodynamics import AerodynamicTables
+    return AerodynamicTables()
+
+def wind_field(args):
+    """Return the uniform wind selected on the command line, if any."""
+    if args.wind is None:
+        return None
+    from npgphysics.wind import WindField
+    return WindField.uniform(args.wind)
+
+def vector(text):
+    """Parse 'x,y,z' into a list of three floats."""
+    values = [float(x) for x in text.split(',')]
+    if len(values) != 3:
+        raise argparse.ArgumentTypeError("expected three comma-separated "
+                                         "numbers")
+    return values
+
+def simulate(args):
+    pitch_list = make_pitches(args.pitches)
+    aerodynamics, wind = tables(args), wind_field(args)
+    if args.profile:
+        from baseball import instrument
+        with instrument.profile(memory=True) as profiler:
+            thrown = throw_all(pitch_list, args.distance, args.dt,
+                               args.integrator, args.batch, False,
+                               args.backend, aerodynamics, wind,
+                               args.tolerance)
+    else:
+        thrown = throw_all(pitch_list, args.distance, args.dt,
+                           args.integrator, args.batch, False, args.backend,
+                           aerodynamics, wind, args.tolerance)
+    print("%-20s %-8s %9s %9s %9s %7s" % ('pitch', 'event', 'time (s)',
+                                          'y (m)', 'z (m)', 'strike'))
+    for p in thrown:
+        o = p.outcome
+        if o is None:
+            print("%-20s %-8s" % (p.label, '-'))
+            continue
+        print("%-20s %-8s %9.4f %9.4f %9.4f %7s"
+              % (p.label, o.event, o.time, o.plate_y, o.plate_z,
+                 'yes' if o.is_strike else 'no'))
+    if args.dt == 'auto':
+        # the increments were cached when the pitches were thrown
+        print()
+        shown = set()
+        for p, dt in zip(pitch_list, auto_increments(
+                pitch_list, args.distance, args.integrator, args.tolerance,
+                aerodynamics, wind)):
+            if type(p) not in shown:
+                shown.add(type(p))
+                print("%-20s dt = %g s" % (type(p).__name__, dt))
+    if args.profile:
+        print()
+        print(profiler.report())
+    return 0
+
+def plot(args):
+    from baseball.baseball_plotter import BaseballPlotter
+    thrown = throw_all(make_pitches(args.pitches), args.distance, args.dt,
+                       args.integrator, args.batch, backend=args.backend,
+                       aerodynamics=tables(args), wind=wind_field(args),
+                       tolerance=args.tolerance)
+    plotter = BaseballPlotter(headless=args.output is not None)
+    plotter.add_pitches(thrown)
+    plotter.plot_strike_zone()
+    if args.output is None:
+        plotter.show_plots()
+    else:
+        plotter.save(args.output)
+    return 0
+
+def bench(args, extra):
+    if args.imports:
+        from analytics import import_benchmark
+        return import_benchmark.main(extra)
+    from analytics import benchmark
+    return benchmark.main(extra)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='baseball',
+                                     description=__doc__.split('\n\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name, help_text in (('simulate', "throw pitches and print their "
+                                         "outcomes"),
+                            ('plot', "throw pitches and draw their "
+                                     "trajectories")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('pitches', nargs='*', metavar='PITCH',
+                             help="predefined pitches (default: all): %s"
+                                  % ', '.join(pitch_names))
+        command.add_argument('--distance', type=float,
+                             default=play_ball.distance)
+        command.add_argument('--dt', type=stepsize.parse_increment,
+                             default=play_ball.default_increment,
+                             help="time increment in seconds, or auto to "
+                                  "choose the coarsest one that meets the "
+                                  "tolerance (see baseball.stepsize)")
+        command.add_argument('--tolerance', type=float,
+                             help="plate location tolerance in meters for "
+                                  "--dt auto (default: 0.001)")
+        command.add_argument('--integrator',
+                             help="euler (default), semi-implicit-euler, "
+                                  "rk4 or rk45")
+        command.add_argument('--batch', action='store_true',
+                             help="throw the pitches together as a batch")
+        command.add_argument('--backend', choices=kernels.backends + ['auto'],
+                             help="python (default), numba or auto; see "
+                                  "baseball.kernels")
+        command.add_argument('--aerodynamics', action='store_true',
+                             help="use tabulated drag and lift coefficients "
+                                  "with spin decay; about a third slower "
+                                  "(see npgphysics.aerodynamics)")
+        command.add_argument('--wind', type=vector, metavar='VX,VY,VZ',
+                             help="a uniform wind velocity in m/s, e.g. "
+                                  "0,0,-3 (see npgphysics.wind)")
+        if name == 'simulate':
+            command.add_argument('--profile', action='store_true',
+                                 help="print the time spent in each phase "
+                                      "of the simulation loop (see "
+                                      "baseball.instrument)")
+        if name == 'plot':
+            command.add_argument('--output', help="save the figure to this "
+                                 "file (e.g. .png or .svg) instead of "
+                                 "showing it")
+
+    command = commands.add_parser('bench', help="run a benchmark; other "
+                                  "arguments are passed on to it")
+    command.add_argument('--imports', action='store_true',
+                         help="time the cold start of the simulation modules "
+                              "(analytics.import_benchmark) instead of the "
+                              "throughput (analytics.benchmark)")
+
+    args, extra = parser.parse_known_args(argv)
+    if args.command == 'bench':
+        return bench(args, extra)
+    if extra:
+        parser.error("unrecognized arguments: %s" % ' '.join(extra))
+    unknown = [name for name in args.pitches if name not in pitch_names]
+    if unknown:
+        parser.error("unknown pitches: %s" % ', '.join(unknown))
+    return {'simulate': simulate, 'plot': plot}[args.command](args)
+
+if __name__ == '__main__':
+    sys.exit(main())
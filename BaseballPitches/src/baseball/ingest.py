@@ -0,0 +1,418 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module ingests pitch-tracking exports, such as the Statcast CSV files of
+Baseball Savant, at season scale. The file is read in chunks of rows; each row
+is converted to a release point and velocity in the frame and units of Pitch,
+the spin that reproduces its observed plate location is fitted with
+baseball.solver, starting from the spin whose Magnus effect explains the
+tracked acceleration, and the pitch is thrown again with that spin. Chunks are
+fitted by a process pool, and only a few chunks per worker are read ahead, so
+memory stays bounded whatever the size of the file.
+
+The result of every pitch (its input row, the fitted spin and how well it
+fits, and the outcome of the re-simulation) is appended to a CSV file as soon
+as its chunk finishes, in input order, and a log of finished rows lets an
+interrupted run resume where it stopped. The full trajectories can also be
+kept in a baseball.store.TrajectoryStore.
+
+Tracking data uses feet and a frame with y from home plate towards the mound,
+x to the catcher's right and z up. Pitch uses meters with x from the release
+point towards the plate, y up and z to the catcher's right, so
+    x = distance - (y_tracking - front of the plate), y = z_tracking,
+    z = x_tracking,
+and the plate locations are taken at the front of the plate (x = distance).
+The tracked velocity is given at y = 50 ft; it is carried back to the release
+point with the tracked (constant) acceleration.
+
+Run it from the src directory, for example:
+    python -m baseball.ingest statcast_2024.csv fitted.csv --processes 8 \\
+        --trajectories trajectories_2024
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+from numpy import arange, array, column_stack, cross, einsum, empty, \
+    isfinite, nan, savetxt, sqrt, where, zeros
+from baseball import solver
+from baseball.batch import PitchBatch
+from baseball.pitches import Pitch
+from npgphysics import forces
+
+feet = 0.3048               # meters per foot
+plate_front = 17 / 12       # feet from the tip of home plate to its front
+velocity_y = 50.0           # feet from the plate at which v and a are given
+
+# the fields of a row and the Statcast columns they are read from; the
+# accelerations are optional
+statcast_columns = {'release_x': 'release_pos_x',
+                    'release_y': 'release_pos_y',
+                    'release_z': 'release_pos_z',
+                    'vx': 'vx0', 'vy': 'vy0', 'vz': 'vz0',
+                    'ax': 'ax0', 'ay': 'ay0', 'az': 'az0',
+                    'plate_x': 'plate_x', 'plate_z': 'plate_z'}
+optional_fields = ['ax', 'ay', 'az']
+fields = list(statcast_columns)
+
+columns = (['row', 'px', 'py', 'pz', 'vx', 'vy', 'vz', 'target_y',
+            'target_z', 'sx', 'sy', 'sz', 'fit_error', 'converged',
+            'iterations', 'event', 'time', 'plate_y', 'plate_z', 'break_y',
+            'break_z'])
+
+def _number(text):
+    """Parse a field, with nan for an empty or non-numeric one (e.g.
+    'null')."""
+    try:
+        return float(text)
+    except ValueError:
+        return nan
+
+def read_chunks(path, chunk_size, column_names=None, label_column=None,
+                skip=0):
+    """Read a tracking CSV file one chunk of rows at a time.
+
+    Parameters
+    ----------
+        path : string
+            The CSV file, with a header line.
+        chunk_size : int
+            The number of rows per chunk.
+        column_names : dict
+            The column of each field, as in statcast_columns (the default).
+        label_column : string
+            A column to label the pitches with (e.g. 'pitch_type'), if the
+            file has it.
+        skip : int
+            The number of rows to skip, e.g. when resuming.
+
+    Yields
+    ------
+        (int, numpy.ndarray, list of string)
+            The number of the first row of the chunk (counting from 0 after
+            the header), a (K, len(fields)) array of the fields in tracking
+            units, with nan for missing or non-numeric values, and the
+            labels (or None).
+    """
+    column_names = dict(statcast_columns, **(column_names or {}))
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        missing = [column_names[name] for name in fields
+                   if name not in optional_fields
+                   and column_names[name] not in header]
+        if missing:
+            raise ValueError("%s has no column %s"
+                             % (path, ', '.join(missing)))
+        indices = [header.index(column_names[name])
+                   if column_names[name] in header else None
+                   for name in fields]
+        label_index = (header.index(label_column)
+                       if label_column in header else None)
+        deque(islice(reader, skip), maxlen=0)
+        first = skip
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            values = empty((len(rows), len(fields)))
+            for r, row in enumerate(rows):
+                values[r] = [_number(row[i]) if i is not None else nan
+                             for i in indices]
+            labels = (None if label_index is None
+                      else [row[label_index] for row in rows])
+            yield first, values, labels
+            first += len(rows)
+
+def to_pitch_frame(values, distance):
+    """Convert rows of tracking fields to the frame and units of Pitch.
+
+    Parameters
+    ----------
+        values : numpy.ndarray
+            A (K, len(fields)) array as yielded by read_chunks.
+        distance : float
+            The distance (in meters) from the release point of the Pitch
+            frame to the front of the plate.
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray,
+         numpy.ndarray)
+            The (K, 3) release points and velocities in meters and meters
+            per second, the (K, 2) plate locations (y, z) in meters, a (K,)
+            mask of the rows with every required value, and the (K, 3)
+            tracked accelerations in meters per second squared (nan where
+            they are missing).
+    """
+    (release_x, release_y, release_z, vx, vy, vz, ax, ay, az, plate_x,
+     plate_z) = values.T
+    # without accelerations, the velocity is taken as the release velocity
+    has_acceleration = isfinite(ax) & isfinite(ay) & isfinite(az)
+    ax, ay, az = (where(has_acceleration, a, 0.0) for a in (ax, ay, az))
+    acceleration = where(has_acceleration[:, None],
+                         column_stack((-ay, az, ax)) * feet, nan)
+
+    # back from y = 50 ft to the release point: vy^2 grows by 2 ay dy, and
+    # the time it takes gives the other components
+    vy_release = -sqrt(abs(vy * vy + 2 * ay * (release_y - velocity_y)))
+    moving = ay != 0
+    t = where(moving, (vy_release - vy) / where(moving, ay, 1.0),
+              (release_y - velocity_y) / where(vy != 0, vy, -1.0))
+    vy_release = where(has_acceleration & moving, vy_release, vy)
+    t = where(has_acceleration, t, 0.0)
+
+    position = column_stack((distance - (release_y - plate_front) * feet,
+                             release_z * feet, release_x * feet))
+    velocity = column_stack((-vy_release, vz + az * t, vx + ax * t)) * feet
+    targets = column_stack((plate_z, plate_x)) * feet
+    valid = (isfinite(position).all(axis=1) & isfinite(velocity).all(axis=1)
+             & isfinite(targets).all(axis=1) & (velocity[:, 0] > 0))
+    return position, velocity, targets, valid, acceleration
+
+def magnus_spin(velocity, acceleration):
+    """Estimate the spin of pitches from their tracked acceleration.
+
+    What gravity and drag do not explain of the acceleration is taken as the
+    Magnus acceleration a = v x s / m, and the smallest spin that produces it
+    (the one perpendicular to v) is s = m (a x v) / |v|^2. Spin along the
+    velocity has no Magnus effect, so it cannot be recovered.
+
+    Parameters
+    ----------
+        velocity, acceleration : numpy.ndarray
+            (K, 3) arrays in the frame and units of Pitch, as returned by
+            to_pitch_frame.
+
+    Returns
+    -------
+        numpy.ndarray
+            The (K, 3) spins, zero where the acceleration is missing.
+    """
+    k_drag, gravity, inverse_mass = forces.acceleration_constants(
+        Pitch.mass, Pitch.area, Pitch.drag_coefficient)
+    speed_squared = einsum('ij,ij->i', velocity, velocity)
+    magnus = acceleration + k_drag * sqrt(speed_squared)[:, None] * velocity
+    magnus[:, 1] += gravity
+    spin = cross(magnus, velocity) / (inverse_mass * speed_squared)[:, None]
+    return where(isfinite(spin), spin, 0.0)
+
+def fit_chunk(task):
+    """Fit the spin of every pitch of a chunk and throw them again. This runs
+    in a worker process.
+
+    Parameters
+    ----------
+        task : tuple
+            (chunk id, row numbers, release points, velocities, tracked
+            accelerations, targets, labels, distance, dt, integrator,
+            tolerance, keep_trails)
+
+    Returns
+    -------
+        (int, numpy.ndarray, baseball.batch.PitchBatch)
+            The chunk id, an array with one row per pitch and one column per
+            entry of the columns list, and the thrown batch if keep_trails is
+            set (None otherwise).
+    """
+    (chunk, rows, position, velocity, acceleration, targets, labels, distance,
+     dt, integrator, tolerance, keep_trails) = task
+    if len(rows) == 0:
+        return chunk, zeros((0, len(columns))), None
+    solutions = solver.solve(targets, position, velocity,
+                             magnus_spin(velocity, acceleration),
+                             distance=distance, dt=dt, integrator=integrator,
+                             tolerance=tolerance)
+    spin = array([s.spin for s in solutions])
+    batch = PitchBatch(position, velocity, spin, labels)
+    batch.throw(distance, dt, keep_trails, integrator)
+    summary = column_stack((rows, position, velocity, targets, spin,
+                            [s.error for s in solutions],
+                            [s.converged for s in solutions],
+                            [s.iterations for s in solutions],
+                            batch.events, batch.times, batch.plate_y,
+                            batch.plate_z, batch.breaks))
+    return chunk, summary, batch if keep_trails else None
+
+def read_progress(log_path):
+    """Read the log of finished chunks.
+
+    Returns
+    -------
+        (int, int, int)
+            The number of input rows that are finished, the size of the
+            output file and the number of stored trajectories once the last
+            of them was written.
+    """
+    rows = size = stored = 0
+    if os.path.exists(log_path):
+        with open(log_path) as log:
+            for line in log:
+                entries = line.split()
+                if len(entries) == 3:
+                    rows, size, stored = (int(x) for x in entries)
+    return rows, size, stored
+
+def run(path, output, trajectories=None, distance=18, dt=0.01,
+        integrator='rk4', tolerance=1e-4, processes=None, chunk_size=1000,
+        column_names=None, label_column='pitch_type', progress=None):
+    """Fit and re-simulate every pitch of a tracking CSV file.
+
+    After each chunk, the number of finished input rows is recorded in
+    output + '.done' along with the size of the output file and the number
+    of stored trajectories. If the same run is started again, those rows are
+    skipped and anything written after them is discarded.
+
+    Parameters
+    ----------
+        path : string
+            The tracking CSV file.
+        output : string
+            The CSV file for the results.
+        trajectories : string
+            The directory of a TrajectoryStore for the re-simulated
+            trajectories, or None to keep only the results.
+        distance : float
+            The distance (in meters) from the release frame to the plate.
+        dt : float
+            The time increment (in seconds) of the fits and re-simulations.
+        integrator : string or npgmath.integrators.Integrator
+            Their integrator.
+        tolerance : float
+            The largest acceptable distance (in meters) between the simulated
+            and the observed plate location.
+        processes : int
+            The number of worker processes. Defaults to the number of CPUs.
+        chunk_size : int
+            The number of rows fitted per task.
+        column_names : dict
+            Overrides of statcast_columns for other exports.
+        label_column : string
+            The column to label stored trajectories with, if present.
+        progress : function
+            If given, called as progress(rows read, rows fitted) after each
+            chunk, counting only this call.
+
+    Returns
+    -------
+        (int, int, int)
+            The number of rows read, fitted, and fitted without converging by
+            this call. Rows with missing or unusable values are read but not
+            fitted.
+    """
+    log_path = output + '.done'
+    finished, size, stored = read_progress(log_path)
+    store = None
+    if trajectories is not None:
+        from baseball.store import TrajectoryStore
+        store = TrajectoryStore(trajectories)
+        store.truncate(stored)
+
+    def tasks():
+        for chunk, (first, values, labels) in enumerate(read_chunks(
+                path, chunk_size, column_names, label_column, finished)):
+            position, velocity, targets, valid, acceleration = \
+                to_pitch_frame(values, distance)
+            if labels is not None:
+                labels = [l for l, v in zip(labels, valid) if v]
+            rows = (first + arange(len(values)))[valid]
+            yield (chunk, rows, position[valid], velocity[valid],
+                   acceleration[valid], targets[valid], labels, distance, dt,
+                   integrator, tolerance, store is not None), \
+                first + len(values)
+
+    mode = 'r+' if os.path.exists(output) else 'w'
+    read = fitted = unconverged = 0
+    converged = columns.index('converged')
+    with open(output, mode) as out, open(log_path, 'a') as log:
+        if mode == 'r+':
+            out.truncate(size)
+            out.seek(size)
+        if size == 0:
+            out.write(','.join(columns) + '\n')
+
+        def write(result, end):
+            nonlocal read, fitted, unconverged
+            _, summary, batch = result
+            if batch is not None and len(batch):
+                store.append(batch, dt, integrator)
+            savetxt(out, summary, delimiter=',', fmt='%.10g')
+            out.flush()
+            os.fsync(out.fileno())
+            log.write("%d %d %d\n" % (end, out.tell(),
+                                      len(store) if store else 0))
+            log.flush()
+            read = end - finished
+            fitted += len(summary)
+            unconverged += int((summary[:, converged] == 0).sum())
+            if progress is not None:
+                progress(read, fitted)
+
+        # a few chunks per worker in flight, so that the file is read only
+        # as fast as it is fitted and the results are written in order
+        with Pool(processes) as pool:
+            pending = deque()
+            limit = 2 * (processes or os.cpu_count() or 1)
+            for task, end in tasks():
+                pending.append((pool.apply_async(fit_chunk, (task,)), end))
+                if len(pending) >= limit:
+                    result, end = pending.popleft()
+                    write(result.get(), end)
+            while pending:
+                result, end = pending.popleft()
+                write(result.get(), end)
+    return read, fitted, unconverged
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('input', help="tracking CSV file")
+    parser.add_argument('output', help="CSV file for the results")
+    parser.add_argument('--trajectories', metavar='DIRECTORY',
+                        help="also keep the trajectories in this store")
+    parser.add_argument('--distance', type=float, default=18)
+    parser.add_argument('--dt', type=float, default=0.01)
+    parser.add_argument('--integrator', default='rk4')
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--column', action='append', default=[],
+                        metavar='FIELD=COLUMN',
+                        help="read a field from another column, e.g. "
+                             "vx=vx_50 (fields: %s)" % ', '.join(fields))
+    args = parser.parse_args(argv)
+
+    column_names = dict(c.split('=', 1) for c in args.column)
+    unknown = set(column_names) - set(fields)
+    if unknown:
+        parser.error("unknown fields: %s" % ', '.join(sorted(unknown)))
+    start = time.perf_counter()
+
+    def progress(read, fitted):
+        elapsed = time.perf_counter() - start
+        sys.stderr.write("\r%d rows read, %d fitted (%.0f rows/s)"
+                         % (read, fitted, read / elapsed if elapsed else 0))
+
+    read, fitted, unconverged = run(args.input, args.output,
+                                    args.trajectories, args.distance, args.dt,
+                                    args.integrator, args.tolerance,
+                                    args.processes, args.chunk_size,
+                                    column_names, progress=progress)
+    elapsed = time.perf_counter() - start
+    sys.stderr.write("\nread %d rows and fitted %d in %.2f s (%.0f rows/s)\n"
+                     % (read, fitted, elapsed, read / elapsed if elapsed
+                        else 0))
+    sys.stderr.write("%d of the fitted rows (%.1f%%) did not converge to "
+                     "within the tolerance\n"
+                     % (unconverged, 100.0 * unconverged / fitted if fitted
+                        else 0))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module measures where the time goes inside Pitch.throw and
+PitchBatch.throw. While a Profiler is active, every throw records how long it
+spent in each phase of the simulation loop, how many steps it took, and how
+many memory blocks it allocated (sys.getallocatedblocks), in one ThrowProfile
+per throw. The phases are:
+    force    evaluating the acceleration (drag, Magnus effect and gravity).
+    step     the integrator, not counting the force evaluations inside it.
+    trail    appending positions to the trail.
+    locate   locating the plate crossing or ground impact in the last step.
+    kernel   the whole loop of a compiled backend (see baseball.kernels),
+             which cannot be split into phases.
+Time that is not in any phase (the loop itself, the retention modes, ...) is
+reported as 'other'.
+
+Instrumentation is off unless a Profiler is active, and then a throw only
+checks one module attribute, so it costs nothing per step. When it is on, the
+functions of the loop are wrapped, which adds roughly a microsecond per call;
+compare phases with each other rather than with an uninstrumented run.
+
+For example:
+    with instrument.profile() as profiler:
+        play_ball.just_throw()
+    print(profiler.report())
+
+Exporters are functions that are called with each ThrowProfile as soon as its
+throw finishes, e.g. instrument.json_lines(sys.stderr) or a function that
+sends the numbers to a metrics system.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+phases = ['force', 'step', 'trail', 'locate', 'kernel']
+
+# the Profiler that throws report to, or None when instrumentation is off
+active = None
+
+class ThrowProfile:
+    """The measurements of one throw, or the sum of several.
+
+    Attributes
+    ----------
+        label : string
+            The label of the pitch, or e.g. 'batch of 100'.
+        throws : int
+            The number of throws measured.
+        pitches : int
+            The number of pitches thrown.
+        steps : int
+            The number of steps taken, summed over the pitches.
+        seconds : float
+            The wall time of the whole throw.
+        blocks : int
+            The change in the number of allocated memory blocks over the
+            throw, i.e. what the throw kept (mostly the trail).
+        calls, phase_seconds, phase_blocks : dict
+            The number of calls, the time spent and the change in allocated
+            blocks of each phase. phase_blocks includes the phases called
+            from inside a phase, and is only filled in when the Profiler
+            counts allocations per phase.
+    """
+
+    def __init__(self, label, pitches=1):
+        self.label = label
+        self.throws = 1
+        self.pitches = pitches
+        self.steps = 0
+        self.seconds = 0.0
+        self.blocks = 0
+        self.calls = dict.fromkeys(phases, 0)
+        self.phase_seconds = dict.fromkeys(phases, 0.0)
+        self.phase_blocks = dict.fromkeys(phases, 0)
+
+    @property
+    def other_seconds(self):
+        """The time of the throw that is not in any phase."""
+        return self.seconds - sum(self.phase_seconds.values())
+
+    def add(self, other):
+        """Add the measurements of another profile to this one."""
+        self.throws += other.throws
+        self.pitches += other.pitches
+        self.steps += other.steps
+        self.seconds += other.seconds
+        self.blocks += other.blocks
+        for phase in phases:
+            self.calls[phase] += other.calls[phase]
+            self.phase_seconds[phase] += other.phase_seconds[phase]
+            self.phase_blocks[phase] += other.phase_blocks[phase]
+
+    def as_dict(self):
+        return {'label': self.label, 'throws': self.throws,
+                'pitches': self.pitches, 'steps': self.steps,
+                'seconds': self.seconds,
+                'blocks': self.blocks, 'calls': dict(self.calls),
+                'phase_seconds': dict(self.phase_seconds),
+                'phase_blocks': dict(self.phase_blocks),
+                'other_seconds': self.other_seconds}
+
+class Profiler:
+    """Collects a ThrowProfile for every throw while it is active.
+
+    Attributes
+    ----------
+        records : list of ThrowProfile
+            One profile per throw, in the order they finished.
+        hooks : list of function
+            The exporters, called with each profile as it finishes.
+        memory : bool
+            Whether allocated blocks are counted per phase as well as per
+            throw. This adds two calls to sys.getallocatedblocks per wrapped
+            call.
+    """
+
+    def __init__(self, memory=False, hooks=()):
+        self.records = []
+        self.hooks = list(hooks)
+        self.memory = memory
+        self.current = None
+        self._nested = 0.0
+
+    def add_hook(self, hook):
+        """Call hook(profile) with each ThrowProfile as its throw finishes."""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    @contextmanager
+    def measure(self, label, pitches=1):
+        """Record one throw. The functions wrapped with timed while the
+        context is open add to its profile, and the profile is passed to
+        the hooks when the context closes. Nested throws are counted in the
+        outermost one."""
+        if self.current is not None:
+            yield self.current
+            return
+        record = self.current = ThrowProfile(label, pitches)
+        self._nested = 0.0
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            record.blocks = sys.getallocatedblocks() - blocks
+            if not record.steps:
+                record.steps = record.calls['step']
+            self.current = None
+            self.records.append(record)
+            for hook in self.hooks:
+                hook(record)
+
+    def timed(self, phase, function):
+        """Return function wrapped so that its calls are counted and timed as
+        phase in the current throw. Time spent in other wrapped functions
+        that it calls is only counted in theirs (e.g. the force evaluations
+        inside an integrator step)."""
+        clock = time.perf_counter
+        blocks = sys.getallocatedblocks if self.memory else None
+        record = self.current
+
+        def wrapper(*args, **kwargs):
+            outer = self._nested
+            self._nested = 0.0
+            if blocks is not None:
+                before = blocks()
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                record.calls[phase] += 1
+                record.phase_seconds[phase] += elapsed - self._nested
+                if blocks is not None:
+                    record.phase_blocks[phase] += blocks() - before
+                self._nested = outer + elapsed
+
+        return wrapper
+
+    def totals(self, label='total'):
+        """Return the sum of every recorded throw as one ThrowProfile."""
+        total = ThrowProfile(label, 0)
+        total.throws = 0
+        for record in self.records:
+            total.add(record)
+        return total
+
+    def by_label(self):
+        """Return one summed ThrowProfile per label, e.g. per pitch type over
+        several runs of just_throw."""
+        totals = {}
+        for record in self.records:
+            if record.label not in totals:
+                totals[record.label] = ThrowProfile(record.label, 0)
+                totals[record.label].throws = 0
+            totals[record.label].add(record)
+        return totals
+
+    def clear(self):
+        self.records = []
+
+    def report(self):
+        """Return a table with the time per phase of each label and of the
+        total, in milliseconds."""
+        columns = [p for p in phases if any(r.calls[p] for r in self.records)]
+        header = "%-20s %7s %8s" % ('label', 'throws', 'steps')
+        header += ''.join(" %9s" % c for c in columns + ['other', 'total'])
+        header += " %9s" % 'blocks'
+        lines = [header + "\n" + '-' * len(header)]
+        for row in list(self.by_label().values()) + [self.totals()]:
+            line = "%-20s %7d %8d" % (row.label[:20], row.throws, row.steps)
+            line += ''.join(" %9.3f" % (row.phase_seconds[c] * 1000)
+                            for c in columns)
+            line += " %9.3f %9.3f %9d" % (row.other_seconds * 1000,
+                                          row.seconds * 1000, row.blocks)
+            lines.append(line)
+        lines.append("(times in ms)")
+        return '\n'.join(lines)
+
+@contextmanager
+def profile(memory=False, hooks=()):
+    """Turn instrumentation on for the duration of a with block and yield the
+    Profiler that collects the measurements.
+
+    Parameters
+    ----------
+        memory : bool
+            Count allocated blocks per phase as well as per throw.
+        hooks : list of function
+            Exporters to call with each ThrowProfile.
+    """
+    global active
+    previous = active
+    active = Profiler(memory, hooks)
+    try:
+        yield active
+    finally:
+        active = previous
+
+def enable(profiler=None):
+    """Turn instrumentation on until disable is called and return the
+    Profiler."""
+    global active
+    active = profiler if profiler is not None else Profiler()
+    return active
+
+def disable():
+    """Turn instrumentation off and return the Profiler that was active."""
+    global active
+    profiler, active = active, None
+    return profiler
+
+def timed(phase, function):
+    """Return function wrapped by the active Profiler if a throw is being
+    measured, or function itself otherwise. The simulation loops call this
+    once per throw for each function they call per step."""
+    if active is None or active.current is None:
+        return function
+    return active.timed(phase, function)
+
+def wrapper(phase):
+    """Return a function that wraps functions like timed(phase, function)
+    if a throw is being measured, or None otherwise. For loops that build a
+    new function every step."""
+    if active is None or active.current is None:
+        return None
+    return lambda function: active.timed(phase, function)
+
+def count_steps(steps):
+    """Add steps to the throw being measured, if any. For loops whose steps
+    are not wrapped with timed, e.g. a compiled backend."""
+    if active is not None and active.current is not None:
+        active.current.steps += steps
+
+def json_lines(stream):
+    """Return an exporter that writes each ThrowProfile to stream as one line
+    of JSON."""
+    def hook(record):
+        stream.write(json.dumps(record.as_dict()) + '\n')
+    return hook
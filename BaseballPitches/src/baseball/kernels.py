@@ -0,0 +1,312 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module holds the integrate-until-plate loop of a pitch written as plain
+loops over floats, so that it can be compiled by Numba
+(https://numba.pydata.org/) when it is installed. The compiled loop replaces
+the interpreted step-by-step loop of Pitch.throw and PitchBatch.throw for the
+fixed-step integrators; the Python implementation in those classes is still
+the reference and is used whenever a compiled backend is not selected or not
+available.
+
+The backend is chosen at runtime, per call with the backend argument of
+Pitch.throw and PitchBatch.throw, or for the whole process with the
+BASEBALL_BACKEND environment variable:
+    'python'  the Python implementation (the default).
+    'numba'   the compiled loop. Numba is only imported, and the loop only
+              compiled, the first time it is used.
+    'auto'    'numba' if it is installed, 'python' otherwise.
+Adaptive integrators (e.g. 'rk45') always use the Python implementation.
+"""
+
+import os
+from importlib.util import find_spec
+from math import sqrt
+
+from numpy import arange, asarray, cumsum, empty, flatnonzero, repeat, \
+    zeros
+from baseball import instrument
+from baseball.trail import estimate_steps
+from npgmath import integrators
+from npgphysics import forces
+
+# integrators that have a compiled counterpart, by name
+EULER, SEMI_IMPLICIT_EULER, RK4 = 0, 1, 2
+methods = {'euler': EULER, 'semi-implicit-euler': SEMI_IMPLICIT_EULER,
+           'rk4': RK4}
+
+backends = ['python', 'numba']
+
+_kernels = {}
+
+def available_backends():
+    """Return the names of the backends that can be used on this machine."""
+    return [b for b in backends if b == 'python' or find_spec(b) is not None]
+
+def resolve(backend=None, integrator=None):
+    """Return the backend that a throw with the given backend and integrator
+    runs on.
+
+    Parameters
+    ----------
+        backend : string
+            'python', 'numba' or 'auto'. If None, the BASEBALL_BACKEND
+            environment variable is used, and 'python' if it is not set.
+        integrator : string or npgmath.integrators.Integrator
+            The integrator of the throw. Integrators without a compiled
+            counterpart always run on 'python'.
+
+    Returns
+    -------
+        string
+            'python' or 'numba'.
+    """
+    if backend is None:
+        backend = os.environ.get('BASEBALL_BACKEND', 'python')
+    if backend == 'auto':
+        backend = 'numba' if 'numba' in available_backends() else 'python'
+    if backend not in backends:
+        raise ValueError("unknown backend %r, expected one of: %s, auto"
+                         % (backend, ', '.join(backends)))
+    if backend != 'python' and backend not in available_backends():
+        raise ValueError("backend %r is not installed" % backend)
+    if method_of(integrator) is None:
+        return 'python'
+    return backend
+
+def method_of(integrator):
+    """Return the code of the compiled counterpart of an integrator, or None
+    if it has none."""
+    integrator = integrators.get_integrator(integrator)
+    if integrator.adaptive:
+        return None
+    return methods.get(integrator.name)
+
+def make_kernels(jit):
+    """Build the integration loop, decorating each function with jit.
+
+    Parameters
+    ----------
+        jit : function
+            A decorator such as numba.njit, or the identity function to get
+            the loop uncompiled.
+
+    Returns
+    -------
+        (function, function)
+            integrate(state, previous, spin, k_drag, gravity, inverse_mass,
+            distance, h, method, t, trail, keep) advances one pitch, and
+            integrate_batch(states, previous, spins, k_drag, gravity,
+            inverse_mass, distance, h, method, times, steps, trails, offsets,
+            capacities, keep) advances every pitch of a batch, with one
+            k_drag and inverse_mass per pitch and the trail of pitch i in
+            rows offsets[i] to offsets[i] + capacities[i] of trails. See
+            throw_pitch and throw_batch.
+    """
+
+    @jit
+    def derivative(y, s, k_drag, gravity, inverse_mass, out):
+        # same operations, in the same order, as forces.acceleration
+        vx, vy, vz = y[3], y[4], y[5]
+        drag = k_drag * sqrt(vx * vx + vy * vy + vz * vz)
+        out[0] = vx
+        out[1] = vy
+        out[2] = vz
+        out[3] = (vy * s[2] - vz * s[1]) * inverse_mass - drag * vx
+        out[4] = (vz * s[0] - vx * s[2]) * inverse_mass - drag * vy - gravity
+        out[5] = (vx * s[1] - vy * s[0]) * inverse_mass - drag * vz
+
+    @jit
+    def step(y, s, k_drag, gravity, inverse_mass, h, method, work):
+        # same operations, in the same order, as npgmath.integrators
+        k1, k2, k3, k4, z = work[0], work[1], work[2], work[3], work[4]
+        derivative(y, s, k_drag, gravity, inverse_mass, k1)
+        if method == 0:
+            for i in range(6):
+                y[i] = y[i] + k1[i] * h
+        elif method == 1:
+            for i in range(3):
+                y[i + 3] = y[i + 3] + k1[i + 3] * h
+                y[i] = y[i] + y[i + 3] * h
+        else:
+            for i in range(6):
+                z[i] = y[i] + k1[i] * (h / 2)
+            derivative(z, s, k_drag, gravity, inverse_mass, k2)
+            for i in range(6):
+                z[i] = y[i] + k2[i] * (h / 2)
+            derivative(z, s, k_drag, gravity, inverse_mass, k3)
+            for i in range(6):
+                z[i] = y[i] + k3[i] * h
+            derivative(z, s, k_drag, gravity, inverse_mass, k4)
+            for i in range(6):
+                y[i] = y[i] + (k1[i] + 2 * k2[i] + 2 * k3[i] + k4[i]) * (
+                    h / 6)
+
+    @jit
+    def integrate(y, previous, s, k_drag, gravity, inverse_mass, distance, h,
+                  method, t, trail, keep):
+        work = empty((5, 6))
+        steps = 0
+        while y[0] < distance and y[1] > 0:
+            if keep and steps == trail.shape[0]:
+                break
+            previous[:] = y
+            step(y, s, k_drag, gravity, inverse_mass, h, method, work)
+            t = t + h
+            if keep:
+                trail[steps, 0] = y[0]
+                trail[steps, 1] = y[1]
+                trail[steps, 2] = y[2]
+            steps += 1
+        return steps, t
+
+    @jit
+    def integrate_batch(states, previous, spins, k_drag, gravity,
+                        inverse_mass, distance, h, method, times, steps,
+                        trails, offsets, capacities, keep):
+        for i in range(states.shape[0]):
+            start = steps[i]
+            first = offsets[i] + start + 1
+            taken, t = integrate(states[i], previous[i], spins[i],
+                                 k_drag[i], gravity, inverse_mass[i],
+                                 distance, h, method, times[i],
+                                 trails[first:offsets[i] + capacities[i] + 1],
+                                 keep)
+            steps[i] = start + taken
+            times[i] = t
+
+    return integrate, integrate_batch
+
+def kernels(backend):
+    """Return the (integrate, integrate_batch) functions of a backend other
+    than 'python', compiling them on first use."""
+    if backend not in _kernels:
+        if backend == 'numba':
+            import numba
+            _kernels[backend] = make_kernels(numba.njit)
+        else:
+            raise ValueError("backend %r has no kernels" % backend)
+    return _kernels[backend]
+
+def throw_pitch(pitch, distance, dt, integrator, backend, keep_trail=True):
+    """Throw a single pitch with the compiled loop. The pitch ends up with
+    the same trail, position, velocity and outcome that Pitch.throw gives
+    it with the Python implementation.
+
+    Parameters
+    ----------
+        pitch : baseball.Pitch
+            The pitch to throw.
+        distance, dt, integrator
+            The arguments of Pitch.throw. The integrator must have a compiled
+            counterpart (see resolve).
+        backend : string
+            The backend to use, e.g. 'numba'.
+        keep_trail : bool
+            If False, only the final position is added to the trail.
+    """
+    integrate = kernels(backend)[0]
+    k_drag, gravity, inverse_mass = forces.acceleration_constants(
+        pitch.mass, pitch.area, pitch.drag_coefficient)
+    method = method_of(integrator)
+    state = zeros(6)
+    state[:3] = pitch.position
+    state[3:] = pitch.velocity
+    previous = state.copy()
+    spin = zeros(3)
+    spin[:] = pitch.spin
+
+    t = 0.0
+    steps = 0
+    capacity = (estimate_steps(pitch.position, pitch.velocity, distance, dt)
+                if keep_trail else 0)
+    while True:
+        buffer = empty((capacity, 3))
+        taken, t = integrate(state, previous, spin, k_drag, gravity,
+                             inverse_mass, distance, dt, method, t, buffer,
+                             keep_trail)
+        steps += taken
+        if keep_trail:
+            pitch.trail.extend(buffer[:taken])
+        if not (state[0] < distance and state[1] > 0):
+            break
+        capacity = max(2 * capacity, 16)
+
+    instrument.count_steps(steps)
+    if steps:
+        if not keep_trail:
+            pitch.trail.append(state[:3].tolist())
+        pitch.position = state[:3].tolist()
+        pitch.velocity = state[3:].tolist()
+        pitch._locate(distance, t - dt, previous, t, state)
+
+def throw_batch(batch, distance, dt, integrator, backend, keep_trails=True):
+    """Throw a batch of pitches with the compiled loop. Each pitch is
+    advanced to the plate on its own, so no masking is needed. The batch ends
+    up in the same state as after PitchBatch.throw with the Python
+    implementation.
+
+    Parameters
+    ----------
+        batch : baseball.batch.PitchBatch
+            The batch to throw.
+        distance, dt, integrator, keep_trails
+            The arguments of PitchBatch.throw. The integrator must have a
+            compiled counterpart (see resolve).
+        backend : string
+            The backend to use, e.g. 'numba'.
+    """
+    integrate_batch = kernels(backend)[1]
+    method = method_of(integrator)
+    n = len(batch)
+    k_drag, gravity, inverse_mass = forces.acceleration_constants(
+        *batch.constants())
+    # one value per pitch, whether or not the constants differ
+    k_drag = zeros(n) + asarray(k_drag).ravel()
+    inverse_mass = zeros(n) + asarray(inverse_mass).ravel()
+    states = zeros((n, 6))
+    states[:, :3] = batch.position
+    states[:, 3:] = batch.velocity
+    previous = states.copy()
+    times = zeros(n)
+    steps = zeros(n, dtype=int)
+
+    # the trails share one flat buffer, with room for the estimated steps of
+    # each pitch after its release point, as the points of PitchBatch.throw
+    capacities = zeros(n, dtype=int)
+    if keep_trails:
+        capacities[:] = [estimate_steps(p, v, distance, dt) for p, v in
+                         zip(batch.position.tolist(),
+                             batch.velocity.tolist())]
+    offsets = cumsum(capacities + 1) - (capacities + 1)
+    trails = empty((int((capacities + 1).sum()), 3))
+    trails[offsets] = batch.position
+    while True:
+        integrate_batch(states, previous, batch.spin, k_drag, gravity,
+                        inverse_mass, distance, dt, method, times, steps,
+                        trails, offsets, capacities, keep_trails)
+        flying = flatnonzero((states[:, 0] < distance) & (states[:, 1] > 0))
+        if not flying.size:
+            break
+        # only the pitches that ran out of room are given more
+        capacities[flying] = 2 * capacities[flying] + 16
+        grown_offsets = cumsum(capacities + 1) - (capacities + 1)
+        lengths = steps + 1
+        within = arange(int(lengths.sum())) - repeat(
+            cumsum(lengths) - lengths, lengths)
+        grown = empty((int((capacities + 1).sum()), 3))
+        grown[repeat(grown_offsets, lengths) + within] = \
+            trails[repeat(offsets, lengths) + within]
+        trails, offsets = grown, grown_offsets
+
+    batch.steps += steps
+    instrument.count_steps(int(steps.sum()))
+    thrown = steps > 0
+    if thrown.any():
+        batch._locate(distance, thrown.nonzero()[0], times[thrown] - dt,
+                      previous[thrown], times[thrown], states[thrown])
+    batch.position = states[:, :3].copy()
+    batch.velocity = states[:, 3:].copy()
+    if keep_trails:
+        batch.trails = [trails[o:o + s + 1] for o, s in zip(offsets, steps)]
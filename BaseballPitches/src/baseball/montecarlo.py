@@ -0,0 +1,204 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module estimates how likely a pitch is to be a strike when the pitcher
+cannot repeat it exactly. Random noise is added to the release point, velocity
+and spin of a nominal pitch (e.g. pitches.Slider), the variants are simulated
+in batches, and the plate locations are accumulated into a fixed-size 2-D
+histogram. Only one batch is in memory at a time and trails are never kept, so
+memory use does not depend on the number of samples.
+
+Run it from the src directory, for example:
+    python -m baseball.montecarlo Slider --samples 1000000 --seed 7
+"""
+
+import argparse
+import sys
+import time
+
+from numpy import array, concatenate, histogram2d, linspace, savez, zeros
+from numpy.random import default_rng
+from baseball import pitches
+from baseball.batch import PitchBatch
+from baseball.outcome import GROUND, is_strike, strike_zone_bottom, \
+    strike_zone_top, strike_zone_half_width
+
+default_position_sigma = 0.03   # in meters
+default_velocity_sigma = 0.4    # in meters per second
+default_spin_sigma = 0.002      # in kilograms per second
+
+# the heatmap covers the strike zone plus this margin (in meters) on all sides
+default_margin = 0.3
+
+class MonteCarloResult:
+    """The aggregated outcome of a Monte Carlo run.
+
+    Attributes
+    ----------
+        samples : int
+            The number of simulated pitches.
+        strikes : int
+            The number of pitches that crossed the plate inside the strike
+            zone.
+        ground : int
+            The number of pitches that hit the ground before the plate.
+        counts : numpy.ndarray
+            A 2-D histogram of plate locations. Rows are height bins and
+            columns are width bins. Pitches outside the edges are not counted.
+        y_edges, z_edges : numpy.ndarray
+            The bin edges (in meters) of the height and width axes.
+        seconds : float
+            The wall time of the run.
+    """
+
+    def __init__(self, y_edges, z_edges):
+        self.y_edges = y_edges
+        self.z_edges = z_edges
+        self.counts = zeros((len(y_edges) - 1, len(z_edges) - 1))
+        self.samples = 0
+        self.strikes = 0
+        self.ground = 0
+        self.seconds = 0.0
+
+    @property
+    def strike_probability(self):
+        """The fraction of pitches that were strikes."""
+        return self.strikes / self.samples if self.samples else 0.0
+
+    @property
+    def heatmap(self):
+        """The histogram normalized so that each bin holds the probability
+        of a pitch landing in it."""
+        return self.counts / self.samples if self.samples else self.counts
+
+    @property
+    def samples_per_second(self):
+        return self.samples / self.seconds if self.seconds else 0.0
+
+    def add(self, events, plate_y, plate_z):
+        """Add the outcomes of a batch of pitches to the totals."""
+        self.samples += len(events)
+        self.strikes += int(is_strike(events, plate_y, plate_z).sum())
+        self.ground += int((events == GROUND).sum())
+        self.counts += histogram2d(plate_y, plate_z,
+                                   bins=(self.y_edges, self.z_edges))[0]
+
+def sample(rng, nominal, n, position_sigma, velocity_sigma, spin_sigma):
+    """Draw n noisy variants of a nominal pitch.
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+            (n, 3) arrays of release points, velocities and spins.
+    """
+    mean = concatenate((nominal.position, nominal.velocity, nominal.spin))
+    sigma = concatenate([array(s, dtype=float) * [1.0, 1.0, 1.0] for s in
+                         (position_sigma, velocity_sigma, spin_sigma)])
+    values = mean + rng.standard_normal((n, 9)) * sigma
+    return values[:, 0:3], values[:, 3:6], values[:, 6:9]
+
+def simulate(nominal, samples, seed=None,
+             position_sigma=default_position_sigma,
+             velocity_sigma=default_velocity_sigma,
+             spin_sigma=default_spin_sigma, bins=(48, 40),
+             margin=default_margin, distance=18, dt=0.01, integrator='rk4',
+             chunk_size=50000, progress=None):
+    """Estimate the strike probability and plate location distribution of a
+    pitch.
+
+    Parameters
+    ----------
+        nominal : baseball.Pitch
+            The pitch the pitcher is aiming for.
+        samples : int
+            The number of noisy variants to simulate.
+        seed : int
+            The seed of the random number generator. The same seed and
+            settings give the same result regardless of chunk_size.
+        position_sigma, velocity_sigma, spin_sigma : float or list of float
+            The standard deviation of the noise added to each component of
+            the release point (m), velocity (m/s) and spin (kg/s).
+        bins : (int, int)
+            The number of height and width bins of the heatmap.
+        margin : float
+            How far (in meters) the heatmap extends past the strike zone.
+        distance : float
+            The distance (in meters) to throw each pitch.
+        dt : float
+            The time increment (in seconds).
+        integrator : string or npgmath.integrators.Integrator
+            The integrator to use.
+        chunk_size : int
+            The number of pitches simulated per batch. This sets the memory
+            use of the run.
+        progress : function
+            If given, called as progress(result) after each batch.
+
+    Returns
+    -------
+        MonteCarloResult
+            The aggregated results.
+    """
+    rng = default_rng(seed)
+    result = MonteCarloResult(
+        linspace(strike_zone_bottom - margin, strike_zone_top + margin,
+                 bins[0] + 1),
+        linspace(-strike_zone_half_width - margin,
+                 strike_zone_half_width + margin, bins[1] + 1))
+
+    start = time.perf_counter()
+    remaining = samples
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        batch = PitchBatch(*sample(rng, nominal, n, position_sigma,
+                                   velocity_sigma, spin_sigma))
+        batch.throw(distance, dt, keep_trails=False, integrator=integrator)
+        result.add(batch.events, batch.plate_y, batch.plate_z)
+        remaining -= n
+        result.seconds = time.perf_counter() - start
+        if progress is not None:
+            progress(result)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('pitch', help="name of a predefined pitch class in "
+                                      "baseball.pitches, e.g. Slider")
+    parser.add_argument('--samples', type=int, default=100000)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--position-sigma', type=float,
+                        default=default_position_sigma)
+    parser.add_argument('--velocity-sigma', type=float,
+                        default=default_velocity_sigma)
+    parser.add_argument('--spin-sigma', type=float, default=default_spin_sigma)
+    parser.add_argument('--dt', type=float, default=0.01)
+    parser.add_argument('--integrator', default='rk4')
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--heatmap', help="save the heatmap and bin edges to "
+                                          "this .npz file")
+    args = parser.parse_args(argv)
+
+    nominal = getattr(pitches, args.pitch)()
+
+    def progress(result):
+        sys.stderr.write("\r%d / %d samples, %.0f samples/s"
+                         % (result.samples, args.samples,
+                            result.samples_per_second))
+
+    result = simulate(nominal, args.samples, args.seed, args.position_sigma,
+                      args.velocity_sigma, args.spin_sigma, dt=args.dt,
+                      integrator=args.integrator, chunk_size=args.chunk_size,
+                      progress=progress)
+    sys.stderr.write("\n")
+    print("%s: strike probability %.4f (%d of %d), %d hit the ground, "
+          "%.0f samples/s" % (nominal.label, result.strike_probability,
+                              result.strikes, result.samples, result.ground,
+                              result.samples_per_second))
+    if args.heatmap:
+        savez(args.heatmap, counts=result.counts, y_edges=result.y_edges,
+              z_edges=result.z_edges)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
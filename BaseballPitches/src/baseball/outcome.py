@@ -0,0 +1,176 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module finds where and when a pitch crosses the plate or hits the ground.
+A throw stops on the first step that ends past the plate (x = distance) or
+below the ground (y = 0), so the last point of a trail overshoots by up to one
+step. The exact crossing is located inside that last step with the root finder
+in npgmath.events.
+"""
+
+from numpy import asarray, full, sqrt, where, zeros
+from npgmath import events
+
+# event codes
+NO_EVENT = 0        # the pitch was never thrown
+PLATE = 1           # the pitch crossed the plate (x = distance)
+GROUND = 2          # the pitch hit the ground (y = 0) before the plate
+
+event_names = {NO_EVENT: None, PLATE: 'plate', GROUND: 'ground'}
+
+# bounds of the strike zone at the plate in meters
+strike_zone_bottom = 0.45
+strike_zone_top = 1.05
+strike_zone_half_width = 0.235
+
+class Outcome:
+    """The state of a pitch at the moment it crossed the plate or hit the
+    ground.
+
+    Attributes
+    ----------
+        event : string
+            'plate' or 'ground', or None if the pitch was never thrown.
+        time : float
+            The time (in seconds) from release to the event.
+        position : list of float
+            The position of the pitch at the event.
+        velocity : list of float
+            The velocity of the pitch at the event.
+    """
+
+    def __init__(self, event, time, position, velocity):
+        self.event = event
+        self.time = time
+        self.position = position
+        self.velocity = velocity
+
+    @property
+    def plate_y(self):
+        """The height (in meters) of the pitch at the event."""
+        return self.position[1]
+
+    @property
+    def plate_z(self):
+        """The width (in meters) of the pitch at the event."""
+        return self.position[2]
+
+    @property
+    def is_strike(self):
+        """True if the pitch crossed the plate inside the strike zone."""
+        return (self.event == 'plate'
+                and bool(is_strike(PLATE, self.plate_y, self.plate_z)))
+
+    def __repr__(self):
+        return ("Outcome(event=%r, time=%.6f, plate_y=%.6f, plate_z=%.6f)"
+                % (self.event, self.time, self.plate_y, self.plate_z))
+
+def locate_events(distance, t0, state0, derivative0, h, state1, derivative1):
+    """Locate the plate crossing or ground impact inside the last step of one
+    or more pitches.
+
+    Parameters
+    ----------
+        distance : float
+            The distance (in meters) to the plate.
+        t0 : float or numpy.ndarray
+            The time at the start of the last step.
+        state0, state1 : numpy.ndarray
+            The (6,) or (N, 6) state [position, velocity] at the start and end
+            of the last step.
+        derivative0, derivative1 : numpy.ndarray
+            The (6,) or (N, 6) derivative [velocity, acceleration] at the start
+            and end of the last step.
+        h : float or numpy.ndarray
+            The size of the last step.
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+            The event code (PLATE or GROUND), the time of the event and the
+            (6,) or (N, 6) state at the event.
+    """
+    state0 = asarray(state0)
+    m0 = asarray(derivative0) * asarray(h)[..., None]
+    m1 = asarray(derivative1) * asarray(h)[..., None]
+    state1 = asarray(state1)
+
+    crossed_plate = state1[..., 0] >= distance
+    hit_ground = state1[..., 1] <= 0
+    s_plate = where(crossed_plate,
+                    events.find_crossing(state0[..., 0], state1[..., 0],
+                                         m0[..., 0], m1[..., 0], distance),
+                    2.0)
+    s_ground = where(hit_ground,
+                     events.find_crossing(state0[..., 1], state1[..., 1],
+                                          m0[..., 1], m1[..., 1], 0.0),
+                     2.0)
+    code = where(s_plate <= s_ground, PLATE, GROUND)
+    s = where(code == PLATE, s_plate, s_ground).clip(0.0, 1.0)
+    state = events.hermite(state0, state1, m0, m1, s[..., None])
+    return code, t0 + s * h, state
+
+def is_strike(event, plate_y, plate_z):
+    """Return True where a pitch crossed the plate inside the strike zone.
+    Works element-wise on arrays of event codes and plate locations.
+
+    Examples
+    --------
+        >>> is_strike(PLATE, 0.8, 0.1)
+        True
+    """
+    return ((event == PLATE) & (plate_y >= strike_zone_bottom)
+            & (plate_y <= strike_zone_top)
+            & (abs(plate_z) <= strike_zone_half_width))
+
+def plate_distance(dy, dz):
+    """Return the distance (in meters) between two plate locations, given
+    the differences of their heights and widths. Works element-wise on
+    arrays.
+
+    Examples
+    --------
+        >>> plate_distance([0.3, 0.0], [0.4, 0.1])
+        array([0.5, 0.1])
+    """
+    dy = asarray(dy, dtype=float)
+    dz = asarray(dz, dtype=float)
+    return sqrt(dy * dy + dz * dz)
+
+def empty_outcomes(n):
+    """Return the arrays used to store the outcomes of n pitches: the event
+    codes, the times, and an (n, 6) array of states.
+    """
+    return full(n, NO_EVENT), zeros(n), zeros((n, 6))
+
+def calculate_break(position, velocity, event_position):
+    """Calculate how far pitches broke away from the straight line along
+    their initial velocity by the time they reached their event. This
+    includes the drop due to gravity.
+
+    Parameters
+    ----------
+        position : numpy.ndarray
+            The (3,) or (N, 3) release point of each pitch.
+        velocity : numpy.ndarray
+            The (3,) or (N, 3) initial velocity of each pitch.
+        event_position : numpy.ndarray
+            The (3,) or (N, 3) position of each pitch at its event.
+
+    Returns
+    -------
+        numpy.ndarray
+            The (2,) or (N, 2) vertical (y) and horizontal (z) break in meters.
+
+    Examples
+    --------
+        >>> calculate_break([0, 2, 0], [40, 0, 0], [18, 1, 0.5])
+        array([-1. ,  0.5])
+    """
+    position = asarray(position, dtype=float)
+    velocity = asarray(velocity, dtype=float)
+    event_position = asarray(event_position, dtype=float)
+    time = (event_position[..., 0] - position[..., 0]) / velocity[..., 0]
+    straight = position[..., 1:] + velocity[..., 1:] * time[..., None]
+    return event_position[..., 1:] - straight
@@ -5,15 +5,118 @@ Created on Sep 5, 2018
 This module defines the attributes and behavior of baseball pitches.
 """
 
+from math import pi
+from numpy import array, concatenate
+from baseball import instrument, kernels
+from baseball.outcome import Outcome, event_names, locate_events
+from baseball.trail import Trail, estimate_steps
 from npgphysics import forces
-from npgmath import euler
-from scipy.constants import pi
+from npgmath import euler, integrators
+
+def equations_of_motion(spin, mass, area, drag_coefficient,
+                        aerodynamics=None, wind=None):
+    """Build the derivative function used by the integrators in
+    npgmath.integrators for a pitch (or a batch of pitches) under gravity, air
+    resistance, and the Magnus effect.
+    
+    Parameters
+    ----------
+        spin : numpy.ndarray
+            The (3,) spin of a pitch, or an (N, 3) array with one spin per
+            pitch.
+        mass : float
+            The mass of the pitch in kilograms.
+        area : float
+            The cross-sectional surface area of the pitch in square meters.
+        drag_coefficient : float
+            The drag coefficient of the pitch.
+        aerodynamics : npgphysics.aerodynamics.AerodynamicTables
+            Tabulated drag and lift coefficients and spin decay to use
+            instead of drag_coefficient and the linear Magnus effect.
+        wind : npgphysics.wind.WindField
+            The wind that the pitch flies through, or None for still air.
+            
+    Returns
+    -------
+        function
+            A function f(t, y) that takes the state y = [position, velocity]
+            (shape (6,) or (N, 6)) and returns [velocity, acceleration].
+    """
+    spin_list = spin.tolist() if spin.ndim == 1 else None
+    if aerodynamics is None and wind is None:
+        params = forces.acceleration_constants(mass, area, drag_coefficient)
+        
+        def derivative(t, y):
+            if y.ndim == 1:
+                # a single pitch is faster with the scalar path of
+                # acceleration
+                velocity = y[3:].tolist()
+                return array(velocity + forces.acceleration(
+                    velocity, spin_list, params))
+            velocity = y[..., 3:]
+            return concatenate((velocity,
+                                forces.acceleration(velocity, spin, params)),
+                               axis=-1)
+        
+        return derivative
+    
+    if aerodynamics is None:
+        params = forces.acceleration_constants(mass, area, drag_coefficient)
+        
+        def acceleration(velocity, spin, t, air):
+            return forces.acceleration(velocity, spin, params, air)
+        
+        def scalar_acceleration(velocity, t, air):
+            return forces.acceleration(velocity, spin_list, params, air)
+    else:
+        params = aerodynamics.constants(
+            mass, area, spin if spin_list is None else spin_list)
+        
+        def acceleration(velocity, spin, t, air):
+            return aerodynamics.acceleration(velocity, spin, t, params, air)
+        
+        if spin_list is not None:
+            # the tables and constants are bound once, not on every call
+            scalar_acceleration = aerodynamics.scalar_acceleration(spin_list,
+                                                                   params)
+    
+    if wind is None:
+        
+        def derivative(t, y):
+            if y.ndim == 1:
+                velocity = y[3:].tolist()
+                return array(velocity + scalar_acceleration(velocity, t,
+                                                            None))
+            velocity = y[..., 3:]
+            return concatenate((velocity,
+                                acceleration(velocity, spin, t, None)),
+                               axis=-1)
+        
+        return derivative
+    
+    def derivative(t, y):
+        # one interpolation of the wind for the whole batch
+        air = wind.velocity(y[..., :3], t)
+        if y.ndim == 1:
+            velocity = y[3:].tolist()
+            return array(velocity + scalar_acceleration(velocity, t,
+                                                        air.tolist()))
+        velocity = y[..., 3:]
+        return concatenate((velocity, acceleration(velocity, spin, t, air)),
+                           axis=-1)
+    
+    return derivative
 
 class Pitch:
     """A customizeable baseball pitch. For predefined pitches, use a subclass
-    instead.
+    instead. The physical constants are class attributes; use with_constants
+    for a pitch with a different mass, drag coefficient, or radius.
     """
 
+    # no per-instance __dict__, so each pitch only stores these references
+    __slots__ = ('label', 'color', 'position', 'trail', 'velocity', 'spin',
+                 'outcome')
+
     mass = 0.14529                          # in kilograms
     drag_coefficient = 0.4                  # unitless
     radius = 0.03633                        # in meters
@@ -46,15 +149,136 @@ class Pitch:
         self.label = l
         self.color = c
         self.position = p
-        self.trail = [self.position]
+        self.trail = Trail(self.position)
         self.velocity = v
         self.spin = s
+        self.outcome = None
         
-    def throw(self,distance,dt):
+    def throw(self,distance,dt,integrator=None,retention='full',k=None,
+              backend=None,aerodynamics=None,wind=None):
         """Calculate the trajectory of the pitch from the release point to the
         specified distance towards the batter using the Euler Method
-        (https://en.wikipedia.org/wiki/Euler_method). Store the trajectory as a
-        list of positions in the trail attribute of the Pitch object.
+        (https://en.wikipedia.org/wiki/Euler_method) or the given integrator.
+        Store the trajectory as a list of positions in the trail attribute of
+        the Pitch object. The trail is preallocated from an estimate of the
+        number of steps, so it grows at most a few times per throw.
+        
+        The last point of the trail overshoots the plate (or the ground) by up
+        to one step. The exact time and state at which the pitch crossed the
+        plate or hit the ground is stored in the outcome attribute as a
+        baseball.outcome.Outcome, so coarse steps still give precise plate
+        locations.
+        
+        Parameters
+        ----------
+            distance : float
+                The distance (in meters) to throw the pitch.
+            dt : float or string
+                The time (in seconds) to let the ball travel before making a
+                new calculation. For an adaptive integrator, this is only the
+                size of the first step. 'auto' uses the coarsest increment
+                that locates the plate crossing of this type of pitch to
+                within a millimeter (see baseball.stepsize).
+            integrator : string or npgmath.integrators.Integrator
+                The integrator to use (e.g. 'rk4' or
+                integrators.DormandPrince(rtol=1e-8)). If None, the Euler
+                Method is used.
+            retention : string
+                Which positions to keep in the trail:
+                    'full' keeps every step.
+                    'every' keeps every k-th step.
+                    'count' keeps between k and 2k evenly spaced steps,
+                    whatever the number of steps.
+                    'final' keeps only the final step.
+                The final step is always kept. Every mode except 'full' and
+                'every' uses the same amount of memory regardless of dt.
+            k : int
+                The parameter of the 'every' and 'count' modes.
+            backend : string
+                'python', 'numba' or 'auto' (see baseball.kernels). If None,
+                the BASEBALL_BACKEND environment variable decides. A compiled
+                backend is only used for the 'full' and 'final' modes.
+            aerodynamics : npgphysics.aerodynamics.AerodynamicTables
+                Tabulated drag and lift coefficients and spin decay to use
+                instead of the constant drag coefficient and the linear
+                Magnus effect. Always runs on the 'python' backend.
+            wind : npgphysics.wind.WindField
+                The wind that the pitch flies through. Always runs on the
+                'python' backend.
+        """
+        
+        if dt == 'auto':
+            # imported here, as stepsize imports this module through batch
+            from baseball import stepsize
+            dt = stepsize.increment_for(self, distance, integrator,
+                                        aerodynamics=aerodynamics, wind=wind)
+        
+        # instrumentation costs one attribute lookup per throw when it is off
+        profiler = instrument.active
+        if profiler is None:
+            self._throw(distance, dt, integrator, retention, k, backend,
+                        aerodynamics, wind)
+            return
+        with profiler.measure(self.label):
+            self._throw(distance, dt, integrator, retention, k, backend,
+                        aerodynamics, wind)
+            
+    def _throw(self, distance, dt, integrator, retention, k, backend,
+               aerodynamics, wind):
+        """Throw the pitch. See throw."""
+        
+        if integrator is not None:
+            integrator = integrators.get_integrator(integrator)
+        backend = kernels.resolve(backend, integrator)
+        if aerodynamics is not None or wind is not None:
+            backend = 'python'
+        if backend != 'python' and retention in ('full', 'final'):
+            instrument.timed('kernel', kernels.throw_pitch)(
+                self, distance, dt, integrator, backend, retention == 'full')
+            return
+        steps = self.iter_throw(distance, dt, integrator, aerodynamics, wind)
+        trail = self.trail
+        append = instrument.timed('trail', trail.append)
+        
+        if retention == 'full':
+            if integrator is None or not integrator.adaptive:
+                trail.reserve(len(trail) + estimate_steps(
+                    self.position, self.velocity, distance, dt))
+            for _, position, _ in steps:
+                append(position)
+            return
+        
+        if retention == 'every':
+            stride = k
+        elif retention == 'count':
+            stride = 1
+        elif retention == 'final':
+            stride = 0
+        else:
+            raise ValueError("unknown retention mode %r" % retention)
+        if retention != 'final' and (k is None or k < 1):
+            raise ValueError("retention mode %r needs k >= 1" % retention)
+        
+        i = 0
+        position = None
+        for i, (_, position, _) in enumerate(steps, 1):
+            if stride and i % stride == 0:
+                append(position)
+                if retention == 'count' and len(trail) >= 2 * k:
+                    trail.thin()
+                    stride *= 2
+        if position is not None and (not stride or i % stride):
+            append(position)
+            
+    def iter_throw(self,distance,dt,integrator=None,aerodynamics=None,
+                   wind=None):
+        """Calculate the trajectory of the pitch like throw, but yield the
+        state after each step instead of storing it in the trail. Nothing is
+        kept from one step to the next, so memory use does not depend on the
+        number of steps, and the caller can stop at any time. The position
+        and velocity attributes are kept up to date as the pitch travels, and
+        the outcome attribute is set once the pitch reaches the plate or the
+        ground.
         
         Parameters
         ----------
@@ -63,32 +287,101 @@ class Pitch:
             dt : float
                 The time (in seconds) to let the ball travel before making a
                 new calculation.
+            integrator : string or npgmath.integrators.Integrator
+                The integrator to use. If None, the Euler Method is used.
+            aerodynamics : npgphysics.aerodynamics.AerodynamicTables
+                Tabulated coefficients to use instead of the constant ones
+                (see throw).
+            wind : npgphysics.wind.WindField
+                The wind that the pitch flies through (see throw).
+                
+        Yields
+        ------
+            (float, list of float, list of float)
+                The time since release, the position, and the velocity.
+                
+        Examples
+        --------
+            >>> for t, position, velocity in Slider().iter_throw(18, 0.001):
+            ...     if position[0] > 9:
+            ...         break
         """
         
-        f_gravity = forces.calculate_gravity(self.mass)
+        if (integrator is not None or aerodynamics is not None
+                or wind is not None):
+            # the spin decay and the wind depend on the time (and the wind on
+            # the position), so they always go through a derivative f(t, y)
+            yield from self._integrate(distance, dt,
+                                       integrators.get_integrator(integrator),
+                                       aerodynamics, wind)
+            return
+        
+        params = forces.acceleration_constants(self.mass, self.area,
+                                               self.drag_coefficient)
+        force = instrument.timed('force', forces.acceleration)
+        new_state = instrument.timed('step', euler.new_state)
+        t = 0.0
+        previous = None
         
         # while baseball hasn't crossed the plate (x = distance) or hit the
         # ground (y = 0)
         while (self.position[0] < distance and self.position[1] > 0):    
-            net_force = forces.add_forces([f_gravity,
-                                           forces.calculate_drag(
-                                               self.velocity,
-                                               self.area,
-                                               self.drag_coefficient),
-                                           forces.calculate_magnus(
-                                               self.velocity,
-                                               self.spin)])
-            acceleration = [f / self.mass for f in net_force]
-            self.position, self.velocity = euler.new_state(self.position,
-                                                           self.velocity,
-                                                           acceleration,
-                                                           dt)
-            self.trail.append(self.position)
+            previous = self.position, self.velocity
+            acceleration = force(self.velocity, self.spin, params)
+            self.position, self.velocity = new_state(self.position,
+                                                     self.velocity,
+                                                     acceleration, dt)
+            t += dt
+            yield t, self.position, self.velocity
+        
+        if previous is not None:
+            instrument.timed('locate', self._locate)(
+                distance, t - dt, concatenate(previous), t,
+                concatenate((self.position, self.velocity)))
+            
+    def _integrate(self, distance, dt, integrator, aerodynamics=None,
+                   wind=None):
+        """Calculate the trajectory of the pitch with an integrator from
+        npgmath.integrators. See iter_throw."""
+        
+        derivative = instrument.timed('force', equations_of_motion(
+            array(self.spin), self.mass, self.area, self.drag_coefficient,
+            aerodynamics, wind))
+        step = instrument.timed('step', integrator.step)
+        t = 0.0
+        previous = None
+        state = concatenate((self.position, self.velocity)).astype(float)
+        while (state[0] < distance and state[1] > 0):
+            previous = t, state
+            t, state, dt = step(derivative, t, state, dt)
+            self.position = state[:3].tolist()
+            self.velocity = state[3:].tolist()
+            yield t, self.position, self.velocity
+        
+        if previous is not None:
+            instrument.timed('locate', self._locate)(
+                distance, previous[0], previous[1], t, state, derivative)
+    
+    def _locate(self, distance, t0, state0, t1, state1, derivative=None):
+        """Find where the pitch crossed the plate or hit the ground during
+        the step from state0 to state1 and store it in the outcome attribute.
+        """
+        
+        if derivative is None:
+            derivative = equations_of_motion(array(self.spin), self.mass,
+                                             self.area, self.drag_coefficient)
+        code, time, state = locate_events(distance, t0, state0,
+                                          derivative(t0, state0), t1 - t0,
+                                          state1, derivative(t1, state1))
+        self.outcome = Outcome(event_names[int(code)], float(time),
+                               state[:3].tolist(), state[3:].tolist())
             
 class FourSeamFastball(Pitch):
     """This is a predefined pitch. The spin makes the pitch stay high and
     travel straight.
     """
+
+    __slots__ = ()
     
     def __init__(self, color='black'):
         position = self.default_position
@@ -101,6 +394,8 @@ class Slider(Pitch):
     """This is a predefined pitch. The spin makes the pitch curve down and
     sharply to the left from the perspective of a right-handed pitcher.
     """
+
+    __slots__ = ()
     
     def __init__(self, color='green'):
         position = self.default_position
@@ -113,6 +408,8 @@ class TwoSeamFastball(Pitch):
     """This is a predefined pitch. The spin makes the pitch stay high and
     curve slightly to the right from the perspective of a right-handed pitcher.
     """
+
+    __slots__ = ()
     
     def __init__(self, color='blue'):
         position = self.default_position
@@ -127,6 +424,8 @@ class Changeup(Pitch):
     more to the right than a pitch with no spin, from the perspective of a
     right-handed pitcher.
     """
+
+    __slots__ = ()
     
     def __init__(self, color='orange'):
         position = self.default_position
@@ -139,6 +438,8 @@ class Curveball(Pitch):
     """This is a predefined pitch. The spin makes the pitch curve sharply down
     and to the left from the perspective of a right-handed pitcher.
     """
+
+    __slots__ = ()
     
     def __init__(self, color='mediumorchid'):
         position = self.default_position
@@ -151,6 +452,8 @@ class Screwball(Pitch):
     """This is a predefined pitch. The spin makes the pitch curve down and
     sharply to the right from the perspective of a right-handed pitcher.
     """
+
+    __slots__ = ()
     
     def __init__(self, color='teal'):
         position = self.default_position
@@ -161,9 +464,11 @@ class Screwball(Pitch):
         
 class Knuckleball(Pitch):
     """This is a predefined pitch. There is almost no spin so the trajectory
-    is largely affected by minor fluctuations in the wind. Note that wind
-    effects have not yet been added to this pitching simulator.
+    is largely affected by minor fluctuations in the wind, which can be
+    added with the wind argument of throw (see npgphysics.wind).
     """
+
+    __slots__ = ()
     
     def __init__(self, color='deeppink'):
         position = self.default_position
@@ -177,6 +482,8 @@ class Testball(Pitch):
     velocity, and spin. Alternatively, customized objects from the base class
     can also be used.
     """
+
+    __slots__ = ()
     
     def __init__(self, color='green'):
         position = self.default_position
@@ -184,4 +491,48 @@ class Testball(Pitch):
         spin = [0.00, 0.00, -0.03]
         super(Testball, self).__init__(position, velocity, spin,
                                        "Testball", color)      
-        
\ No newline at end of file
+        
+_constant_classes = {}
+
+def with_constants(cls, mass=None, drag_coefficient=None, radius=None):
+    """Return a subclass of a pitch class with different physical constants.
+    The subclass has the same name as cls and is created once per set of
+    constants, so pitches with the same constants share a class.
+    
+    Parameters
+    ----------
+        cls : type
+            Pitch or one of its subclasses.
+        mass : float
+            The mass in kilograms. Defaults to cls.mass.
+        drag_coefficient : float
+            The drag coefficient. Defaults to cls.drag_coefficient.
+        radius : float
+            The radius in meters. Defaults to cls.radius.
+            
+    Returns
+    -------
+        type
+            cls itself if none of the constants differ.
+            
+    Examples
+    --------
+        >>> HeavySlider = with_constants(Slider, mass=0.2)
+        >>> HeavySlider().mass, HeavySlider().label
+        (0.2, 'Slider')
+    """
+    mass = cls.mass if mass is None else float(mass)
+    drag_coefficient = (cls.drag_coefficient if drag_coefficient is None
+                        else float(drag_coefficient))
+    radius = cls.radius if radius is None else float(radius)
+    if (mass, drag_coefficient, radius) == (cls.mass, cls.drag_coefficient,
+                                            cls.radius):
+        return cls
+    key = (cls, mass, drag_coefficient, radius)
+    if key not in _constant_classes:
+        _constant_classes[key] = type(cls.__name__, (cls,), {
+            '__slots__': (), '__module__': cls.__module__,
+            '__doc__': cls.__doc__, 'mass': mass,
+            'drag_coefficient': drag_coefficient, 'radius': radius,
+            'area': pi * radius**2})
+    return _constant_classes[key]
@@ -2,13 +2,21 @@
 Created on Sep 5, 2018
 @author: Nick Geary
 
-This module is used as the main program to simulate baseball pitches.
+This module is used as the main program to simulate baseball pitches. The
+plotter (and with it matplotlib) is only imported when lets_play is called, so
+the simulation functions can be imported by worker processes without it.
 """
 
-from baseball import pitches, baseball_plotter as bp
+from baseball import pitches
 
 distance = 18               # distance to throw the ball in meters
-default_increment = 0.001   # in seconds
+default_increment = 0.001   # in seconds (see baseball.stepsize for 'auto')
+
+def predefined_pitches():
+    """Return a new list with one of each of the seven predefined pitches."""
+    return [pitches.Knuckleball(),pitches.FourSeamFastball(),
+            pitches.TwoSeamFastball(),pitches.Slider(),pitches.Curveball(),
+            pitches.Changeup(),pitches.Screwball()]
 
 def lets_play(increment = default_increment):
     """This function simulates seven predefined pitches and plots their
@@ -22,11 +30,10 @@ def lets_play(increment = default_increment):
             results in approximately 485 calculations per pitch. The number of
             calculations grows linearly as the increment is reduced. 
     """
-    
+    from baseball import baseball_plotter as bp
+
     my_plotter = bp.BaseballPlotter()
-    my_pitches = [pitches.Knuckleball(),pitches.FourSeamFastball(),
-                  pitches.TwoSeamFastball(),pitches.Slider(),pitches.Curveball(),
-                  pitches.Changeup(),pitches.Screwball()]
+    my_pitches = predefined_pitches()
 
     for p in my_pitches:
         p.throw(distance,increment)
@@ -35,7 +42,7 @@ def lets_play(increment = default_increment):
     my_plotter.plot_strike_zone()
     my_plotter.show_plots()
     
-def just_throw(increment = default_increment):
+def just_throw(increment = default_increment, backend = None):
     """This function simulates seven predefined pitches but does not plot their
     trajectories. It is mainly been used for performance testing.
     
@@ -46,13 +53,20 @@ def just_throw(increment = default_increment):
             calculation. An increment of 0.001 s with a distance of 18 m
             results in approximately 485 calculations per pitch. The number of
             calculations grows linearly as the increment is reduced. 
+        backend : string
+            The backend to throw the pitches with (see baseball.kernels).
+            
+    Returns
+    -------
+        list of baseball.Pitch
+            The pitches after they have been thrown.
     """
     
-    my_pitches = [pitches.Knuckleball(),pitches.FourSeamFastball(),
-                  pitches.TwoSeamFastball(),pitches.Slider(),pitches.Curveball(),
-                  pitches.Changeup(),pitches.Screwball()]
+    my_pitches = predefined_pitches()
     
     for p in my_pitches:
-        p.throw(distance,increment)
+        p.throw(distance,increment,backend=backend)
+    return my_pitches
         
-lets_play()
\ No newline at end of file
+if __name__ == '__main__':
+    lets_play()
\ No newline at end of file
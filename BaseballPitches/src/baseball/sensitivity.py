@@ -0,0 +1,358 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module calculates how the outcome of a pitch responds to small changes in
+its release point, velocity and spin, in the same pass that simulates it.
+Along with the state y = [position, velocity], the integrator advances the
+sensitivity matrices X = d(position)/dp and V = d(velocity)/dp with respect to
+the nine parameters p = [release point, initial velocity, spin] (the order of
+sweep.parameters). They follow the variational equations of the model
+a(v, s) = -k |v| v + (v x s) / m - g:
+
+    dX/dt = V
+    dV/dt = (da/dv) V + da/dp,
+    da/dv = -k (|v| I + v v^T / |v|) - [s]x / m,
+    da/ds = [v]x / m,
+
+where [u]x is the matrix with [u]x w = u x w, starting from X = [I 0 0] and
+V = [0 I 0]. Every integrator treats the augmented state like the plain one,
+so the matrices are the exact derivatives of the simulated trajectory, not a
+finite-difference estimate of them. Only fixed-step integrators are accepted:
+an adaptive one would control the error of the matrices as well, and take
+other steps than for the pitch alone.
+
+At the plate (x = distance) the crossing time moves with the parameters as
+dt*/dp = -X[0] / vx, which turns X into the Jacobian of the plate location:
+d(plate y, z)/dp = X[1:3] + v[1:3] dt*/dp. For a pitch that hits the ground,
+the same is done for y = 0. X is interpolated inside the last step like the
+state, and v is the velocity of the interpolated position, so these are the
+derivatives of the located event as well.
+
+For example:
+    result = sensitivity.throw(pitches.Slider(), 18, 0.001)
+    result.plate_jacobian[0]    # d(time, plate y, plate z) / dp, (3, 9)
+analytics.sensitivity_benchmark compares the cost with finite differences.
+"""
+
+from math import sqrt as scalar_sqrt
+from numpy import array, concatenate, einsum, eye, flatnonzero, maximum, \
+    newaxis, ravel, sqrt, stack, zeros
+from baseball.batch import PitchBatch
+from baseball.outcome import GROUND, PLATE, locate_events
+from baseball.sweep import parameters
+from baseball.trail import Trail
+from npgmath import integrators
+from npgmath.events import hermite_derivative
+from npgphysics import forces
+
+# the columns of the augmented state: the position and X, then the velocity
+# and V, so that the second half is the derivative of the first half as the
+# integrators expect
+size = 3 + 3 * len(parameters)
+
+# the speed that k / |v| is divided by at least: the v v^T / |v| term of
+# da/dv vanishes with the velocity, so a ball at rest gets zero instead of a
+# division by zero
+tiny_speed = 1e-12
+
+def tangent_equations(spin, mass, area, drag_coefficient):
+    """Build the derivative function of the augmented state of a batch of
+    pitches.
+
+    Parameters
+    ----------
+        spin : numpy.ndarray
+            An (N, 3) array with the spin of each pitch.
+        mass, area, drag_coefficient : float or numpy.ndarray
+            The constants of all pitches, or (N, 1) arrays, as returned by
+            PitchBatch.constants.
+
+    Returns
+    -------
+        function
+            A function f(t, y) that takes an (N, 2 * size) augmented state and
+            returns its derivative.
+    """
+    params = forces.acceleration_constants(mass, area, drag_coefficient)
+    k, gravity, inverse_mass = params
+    n = len(parameters)
+    if len(spin) == 1:
+        params = tuple(float(ravel(c)[0]) for c in params)
+        return _single_tangent_equations(spin[0].tolist(), params)
+    sx, sy, sz = spin[:, 0:1], spin[:, 1:2], spin[:, 2:3]
+
+    def derivative(t, y):
+        v = y[:, size:size + 3]
+        sensitivity = y[:, size + 3:].reshape(-1, 3, n)
+        speed = sqrt(einsum('ij,ij->i', v, v))[:, newaxis]
+        vx, vy, vz = v[:, 0:1], v[:, 1:2], v[:, 2:3]
+        drag = k * speed
+        a = concatenate(((vy * sz - vz * sy) * inverse_mass - drag * vx,
+                         (vz * sx - vx * sz) * inverse_mass - drag * vy
+                         - gravity,
+                         (vx * sy - vy * sx) * inverse_mass - drag * vz),
+                        axis=1)
+
+        # (da/dv) V, one row of V per velocity component
+        v0, v1, v2 = sensitivity[:, 0], sensitivity[:, 1], sensitivity[:, 2]
+        along = (einsum('ij,ijk->ik', v, sensitivity)
+                 * (k / maximum(speed, tiny_speed)))
+        dv = stack(((v1 * sz - v2 * sy) * inverse_mass - drag * v0
+                    - along * vx,
+                    (v2 * sx - v0 * sz) * inverse_mass - drag * v1
+                    - along * vy,
+                    (v0 * sy - v1 * sx) * inverse_mass - drag * v2
+                    - along * vz), axis=1)
+        # da/ds: column j is v x e_j / m
+        wx, wy, wz = (v * inverse_mass).T
+        dv[:, 1, 6] += wz
+        dv[:, 2, 6] -= wy
+        dv[:, 0, 7] -= wz
+        dv[:, 2, 7] += wx
+        dv[:, 0, 8] += wy
+        dv[:, 1, 8] -= wx
+        return concatenate((y[:, size:], a, dv.reshape(len(y), -1)), axis=1)
+
+    return derivative
+
+def _single_tangent_equations(spin, params):
+    """The derivative function of the augmented state of a single pitch.
+    Numpy calls cost more than the arithmetic here, so the acceleration
+    and the 3 x 3 matrix da/dv are calculated with Python floats and applied
+    to V with one matrix product."""
+    k, gravity, inverse_mass = params
+    sx, sy, sz = (s * inverse_mass for s in spin)
+
+    def derivative(t, y):
+        velocity = y[0, size:size + 3].tolist()
+        vx, vy, vz = velocity
+        speed = scalar_sqrt(vx * vx + vy * vy + vz * vz)
+        drag = k * speed
+        c = k / max(speed, tiny_speed)
+        # -k (|v| I + v v^T / |v|) - [s]x / m
+        matrix = array([[-drag - c * vx * vx, -c * vx * vy + sz,
+                         -c * vx * vz - sy],
+                        [-c * vy * vx - sz, -drag - c * vy * vy,
+                         -c * vy * vz + sx],
+                        [-c * vz * vx + sy, -c * vz * vy - sx,
+                         -drag - c * vz * vz]])
+        wx, wy, wz = (v * inverse_mass for v in velocity)
+        forcing = array([[0.0] * 7 + [-wz, wy],
+                         [0.0] * 6 + [wz, 0.0, -wx],
+                         [0.0] * 6 + [-wy, wx, 0.0]])
+        dv = matrix @ y[0, size + 3:].reshape(3, -1) + forcing
+        return concatenate((y[0, size:], forces.acceleration(
+            velocity, spin, params), dv.ravel()))[newaxis]
+
+    return derivative
+
+def initial_state(position, velocity):
+    """Return the (N, 2 * size) augmented state at release: X = [I 0 0] and
+    V = [0 I 0]."""
+    n = len(parameters)
+    start = zeros((len(position), 2 * size))
+    start[:, 0:3] = position
+    start[:, 3:size] = eye(3, n).ravel()
+    start[:, size:size + 3] = velocity
+    start[:, size + 3:] = eye(3, n, 3).ravel()
+    return start
+
+class Sensitivity:
+    """The Jacobians of the outcomes of a batch of pitches.
+
+    Attributes
+    ----------
+        parameters : list of string
+            The names of the columns of the Jacobians.
+        events : numpy.ndarray
+            The event code of each pitch (see baseball.outcome).
+        time_jacobian : numpy.ndarray
+            An (N, 9) array with the derivatives of the time of each event.
+        position_jacobian : numpy.ndarray
+            An (N, 3, 9) array with the derivatives of the position of each
+            event. At the plate, the x row is zero.
+    """
+
+    parameters = parameters
+
+    def __init__(self, events, time_jacobian, position_jacobian):
+        self.events = events
+        self.time_jacobian = time_jacobian
+        self.position_jacobian = position_jacobian
+
+    @property
+    def plate_jacobian(self):
+        """An (N, 3, 9) array with the derivatives of the time to the plate
+        and of the plate location y and z."""
+        return concatenate((self.time_jacobian[:, newaxis],
+                            self.position_jacobian[:, 1:3]), axis=1)
+
+def event_jacobians(events, state, velocity):
+    """Return the time and position Jacobians of events from the augmented
+    states at the events and the velocities of the interpolated positions
+    there."""
+    n = len(parameters)
+    position_sensitivity = state[:, 3:size].reshape(-1, 3, n)
+    # the coordinate that defines the event: x at the plate, y at the ground
+    axis = (events == GROUND).astype(int)
+    rows = flatnonzero((events == PLATE) | (events == GROUND))
+    time_jacobian = zeros((len(state), n))
+    time_jacobian[rows] = (-position_sensitivity[rows, axis[rows]]
+                           / velocity[rows, axis[rows], newaxis])
+    position_jacobian = (position_sensitivity
+                         + velocity[:, :, newaxis]
+                         * time_jacobian[:, newaxis, :])
+    return time_jacobian, position_jacobian
+
+def throw_batch(batch, distance, dt, integrator='rk4', keep_trails=True):
+    """Throw a batch of pitches and calculate the Jacobians of their
+    outcomes. The batch ends up with the same trails, states and outcomes
+    as after PitchBatch.throw with the same arguments (with the Python
+    backend, in still air and with the constant aerodynamics).
+
+    Parameters
+    ----------
+        batch : baseball.batch.PitchBatch
+            The (unthrown) pitches.
+        distance, dt, integrator, keep_trails
+            As for PitchBatch.throw, except that the integrator defaults to
+            RK4 and must have a fixed step.
+
+    Returns
+    -------
+        Sensitivity
+
+    Raises
+    ------
+        ValueError
+            If the integrator is adaptive, such as 'rk45'.
+    """
+    integrator = integrators.get_integrator(integrator)
+    if integrator.adaptive:
+        raise ValueError("sensitivities need a fixed-step integrator, got %s"
+                         % integrator.name)
+    state = initial_state(batch.position, batch.velocity)
+    history = [batch.position.copy()] if keep_trails else None
+    events_state = zeros((len(batch), 2 * size))
+    rates = zeros((len(batch), 3))
+
+    active = flatnonzero((state[:, 0] < distance) & (state[:, 1] > 0))
+    t = 0.0
+    while active.size:
+        derivative = tangent_equations(batch.spin[active],
+                                       *batch.constants(active))
+        t0 = t
+        old_state = state[active]
+        t, new_state, dt = integrator.step(derivative, t, old_state, dt)
+        state[active] = new_state
+        batch.steps[active] += 1
+        if keep_trails:
+            history.append(state[:, :3].copy())
+        flying = (new_state[:, 0] < distance) & (new_state[:, 1] > 0)
+        if not flying.all():
+            landed = active[~flying]
+            f = tangent_equations(batch.spin[landed],
+                                  *batch.constants(landed))
+            state0, state1 = old_state[~flying], new_state[~flying]
+            h = t - t0
+            derivative0, derivative1 = f(t0, state0), f(t, state1)
+            code, time, event = locate_events(distance, t0, state0,
+                                              derivative0, h, state1,
+                                              derivative1)
+            batch.events[landed] = code
+            batch.times[landed] = time
+            events_state[landed] = event
+            # the velocity of the interpolated position at the event, which
+            # is how fast the event moves when the parameters change
+            rates[landed] = hermite_derivative(
+                state0[:, :3], state1[:, :3], derivative0[:, :3] * h,
+                derivative1[:, :3] * h, ((time - t0) / h)[:, newaxis]) / h
+        active = active[flying]
+
+    batch.position = state[:, :3].copy()
+    batch.velocity = state[:, size:size + 3].copy()
+    batch.event_states[:, :3] = events_state[:, :3]
+    batch.event_states[:, 3:] = events_state[:, size:size + 3]
+    if keep_trails:
+        history = stack(history)
+        batch.trails = [history[:n + 1, i]
+                        for i, n in enumerate(batch.steps)]
+    return Sensitivity(batch.events.copy(),
+                       *event_jacobians(batch.events, events_state, rates))
+
+def throw(pitch, distance, dt, integrator='rk4'):
+    """Throw a single pitch like Pitch.throw with the given (fixed-step)
+    integrator and calculate the Jacobians of its outcome.
+
+    Returns
+    -------
+        Sensitivity
+            With one row, e.g. result.plate_jacobian[0].
+
+    Raises
+    ------
+        ValueError
+            If the integrator is adaptive, as for throw_batch.
+    """
+    batch = PitchBatch.from_pitches([pitch])
+    result = throw_batch(batch, distance, dt, integrator)
+    points = batch.trails[0]
+    pitch.trail = Trail(points[0], len(points))
+    pitch.trail.extend(points[1:])
+    pitch.position = batch.position[0].tolist()
+    pitch.velocity = batch.velocity[0].tolist()
+    pitch.outcome = batch.outcome(0)
+    return result
+
+def finite_differences(batch, distance, dt, integrator='rk4', step=1e-6,
+                       central=False):
+    """Estimate the Jacobian of the time and plate location of each pitch of
+    a batch with finite differences, for comparison with throw_batch. Every
+    pitch and its perturbed copies are thrown together as one batch.
+
+    Parameters
+    ----------
+        batch : baseball.batch.PitchBatch
+            The (unthrown) pitches. They are not thrown themselves.
+        distance, dt, integrator
+            As for throw_batch.
+        step : float
+            The step of each parameter, in meters, meters per second and
+            hundredths of kilograms per second (the typical spin, see
+            solver.spin_scale).
+        central : bool
+            Use central differences (2 P throws per pitch) instead of
+            forward differences (1 + P).
+
+    Returns
+    -------
+        numpy.ndarray
+            An (N, 3, 9) array like Sensitivity.plate_jacobian.
+    """
+    from baseball.solver import spin_scale
+    n = len(parameters)
+    values = concatenate((batch.position, batch.velocity, batch.spin),
+                         axis=1)
+    steps = step * concatenate(([1.0] * 6, [spin_scale] * 3))
+    offsets = [eye(n) * steps] if not central else [eye(n) * steps,
+                                                    -eye(n) * steps]
+    if not central:
+        offsets.insert(0, zeros((1, n)))
+    offsets = concatenate(offsets)
+    perturbed = (values[:, newaxis, :] + offsets).reshape(-1, n)
+    constants = (None, None, None)
+    if not isinstance(batch.mass, float):
+        constants = [c.repeat(len(offsets)) for c in
+                     (batch.mass, batch.drag_coefficient, batch.radius)]
+    thrown = PitchBatch(perturbed[:, 0:3], perturbed[:, 3:6],
+                        perturbed[:, 6:9], None, None, *constants)
+    thrown.throw(distance, dt, False, integrator)
+    outcome = concatenate((thrown.times[:, newaxis],
+                           thrown.event_states[:, 1:3]), axis=1)
+    outcome = outcome.reshape(len(values), len(offsets), 3)
+    if central:
+        difference = outcome[:, :n] - outcome[:, n:]
+        return (difference / (2 * steps[:, newaxis])).transpose(0, 2, 1)
+    difference = outcome[:, 1:] - outcome[:, :1]
+    return (difference / steps[:, newaxis]).transpose(0, 2, 1)
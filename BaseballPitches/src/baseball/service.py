@@ -0,0 +1,414 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module runs a local simulation service, so that tools which need
+trajectories on demand do not each run their own throw loop. It speaks a
+small subset of HTTP/1.1 with JSON bodies over TCP or a Unix socket, using only
+asyncio from the standard library.
+
+Requests that arrive within a short window of each other (and use the same
+distance, increment and integrator) are grouped into one PitchBatch, so a
+burst of concurrent requests costs about as much as a single vectorized
+throw. Batches are simulated in a pool of worker processes, so the event loop
+never blocks, and while every worker is busy new requests keep queuing up and
+go out as one larger batch.
+
+Endpoints:
+    POST /throw    throw one pitch. The body is a JSON object with any of
+                   'pitch' (a predefined pitch class, e.g. "Slider"),
+                   'position', 'velocity', 'spin' (lists of 3 floats that
+                   override those of the pitch), 'distance', 'dt',
+                   'integrator' and 'trail' (true to get the trajectory).
+    GET /metrics   latency percentiles and batch size statistics.
+    GET /health    {"status": "ok"}.
+
+Run it from the src directory, for example:
+    python -m baseball.service --port 8765
+    python -m baseball.service --unix /tmp/baseball.sock --window 0.002
+and measure it with analytics.load_generator.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from numpy import array, percentile
+from baseball import pitches
+from baseball.batch import PitchBatch
+from baseball.outcome import calculate_break, event_names
+
+default_window = 0.002      # in seconds
+default_max_batch = 4096
+
+reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+def parse_spec(spec):
+    """Check a /throw request body and fill in the defaults.
+
+    Returns
+    -------
+        (tuple, tuple)
+            The (position, velocity, spin) of the pitch and the
+            (distance, dt, integrator, trail) settings of the throw, which
+            requests must share to be batched together.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("expected a JSON object")
+    name = spec.get('pitch', 'Pitch')
+    if name == 'Pitch':
+        base = (pitches.Pitch.default_position, pitches.Pitch.default_velocity,
+                [0.0, 0.0, 0.0])
+    else:
+        cls = getattr(pitches, str(name), None)
+        if not (isinstance(cls, type) and issubclass(cls, pitches.Pitch)):
+            raise ValueError("unknown pitch %r" % name)
+        pitch = cls()
+        base = (pitch.position, pitch.velocity, pitch.spin)
+    vectors = []
+    for key, default in zip(('position', 'velocity', 'spin'), base):
+        value = [float(x) for x in spec.get(key, default)]
+        if len(value) != 3:
+            raise ValueError("%s must have 3 components" % key)
+        vectors.append(value)
+    integrator = spec.get('integrator')
+    if integrator is not None and not isinstance(integrator, str):
+        raise ValueError("integrator must be a name")
+    settings = (float(spec.get('distance', 18)), float(spec.get('dt', 0.001)),
+                integrator, bool(spec.get('trail', False)))
+    if settings[1] <= 0:
+        raise ValueError("dt must be positive")
+    return tuple(vectors), settings
+
+def simulate(position, velocity, spin, distance, dt, integrator, trail):
+    """Throw a batch of pitches and return one result dictionary per pitch.
+    This runs in a worker process. A single pitch takes the scalar path of
+    Pitch, which is several times faster than a PitchBatch of one."""
+    if len(position) == 1:
+        return [simulate_one(position[0], velocity[0], spin[0], distance, dt,
+                             integrator, trail)]
+    batch = PitchBatch(position, velocity, spin)
+    batch.throw(distance, dt, trail, integrator)
+    breaks = batch.breaks.tolist()
+    results = []
+    for i in range(len(batch)):
+        result = {'event': event_names.get(int(batch.events[i])),
+                  'time': float(batch.times[i]),
+                  'plate_y': float(batch.plate_y[i]),
+                  'plate_z': float(batch.plate_z[i]),
+                  'break': breaks[i],
+                  'steps': int(batch.steps[i])}
+        if trail:
+            result['trail'] = batch.trails[i].tolist()
+        results.append(result)
+    return results
+
+def simulate_one(position, velocity, spin, distance, dt, integrator, trail):
+    """Throw one pitch with Pitch.iter_throw and return its result
+    dictionary, in the same form as simulate."""
+    pitch = pitches.Pitch(position, velocity, spin)
+    points = [list(position)]
+    steps = 0
+    for steps, (_, point, _) in enumerate(
+            pitch.iter_throw(distance, dt, integrator), 1):
+        if trail:
+            points.append(point)
+    outcome = pitch.outcome
+    if outcome is None:
+        event, time, state = None, 0.0, [0.0] * 6
+    else:
+        event, time = outcome.event, outcome.time
+        state = list(outcome.position) + list(outcome.velocity)
+    result = {'event': event,
+              'time': time,
+              'plate_y': state[1],
+              'plate_z': state[2],
+              'break': calculate_break(position, velocity,
+                                       state[:3]).tolist(),
+              'steps': steps}
+    if trail:
+        result['trail'] = points
+    return result
+
+class Metrics:
+    """Latency and batch size statistics of a running service. Latencies are
+    kept for the most recent requests only, so memory use is bounded."""
+
+    def __init__(self, history=10000):
+        self.latencies = deque(maxlen=history)
+        self.batch_sizes = deque(maxlen=history)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.pitches = 0
+        self.started = time.perf_counter()
+
+    def add_request(self, seconds, error=False):
+        self.requests += 1
+        self.errors += error
+        self.latencies.append(seconds)
+
+    def add_batch(self, size):
+        self.batches += 1
+        self.pitches += size
+        self.batch_sizes.append(size)
+
+    def report(self, queued=0):
+        """Return the statistics as a dictionary. Latencies are in
+        milliseconds."""
+        report = {'requests': self.requests, 'errors': self.errors,
+                  'batches': self.batches, 'pitches': self.pitches,
+                  'queued': queued,
+                  'uptime': time.perf_counter() - self.started}
+        if self.latencies:
+            p50, p90, p99 = percentile(array(self.latencies) * 1000,
+                                       [50, 90, 99])
+            report['latency_ms'] = {'p50': p50, 'p90': p90, 'p99': p99,
+                                    'max': max(self.latencies) * 1000}
+        if self.batch_sizes:
+            sizes = array(self.batch_sizes)
+            report['batch_size'] = {'mean': float(sizes.mean()),
+                                    'p50': float(percentile(sizes, 50)),
+                                    'max': int(sizes.max())}
+        return report
+
+class SimulationService:
+    """The service: an HTTP front end, a micro-batching queue and a worker
+    pool."""
+
+    def __init__(self, window=default_window, max_batch=default_max_batch,
+                 workers=None, threads=False):
+        """Set up the service. Call start to begin serving.
+
+        Parameters
+        ----------
+            window : float
+                How long (in seconds) to wait for more requests after the
+                first one of a batch arrives. 0 sends every request out as
+                soon as a worker is free.
+            max_batch : int
+                The largest number of pitches per batch. 1 gives the
+                one-request-per-throw baseline, where every request is
+                thrown on its own with Pitch.iter_throw.
+            workers : int
+                The number of worker processes (or threads). Defaults to the
+                number of CPUs.
+            threads : bool
+                If True, use a thread pool instead of processes, e.g. where
+                processes cannot be started.
+        """
+        self.window = window
+        self.max_batch = max_batch
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.metrics = Metrics()
+        self._queue = None
+        self._slots = None
+        self._executor = None
+        self._servers = []
+        self._connections = {}
+        self._batcher = None
+
+    async def start(self, host=None, port=None, unix=None):
+        """Start the worker pool and listen on a TCP port and/or a Unix
+        socket."""
+        pool = ThreadPoolExecutor if self.threads else ProcessPoolExecutor
+        self._executor = pool(self.workers)
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.ensure_future(self._batch_loop())
+        if port is not None:
+            self._servers.append(await asyncio.start_server(
+                self._handle, host or '127.0.0.1', port))
+        if unix is not None:
+            self._servers.append(await asyncio.start_unix_server(
+                self._handle, unix))
+
+    async def stop(self):
+        """Stop listening, close open connections, cancel the queue and shut
+        the pool down."""
+        for server in self._servers:
+            server.close()
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers = []
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    async def throw(self, spec):
+        """Queue one pitch and wait for its result."""
+        vectors, settings = parse_spec(spec)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((vectors, settings, future))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            pending = [await self._queue.get()]
+            if self.window > 0:
+                deadline = loop.time() + self.window
+                while len(pending) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        pending.append(await asyncio.wait_for(
+                            self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            while len(pending) < self.max_batch and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+
+            # one slot per batch sent to the pool; the first was taken above
+            groups = {}
+            for item in pending:
+                groups.setdefault(item[1], []).append(item)
+            for index, (settings, items) in enumerate(groups.items()):
+                if index:
+                    await self._slots.acquire()
+                task = asyncio.ensure_future(self._run(settings, items))
+                task.add_done_callback(lambda _: self._slots.release())
+
+    async def _run(self, settings, items):
+        loop = asyncio.get_running_loop()
+        self.metrics.add_batch(len(items))
+        columns = list(zip(*[vectors for vectors, _, _ in items]))
+        try:
+            results = await loop.run_in_executor(
+                self._executor, simulate, *columns, *settings)
+        except Exception as error:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, _, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _route(self, method, path, body):
+        if path == '/throw':
+            if method != 'POST':
+                return 405, {'error': "use POST"}
+            try:
+                return 200, await self.throw(json.loads(body or b'{}'))
+            except (ValueError, TypeError) as error:
+                return 400, {'error': str(error)}
+        if path == '/metrics':
+            return 200, self.metrics.report(self._queue.qsize())
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        return 404, {'error': "no such endpoint %s" % path}
+
+    async def _respond(self, writer, status, payload):
+        data = json.dumps(payload).encode()
+        writer.write(b'HTTP/1.1 %d %s\r\nContent-Type: '
+                     b'application/json\r\nContent-Length: %d\r\n\r\n'
+                     % (status, reasons[status].encode(), len(data)) + data)
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                start = time.perf_counter()
+                request_line = request_line.decode('latin-1').strip()
+                parts = request_line.split()
+                if len(parts) != 3:
+                    # the rest of the request cannot be trusted either, so
+                    # the connection is closed after the reply
+                    await self._respond(writer, 400, {
+                        'error': "malformed request line %r" % request_line})
+                    break
+                method, path, version = parts
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get('content-length', '0')
+                try:
+                    length = int(length)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # without a length, the end of the body is unknown, so
+                    # the connection is closed after the reply
+                    await self._respond(writer, 400, {
+                        'error': "malformed Content-Length %r"
+                                 % headers['content-length']})
+                    break
+                body = await reader.readexactly(length)
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as error:
+                    status, payload = 500, {'error': repr(error)}
+                await self._respond(writer, status, payload)
+                if path == '/throw':
+                    self.metrics.add_request(time.perf_counter() - start,
+                                             status != 200)
+                if (headers.get('connection', '').lower() == 'close'
+                        or version == 'HTTP/1.0'):
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self._connections[asyncio.current_task()]
+            writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--unix', help="path of a Unix socket to listen on")
+    parser.add_argument('--window', type=float, default=default_window,
+                        help="batching window in seconds (default %g)"
+                             % default_window)
+    parser.add_argument('--max-batch', type=int, default=default_max_batch)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--threads', action='store_true',
+                        help="use worker threads instead of processes")
+    args = parser.parse_args(argv)
+    if args.port is None and args.unix is None:
+        args.port = 8765
+
+    async def serve():
+        service = SimulationService(args.window, args.max_batch, args.workers,
+                                    args.threads)
+        await service.start(args.host, args.port, args.unix)
+        sys.stderr.write("serving on %s\n" % ', '.join(
+            str(s.sockets[0].getsockname()) for s in service._servers))
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await service.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
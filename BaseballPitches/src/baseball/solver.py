@@ -0,0 +1,255 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module answers questions like "what spin gets a slider to this corner?".
+Given target plate locations, it searches for the spin (and, optionally, the
+initial velocity) that puts a pitch there, using the Levenberg-Marquardt method
+(https://en.wikipedia.org/wiki/Levenberg%E2%80%93Marquardt_algorithm) on the
+forward simulation. The Jacobian is estimated with forward differences, and
+every target's trial point and perturbed columns are simulated together as one
+PitchBatch per iteration.
+
+Run it from the src directory, for example:
+    python -m baseball.solver 0.8,0.0 0.5,0.2 1.0,-0.2
+"""
+
+import argparse
+import sys
+
+from numpy import array, broadcast_to, clip, concatenate, einsum, eye, full, \
+    maximum, repeat, sqrt, zeros
+from numpy.linalg import solve as linear_solve
+from baseball.batch import PitchBatch
+from baseball.outcome import GROUND
+from baseball.pitches import Pitch
+
+spin_scale = 0.01       # typical size of a spin component in kg/s
+velocity_scale = 1.0    # typical size of a velocity change in m/s
+
+class Solution:
+    """The result of solving for one target.
+
+    Attributes
+    ----------
+        target : list of float
+            The requested plate location (y, z).
+        plate : list of float
+            The plate location (y, z) reached by the solution. For a pitch
+            that hit the ground, its path extended to the plate.
+        spin : list of float
+            The spin of the solution.
+        velocity : list of float
+            The initial velocity of the solution.
+        position : list of float
+            The release point (not solved for).
+        error : float
+            The distance (in meters) between plate and target.
+        iterations : int
+            The number of Levenberg-Marquardt iterations used.
+        converged : bool
+            Whether the error is within the tolerance.
+    """
+
+    def __init__(self, target, plate, position, velocity, spin, iterations,
+                 converged):
+        self.target = target
+        self.plate = plate
+        self.position = position
+        self.velocity = velocity
+        self.spin = spin
+        self.iterations = iterations
+        self.converged = converged
+
+    @property
+    def error(self):
+        return sqrt((self.plate[0] - self.target[0])**2
+                    + (self.plate[1] - self.target[1])**2)
+
+    def to_pitch(self, label="Solved Pitch", color='gray'):
+        """Return a Pitch with the solved release point, velocity and spin."""
+        return Pitch(list(self.position), list(self.velocity),
+                     list(self.spin), label, color)
+
+    def __repr__(self):
+        return ("Solution(target=(%.4f, %.4f), spin=[%.5f, %.5f, %.5f], "
+                "velocity=[%.3f, %.3f, %.3f], error=%.2e, converged=%r)"
+                % (tuple(self.target) + tuple(self.spin)
+                   + tuple(self.velocity) + (self.error, self.converged)))
+
+def _limit_speed(velocity, min_speed, max_speed):
+    """Rescale each velocity so that its speed is within the limits."""
+    if min_speed is None and max_speed is None:
+        return velocity
+    speed = sqrt(einsum('ij,ij->i', velocity, velocity))
+    limited = clip(speed, min_speed, max_speed)
+    return velocity * (limited / speed)[:, None]
+
+def _plate_crossing(batch, distance):
+    """Return the (N, 2) plate locations (y, z) of a thrown batch. A pitch
+    that hit the ground is extrapolated along its final direction of travel to
+    x = distance, which puts it below the ground by about the distance it fell
+    short of the plate. Unlike the impact point, this keeps changing as a
+    parameter change moves the pitch toward the plate, and it meets the plate
+    location where the two events meet."""
+    state = batch.event_states
+    plate = state[:, 1:3].copy()
+    ground = batch.events == GROUND
+    if ground.any():
+        vx = maximum(state[ground, 3], 1e-9)
+        remaining = (distance - state[ground, 0]) / vx
+        plate[ground] += state[ground, 4:6] * remaining[:, None]
+    return plate
+
+def solve(targets, position=None, velocity=None, spin=None,
+          solve_velocity=False, min_speed=None, max_speed=None, distance=18,
+          dt=0.01, integrator='rk4', tolerance=1e-4, max_iterations=50,
+          difference_step=1e-4, damping=1e-2):
+    """Find the spin (and optionally the velocity) that sends a pitch to each
+    target plate location.
+
+    Parameters
+    ----------
+        targets : array_like
+            A (K, 2) array of target plate locations (height y, width z) in
+            meters.
+        position : array_like
+            The release point, either one (3,) point for every target or a
+            (K, 3) array. Defaults to Pitch.default_position.
+        velocity : array_like
+            The (starting) velocity, (3,) or (K, 3). Defaults to
+            Pitch.default_velocity.
+        spin : array_like
+            The starting spin, (3,) or (K, 3). Defaults to no spin.
+        solve_velocity : bool
+            If True, the velocity is solved for along with the spin.
+            Otherwise it is kept fixed.
+        min_speed, max_speed : float
+            Limits on the speed (in m/s) of the solved velocity.
+        distance : float
+            The distance (in meters) to the plate.
+        dt : float
+            The time increment (in seconds) of the forward simulation.
+        integrator : string or npgmath.integrators.Integrator
+            The integrator of the forward simulation.
+        tolerance : float
+            The largest acceptable distance (in meters) from the target.
+        max_iterations : int
+            The maximum number of Levenberg-Marquardt iterations.
+        difference_step : float
+            The finite difference step, relative to the typical size of each
+            parameter.
+        damping : float
+            The initial Levenberg-Marquardt damping factor.
+
+    Returns
+    -------
+        list of Solution
+            One solution per target.
+    """
+    targets = array(targets, dtype=float).reshape(-1, 2)
+    k = len(targets)
+
+    def per_target(value, default):
+        value = default if value is None else value
+        return broadcast_to(array(value, dtype=float), (k, 3)).copy()
+
+    position = per_target(position, Pitch.default_position)
+    velocity = _limit_speed(per_target(velocity, Pitch.default_velocity),
+                            min_speed, max_speed)
+    spin = per_target(spin, [0.0, 0.0, 0.0])
+
+    # the unknowns of each target, divided by their typical size
+    scale = array([spin_scale] * 3 + ([velocity_scale] * 3 if solve_velocity
+                                      else []))
+    n = len(scale)
+    parameters = concatenate((spin, velocity), axis=1)[:, :n] / scale
+
+    def unpack(q, fixed_velocity):
+        values = q * scale
+        v = values[:, 3:6] if solve_velocity else fixed_velocity
+        return values[:, 0:3], _limit_speed(v, min_speed, max_speed)
+
+    def evaluate(q, release, fixed_velocity):
+        """Simulate each point and its n perturbed copies in one batch and
+        return the plate locations and the Jacobians of the plate locations
+        with respect to the scaled parameters."""
+        count = len(q)
+        perturbed = repeat(q[:, None, :], n + 1, axis=1)
+        perturbed[:, 1:, :] += eye(n) * difference_step
+        s, v = unpack(perturbed.reshape(-1, n),
+                      repeat(fixed_velocity, n + 1, axis=0))
+        batch = PitchBatch(repeat(release, n + 1, axis=0), v, s)
+        batch.throw(distance, dt, keep_trails=False, integrator=integrator)
+        plate = _plate_crossing(batch, distance).reshape(count, n + 1, 2)
+        jacobian = ((plate[:, 1:, :] - plate[:, :1, :])
+                    / difference_step).transpose(0, 2, 1)
+        return plate[:, 0, :], jacobian
+
+    plate, jacobian = evaluate(parameters, position, velocity)
+    residual = plate - targets
+    lambdas = full(k, damping)
+    iterations = zeros(k, dtype=int)
+
+    for _ in range(max_iterations):
+        error = sqrt((residual**2).sum(axis=1))
+        active = [i for i in range(k) if error[i] > tolerance]
+        if not active:
+            break
+        j = jacobian[active]
+        r = residual[active]
+        # minimum-norm damped step: dq = -J^T (J J^T + lambda I)^-1 r
+        normal = einsum('kij,klj->kil', j, j)
+        size = einsum('kii->k', normal) / 2 + 1e-12
+        normal = normal + (lambdas[active] * size)[:, None, None] * eye(2)
+        step = -einsum('kji,kj->ki', j, linear_solve(normal, r[..., None])
+                       [..., 0])
+        trial = parameters[active] + step
+        trial_plate, trial_jacobian = evaluate(trial, position[active],
+                                               velocity[active])
+        trial_residual = trial_plate - targets[active]
+        better = ((trial_residual**2).sum(axis=1)
+                  < (r**2).sum(axis=1))
+        for index, i in enumerate(active):
+            iterations[i] += 1
+            if better[index]:
+                parameters[i] = trial[index]
+                plate[i] = trial_plate[index]
+                residual[i] = trial_residual[index]
+                jacobian[i] = trial_jacobian[index]
+                lambdas[i] /= 3
+            else:
+                lambdas[i] *= 4
+
+    spin, velocity = unpack(parameters, velocity)
+    error = sqrt((residual**2).sum(axis=1))
+    return [Solution(targets[i].tolist(), plate[i].tolist(),
+                     position[i].tolist(), velocity[i].tolist(),
+                     spin[i].tolist(), int(iterations[i]),
+                     bool(error[i] <= tolerance)) for i in range(k)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('targets', nargs='+', metavar='Y,Z',
+                        help="target plate locations in meters")
+    parser.add_argument('--solve-velocity', action='store_true')
+    parser.add_argument('--min-speed', type=float)
+    parser.add_argument('--max-speed', type=float)
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    targets = [[float(x) for x in t.split(',')] for t in args.targets]
+    solutions = solve(targets, solve_velocity=args.solve_velocity,
+                      min_speed=args.min_speed, max_speed=args.max_speed,
+                      tolerance=args.tolerance)
+    print("%8s %8s | %9s %9s %9s | %7s %7s %7s | %9s" % (
+        'y', 'z', 'spin x', 'spin y', 'spin z', 'vel x', 'vel y', 'vel z',
+        'error'))
+    for s in solutions:
+        print("%8.3f %8.3f | %9.5f %9.5f %9.5f | %7.2f %7.2f %7.2f | %9.2e%s"
+              % (tuple(s.target) + tuple(s.spin) + tuple(s.velocity)
+                 + (s.error, '' if s.converged else ' (not converged)')))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
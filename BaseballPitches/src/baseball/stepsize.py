@@ -0,0 +1,221 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module chooses the time increment of a simulation from the accuracy that
+is needed, instead of a fixed increment picked by hand. A convergence study
+throws the same pitches at successively halved increments h, h/2, h/4, ...
+and compares where they cross the plate (or hit the ground). For an
+integrator of order p, the difference between the results at h and h/2 is
+(2^p - 1) times the error at h/2, so
+
+    error(h) ~ |x(h) - x(h/2)| * 2^p / (2^p - 1).
+
+The coarsest increment whose estimated error is within the tolerance is the
+cheapest safe one. The same pair of results also gives the Richardson
+extrapolation x(h/2) + (x(h/2) - x(h)) / (2^p - 1), which removes the leading
+error term and is more accurate than either throw.
+
+The order p is the nominal order of the integrator, unless the results show a
+lower one (e.g. because the event location or the tabulated aerodynamics is
+less accurate than the integrator), in which case the lower, observed order is
+used so that the error is not underestimated.
+
+Chosen increments are cached per pitch type and state, so
+    pitch.throw(18, 'auto', 'rk4')
+only runs the study for the first pitch of each predefined class, and every
+later throw of that class from its release point runs at the cached
+increment. Custom pitches, and pitches thrown on from where an earlier throw
+left them, are cached per position, velocity and spin.
+"""
+
+from math import log2
+from numpy import array, isfinite, sqrt
+from baseball.batch import PitchBatch
+from npgmath import integrators
+from npgphysics import forces
+
+default_tolerance = 0.001   # plate location tolerance in meters
+first_increment = 0.05      # the coarsest increment tried, in seconds
+max_halvings = 12           # down to about 12 microseconds
+
+# increments chosen by increment_for, keyed by pitch type and state and
+# throw settings
+increments = {}
+
+class StepSizeStudy:
+    """The results of a convergence study.
+
+    Attributes
+    ----------
+        increments : list of float
+            The increments thrown, from the coarsest to the finest.
+        locations : list of numpy.ndarray
+            For each increment, an (N, 3) array with the position of each
+            pitch at its event.
+        errors : list of float
+            The estimated error (in meters) of every increment but the
+            finest: the largest over the pitches.
+        order : float
+            The order of convergence used for the error estimates.
+        dt : float
+            The coarsest increment that meets the tolerance, or the finest
+            increment thrown if none does.
+        error : float
+            The estimated error of dt.
+        converged : bool
+            Whether dt meets the tolerance.
+        extrapolated : numpy.ndarray
+            The Richardson extrapolation of the event positions from dt and
+            dt / 2, an (N, 3) array.
+        throws : int
+            The number of batch throws the study took.
+    """
+
+    def __init__(self, tolerance, nominal_order):
+        self.tolerance = tolerance
+        self.nominal_order = nominal_order
+        self.increments = []
+        self.locations = []
+        self.errors = []
+        self.order = nominal_order
+        self.dt = None
+        self.error = None
+        self.converged = False
+        self.extrapolated = None
+
+    @property
+    def throws(self):
+        return len(self.increments)
+
+    def add(self, dt, location):
+        """Add the event positions of a throw at increment dt, update the
+        error estimates, and return whether the tolerance is met."""
+        self.increments.append(dt)
+        self.locations.append(location)
+        if len(self.locations) < 2:
+            return False
+        differences = [largest_distance(a, b) for a, b in
+                       zip(self.locations, self.locations[1:])]
+        self.order = self.nominal_order
+        if len(differences) >= 2 and differences[-1] > 0:
+            observed = log2(differences[-2] / differences[-1])
+            if isfinite(observed) and observed < self.order:
+                self.order = max(observed, 0.5)
+        factor = 2**self.order / (2**self.order - 1)
+        self.errors = [d * factor for d in differences]
+
+        # the coarsest increment that meets the tolerance, as long as every
+        # finer one does as well (a coarse step can agree by chance)
+        chosen = len(self.errors) - 1
+        while chosen >= 0 and self.errors[chosen] <= self.tolerance:
+            chosen -= 1
+        chosen += 1
+        self.converged = chosen < len(self.errors)
+        if not self.converged:
+            chosen = len(self.errors) - 1
+        self.dt = self.increments[chosen]
+        self.error = self.errors[chosen]
+        coarse, fine = self.locations[chosen], self.locations[chosen + 1]
+        self.extrapolated = fine + (fine - coarse) / (2**self.order - 1)
+        return self.converged and chosen < len(self.errors) - 1
+
+def largest_distance(a, b):
+    """Return the largest distance between corresponding rows of two (N, 3)
+    arrays."""
+    d = a - b
+    return float(sqrt((d * d).sum(axis=1)).max())
+
+def study(pitch_list, distance, tolerance=default_tolerance, integrator=None,
+          dt=first_increment, halvings=max_halvings, aerodynamics=None,
+          wind=None):
+    """Throw copies of the pitches at successively halved increments until
+    the error estimate of a coarser increment is within the tolerance.
+
+    The study stops once the chosen increment is confirmed by one more
+    halving, so it costs a few throws at increments down to a quarter of
+    the chosen one. The pitches themselves are not thrown.
+
+    Parameters
+    ----------
+        pitch_list : list of baseball.Pitch
+            The pitches to study, at their current (usually release) state.
+            The tolerance must be met by every one of them.
+        distance : float
+            The distance (in meters) to throw the pitches.
+        tolerance : float
+            The largest acceptable error (in meters) of the position at which
+            a pitch crosses the plate or hits the ground.
+        integrator : string or npgmath.integrators.Integrator
+            A fixed-step integrator. If None, the Euler Method is used.
+        dt : float
+            The first (coarsest) increment to try, in seconds.
+        halvings : int
+            The largest number of times to halve the increment.
+        aerodynamics, wind
+            As for Pitch.throw.
+
+    Returns
+    -------
+        StepSizeStudy
+    """
+    if integrator is not None:
+        integrator = integrators.get_integrator(integrator)
+        if integrator.adaptive:
+            raise ValueError("step size selection needs a fixed-step "
+                             "integrator, got %s" % integrator.name)
+        order = integrator.order
+    else:
+        order = 1
+    result = StepSizeStudy(tolerance, order)
+    for i in range(halvings + 1):
+        batch = PitchBatch.from_pitches(pitch_list)
+        batch.throw(distance, dt, False, integrator, aerodynamics=aerodynamics,
+                    wind=wind)
+        if result.add(dt, array(batch.event_states[:, :3])):
+            break
+        dt /= 2
+    return result
+
+def increment_for(pitch, distance, integrator=None,
+                  tolerance=default_tolerance, aerodynamics=None, wind=None):
+    """Return the coarsest increment that meets the tolerance for pitches of
+    the same type and state as pitch, running a study on pitch the first time
+    and using the cached increment afterwards.
+
+    The cache is keyed by the class of the pitch (which includes its
+    constants, see pitches.with_constants), its current position, velocity
+    and spin (the state the study starts from), the distance, the settings
+    of the integrator (so equal instances share an entry), the tolerance,
+    the air density and gravity of npgphysics.forces, and the aerodynamics
+    and wind objects. Every new pitch of a predefined class starts from the
+    same state, so they share an entry; a pitch that was already thrown
+    does not share it.
+
+    Raises
+    ------
+        ValueError
+            If no increment down to first_increment / 2**max_halvings meets
+            the tolerance.
+    """
+    key = (type(pitch), tuple(pitch.position), tuple(pitch.velocity),
+           tuple(pitch.spin), distance,
+           integrators.get_integrator(integrator).settings(), tolerance,
+           forces.air_density, forces.g, aerodynamics, wind)
+    if key not in increments:
+        result = study([pitch], distance, tolerance, integrator,
+                       aerodynamics=aerodynamics, wind=wind)
+        if not result.converged:
+            raise ValueError("no increment down to %g s meets a tolerance of "
+                             "%g m (estimated error %g m)"
+                             % (result.dt, tolerance, result.error))
+        increments[key] = result.dt
+    return increments[key]
+
+def parse_increment(text):
+    """Parse a command line increment: a number of seconds, or 'auto'."""
+    return text if text == 'auto' else float(text)
+
+def clear_cache():
+    """Forget every cached increment."""
+    increments.clear()
@@ -0,0 +1,284 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module keeps simulated trajectories on disk so that they can be analyzed
+and plotted without simulating the pitches again. A store is a directory with
+three files:
+    points.f8   every point of every trajectory, one after the other, as
+                raw float64 (x, y, z) triples.
+    index.bin   one record of index_type per trajectory: where its points
+                start and how many there are, the parameters of the pitch,
+                the increment and integrator it was thrown with, and its
+                outcome.
+    meta.json   the lists of distinct labels, colors, pitch classes and
+                integrators that the id fields of the index refer to.
+Both binary files are only ever appended to, one chunk per call to append, and
+are read through numpy.memmap, so selecting trajectories and slicing them
+reads only the pages that are used and copies nothing.
+
+For example:
+    store = TrajectoryStore('slider_runs')
+    store.record(table, distance=18, dt=0.001, integrator='rk4')
+    strikes = (store.index['event'] == PLATE).nonzero()[0]
+    plotter.add_store(store, strikes[:1000])
+"""
+
+import json
+import os
+
+from numpy import arange, array, concatenate, cumsum, dtype, memmap, zeros
+from baseball.outcome import NO_EVENT, Outcome, event_names
+from baseball.table import PitchTable, row_type, vocabulary_ids
+from npgmath import integrators
+
+index_type = dtype([('offset', 'i8'),
+                    ('length', 'i8'),
+                    ('position', 'f8', 3),
+                    ('velocity', 'f8', 3),
+                    ('spin', 'f8', 3),
+                    ('mass', 'f8'),
+                    ('drag_coefficient', 'f8'),
+                    ('radius', 'f8'),
+                    ('dt', 'f8'),
+                    ('integrator_id', 'i4'),
+                    ('label_id', 'i4'),
+                    ('color_id', 'i4'),
+                    ('kind_id', 'i4'),
+                    ('event', 'i4'),
+                    ('time', 'f8'),
+                    ('event_state', 'f8', 6)])
+
+class TrajectoryStore:
+    """An append-only store of trajectories backed by memory-mapped files.
+
+    Attributes
+    ----------
+        directory : string
+            The directory of the store.
+        labels, colors : list of string
+            The distinct labels and colors. label_id and color_id in the
+            index are indices into these lists.
+        kinds : list of string
+            The names of the distinct pitch classes in baseball.pitches.
+            kind_id in the index is an index into this list.
+        integrators : list of string
+            The settings of each distinct integrator, as the repr of
+            Integrator.settings() (e.g. "('RK4',)").
+            integrator_id in the index is an index into this list.
+    """
+
+    def __init__(self, directory):
+        """Open a store, creating it if it does not exist. Anything written
+        after the last complete chunk (e.g. by a process that was killed
+        while appending) is discarded.
+
+        Parameters
+        ----------
+            directory : string
+                The directory of the store.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.labels = []
+        self.colors = []
+        self.kinds = []
+        self.integrators = []
+        if os.path.exists(self._path('meta.json')):
+            with open(self._path('meta.json')) as f:
+                meta = json.load(f)
+            self.labels = meta['labels']
+            self.colors = meta['colors']
+            self.kinds = meta['kinds']
+            self.integrators = meta['integrators']
+        self._points = None
+        self._index = None
+        self._repair()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _repair(self):
+        """Truncate both files to the last complete chunk."""
+        for name in ('points.f8', 'index.bin'):
+            if not os.path.exists(self._path(name)):
+                open(self._path(name), 'wb').close()
+        index_size = os.path.getsize(self._path('index.bin'))
+        count = index_size // index_type.itemsize
+        points = 0
+        if count:
+            last = self._read_index(count)[-1]
+            points = int(last['offset'] + last['length'])
+        if index_size != count * index_type.itemsize:
+            os.truncate(self._path('index.bin'), count * index_type.itemsize)
+        if os.path.getsize(self._path('points.f8')) != points * 24:
+            os.truncate(self._path('points.f8'), points * 24)
+
+    def truncate(self, count):
+        """Discard every trajectory after the first count, e.g. the chunks
+        that a resumed job is going to write again."""
+        if count >= len(self):
+            return
+        points = 0
+        if count:
+            last = self._read_index(count)[-1]
+            points = int(last['offset'] + last['length'])
+        self._points = None
+        self._index = None
+        os.truncate(self._path('index.bin'), count * index_type.itemsize)
+        os.truncate(self._path('points.f8'), points * 24)
+
+    def _read_index(self, count):
+        if count == 0:
+            return zeros(0, index_type)
+        return memmap(self._path('index.bin'), index_type, 'r',
+                      shape=(count,))
+
+    def __len__(self):
+        return os.path.getsize(self._path('index.bin')) // index_type.itemsize
+
+    @property
+    def index(self):
+        """The index as a read-only memory-mapped structured array with one
+        record of index_type per trajectory."""
+        count = len(self)
+        if self._index is None or len(self._index) != count:
+            self._index = self._read_index(count)
+        return self._index
+
+    @property
+    def points(self):
+        """Every stored point as a read-only memory-mapped (M, 3) array."""
+        count = os.path.getsize(self._path('points.f8')) // 24
+        if self._points is None or len(self._points) != count:
+            self._points = (zeros((0, 3)) if count == 0 else
+                            memmap(self._path('points.f8'), 'f8', 'r',
+                                   shape=(count, 3)))
+        return self._points
+
+    def trail(self, i):
+        """Return the trajectory of the i-th pitch as an (N, 3) view of the
+        points file."""
+        record = self.index[i]
+        start = int(record['offset'])
+        return self.points[start:start + int(record['length'])]
+
+    def trails(self, indices=None):
+        """Return the trajectories of the given pitches (all of them if
+        indices is None) as a list of views of the points file. indices may
+        be a slice, a boolean mask or an array of indices."""
+        selected = arange(len(self))
+        if indices is not None:
+            selected = selected[indices]
+        index = self.index
+        points = self.points
+        return [points[o:o + n] for o, n in
+                zip(index['offset'][selected].tolist(),
+                    index['length'][selected].tolist())]
+
+    def outcome(self, i):
+        """Return the outcome of the i-th pitch as a
+        baseball.outcome.Outcome, or None if it has none."""
+        record = self.index[i]
+        if record['event'] == NO_EVENT:
+            return None
+        state = record['event_state'].tolist()
+        return Outcome(event_names[int(record['event'])],
+                       float(record['time']), state[:3], state[3:])
+
+    def table(self, indices=None):
+        """Return the parameters of the given pitches (all of them if indices
+        is None) as a baseball.table.PitchTable, e.g. to simulate them again
+        with other settings."""
+        index = self.index if indices is None else self.index[indices]
+        data = zeros(len(index), row_type)
+        for name in ('position', 'velocity', 'spin', 'mass',
+                     'drag_coefficient', 'radius', 'label_id', 'color_id',
+                     'kind_id'):
+            data[name] = index[name]
+        return PitchTable(data, self.labels, self.colors, self.kinds)
+
+    def append(self, batch, dt, integrator=None, kinds=None):
+        """Append the trajectories of a thrown batch as one chunk.
+
+        Parameters
+        ----------
+            batch : baseball.batch.PitchBatch
+                A batch that was thrown with keep_trails=True.
+            dt : float
+                The increment it was thrown with.
+            integrator : string or npgmath.integrators.Integrator
+                The integrator it was thrown with.
+            kinds : list of string
+                The name of the pitch class in baseball.pitches of each
+                pitch. Defaults to 'Pitch'.
+        """
+        if batch.trails is None:
+            raise ValueError("the batch must be thrown with keep_trails=True")
+        n = len(batch)
+        if n == 0:
+            return
+        lengths = array([len(t) for t in batch.trails])
+        records = zeros(n, index_type)
+        records['offset'] = (os.path.getsize(self._path('points.f8')) // 24
+                             + cumsum(lengths) - lengths)
+        records['length'] = lengths
+        records['position'] = batch.initial_position
+        records['velocity'] = batch.initial_velocity
+        records['spin'] = batch.spin
+        records['mass'] = batch.mass
+        records['drag_coefficient'] = batch.drag_coefficient
+        records['radius'] = batch.radius
+        records['dt'] = dt
+        records['integrator_id'] = vocabulary_ids(
+            [repr(integrators.get_integrator(integrator).settings())],
+            self.integrators)
+        records['label_id'] = vocabulary_ids(batch.labels, self.labels)
+        records['color_id'] = vocabulary_ids(batch.colors, self.colors)
+        records['kind_id'] = vocabulary_ids(
+            ['Pitch'] * n if kinds is None else kinds, self.kinds)
+        records['event'] = batch.events
+        records['time'] = batch.times
+        records['event_state'] = batch.event_states
+
+        # the points go first, so a chunk is only visible once both are
+        # complete; _repair drops a chunk that is not
+        self._write_meta()
+        with open(self._path('points.f8'), 'ab') as f:
+            concatenate(batch.trails).astype('f8').tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._path('index.bin'), 'ab') as f:
+            records.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, pitches, distance, dt, integrator=None, chunk_size=1000,
+               backend=None):
+        """Throw pitches and append their trajectories, one chunk of
+        chunk_size pitches at a time.
+
+        Parameters
+        ----------
+            pitches : baseball.table.PitchTable or list of baseball.Pitch
+                The (unthrown) pitches.
+            distance, dt, integrator, backend
+                The arguments of PitchBatch.throw.
+            chunk_size : int
+                The number of pitches thrown and written together.
+        """
+        if not isinstance(pitches, PitchTable):
+            pitches = PitchTable.from_pitches(pitches)
+        for chunk in pitches.chunks(chunk_size):
+            batch = chunk.to_batch()
+            batch.throw(distance, dt, True, integrator, backend)
+            self.append(batch, dt, integrator,
+                        [chunk.kinds[i] for i in chunk.data['kind_id']])
+
+    def _write_meta(self):
+        temporary = self._path('meta.json.tmp')
+        with open(temporary, 'w') as f:
+            json.dump({'labels': self.labels, 'colors': self.colors,
+                       'kinds': self.kinds,
+                       'integrators': self.integrators}, f)
+        os.replace(temporary, self._path('meta.json'))
@@ -0,0 +1,366 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module precomputes plate outcomes over a grid of pitch parameters so that
+interactive tools can look them up instead of simulating. The grid spans speed,
+the three spin components, and release height and side. The velocity always
+points along Pitch.default_velocity and the release point is at x = 0. The
+table is stored as a .npy file that is opened with memory mapping, plus a
+.json file with the grid axes, and queries interpolate it multilinearly
+(https://en.wikipedia.org/wiki/Trilinear_interpolation, in six dimensions).
+
+Run it from the src directory, for example:
+    python -m baseball.surrogate build table --validate 200 --tolerance 0.005
+    python -m baseball.surrogate query table 42 0 0.024 0.02 1.9 -0.6
+"""
+
+import argparse
+import json
+import sys
+import time
+from itertools import product
+
+from numpy import arange, array, asarray, column_stack, load, ones, \
+    searchsorted, sqrt, unique, unravel_index, zeros
+from numpy.lib.format import open_memmap
+from numpy.random import SeedSequence, default_rng
+from baseball.batch import PitchBatch
+from baseball.outcome import calculate_break, plate_distance
+from baseball.pitches import Pitch
+from npgmath import integrators
+
+# names of the grid axes, in order
+inputs = ['speed', 'spin_x', 'spin_y', 'spin_z', 'height', 'side']
+
+# names of the tabulated outcomes, in order
+outputs = ['plate_y', 'plate_z', 'time', 'break_y', 'break_z']
+
+default_axes = {'speed': [36.0, 38.0, 40.0, 42.0, 44.0],
+                'spin_x': [-0.03, -0.02, -0.01, 0.0, 0.01, 0.02, 0.03],
+                'spin_y': [-0.03, -0.02, -0.01, 0.0, 0.01, 0.02, 0.03],
+                'spin_z': [-0.03, -0.02, -0.01, 0.0, 0.01, 0.02, 0.03],
+                'height': [1.7, 1.9, 2.1],
+                'side': [-0.8, -0.6, -0.4]}
+
+direction = array(Pitch.default_velocity) / sqrt(
+    sum(v * v for v in Pitch.default_velocity))
+
+def pitch_arrays(values):
+    """Convert an (N, 6) array of grid inputs into (N, 3) arrays of release
+    points, velocities and spins."""
+    values = asarray(values, dtype=float).reshape(-1, len(inputs))
+    position = column_stack((zeros(len(values)), values[:, 4], values[:, 5]))
+    velocity = values[:, :1] * direction
+    return position, velocity, values[:, 1:4]
+
+def simulate(values, distance=18, dt=0.01, integrator='rk4'):
+    """Simulate an (N, 6) array of grid inputs and return an (N, 5) array of
+    outcomes."""
+    batch = PitchBatch(*pitch_arrays(values))
+    batch.throw(distance, dt, keep_trails=False, integrator=integrator)
+    return column_stack((batch.plate_y, batch.plate_z, batch.times,
+                         batch.breaks))
+
+def build(path, axes=None, distance=18, dt=0.01, integrator='rk4',
+          chunk_size=20000):
+    """Simulate every point of a grid and write the table to path + '.npy'
+    and path + '.json'.
+
+    Parameters
+    ----------
+        path : string
+            The path of the table without an extension.
+        axes : dict
+            The sorted values of each grid axis, keyed by the names in inputs.
+            Missing axes use default_axes.
+        distance, dt, integrator
+            The simulation settings.
+        chunk_size : int
+            The number of grid points simulated per batch.
+
+    Returns
+    -------
+        SurrogateTable
+            The new table.
+    """
+    axes = dict(default_axes, **(axes or {}))
+    axes = [sorted(float(v) for v in axes[name]) for name in inputs]
+    shape = tuple(len(a) for a in axes)
+    values = open_memmap(path + '.npy', mode='w+',
+                         shape=shape + (len(outputs),))
+    flat = values.reshape(-1, len(outputs))
+    grid = [array(a) for a in axes]
+    for start in range(0, len(flat), chunk_size):
+        stop = min(start + chunk_size, len(flat))
+        indices = unravel_index(arange(start, stop), shape)
+        points = column_stack([a[i] for a, i in zip(grid, indices)])
+        flat[start:stop] = simulate(points, distance, dt, integrator)
+    values.flush()
+    del values, flat
+
+    integrator = integrators.get_integrator(integrator)
+    with open(path + '.json', 'w') as f:
+        json.dump({'inputs': inputs, 'outputs': outputs,
+                   'axes': dict(zip(inputs, axes)), 'distance': distance,
+                   'dt': dt, 'integrator': integrator.name,
+                   'integrator_settings': list(integrator.settings()[1:])},
+                  f, indent=2)
+    return SurrogateTable(path)
+
+class SurrogateTable:
+    """A precomputed table of plate outcomes, opened with memory mapping."""
+
+    def __init__(self, path):
+        """Open the table written by build at path."""
+        with open(path + '.json') as f:
+            self.metadata = json.load(f)
+        self.axes = [array(self.metadata['axes'][name]) for name in inputs]
+        self.values = load(path + '.npy', mmap_mode='r')
+        self._lists = [a.tolist() for a in self.axes]
+        # flat view and strides used by lookup, which indexes Python floats
+        self._flat = memoryview(self.values.reshape(-1))
+        self._strides = [stride // self.values.itemsize
+                         for stride in self.values.strides[:len(inputs)]]
+        self._corners = [0]
+        for stride in self._strides:
+            self._corners = self._corners + [c + stride for c in self._corners]
+
+    @property
+    def shape(self):
+        return tuple(len(a) for a in self.axes)
+
+    @property
+    def integrator(self):
+        """A new instance of the integrator the table was built with."""
+        metadata = self.metadata
+        return integrators.integrators[metadata['integrator']](
+            *metadata.get('integrator_settings', []))
+
+    def query(self, points):
+        """Interpolate the outcomes of many pitches at once.
+
+        Parameters
+        ----------
+            points : array_like
+                An (N, 6) array of inputs (speed, spin_x, spin_y, spin_z,
+                height, side). Inputs outside the grid are clamped to its
+                edges.
+
+        Returns
+        -------
+            numpy.ndarray
+                An (N, 5) array of outcomes (plate_y, plate_z, time, break_y,
+                break_z).
+        """
+        points = asarray(points, dtype=float).reshape(-1, len(inputs))
+        lower = []
+        weights = []
+        for d, axis in enumerate(self.axes):
+            if len(axis) == 1:
+                lower.append(zeros(len(points), dtype=int))
+                weights.append(zeros(len(points)))
+                continue
+            i = (searchsorted(axis, points[:, d]) - 1).clip(0, len(axis) - 2)
+            lower.append(i)
+            weights.append(((points[:, d] - axis[i])
+                            / (axis[i + 1] - axis[i])).clip(0.0, 1.0))
+
+        result = zeros((len(points), len(outputs)))
+        for corner in product((0, 1), repeat=len(inputs)):
+            weight = ones(len(points))
+            index = []
+            for d, c in enumerate(corner):
+                if c and len(self.axes[d]) == 1:
+                    break
+                weight = weight * (weights[d] if c else 1.0 - weights[d])
+                index.append(lower[d] + c)
+            else:
+                result += weight[:, None] * self.values[tuple(index)]
+        return result
+
+    def lookup(self, speed, spin_x, spin_y, spin_z, height, side):
+        """Interpolate the outcome of a single pitch with plain Python floats,
+        which is faster than query for one point.
+
+        Returns
+        -------
+            list of float
+                The plate_y, plate_z, time, break_y and break_z.
+        """
+        lower = []
+        weights = []
+        for x, axis in zip((speed, spin_x, spin_y, spin_z, height, side),
+                           self._lists):
+            n = len(axis)
+            if n == 1:
+                lower.append(0)
+                weights.append(0.0)
+                continue
+            i = 0
+            while i < n - 2 and axis[i + 1] < x:
+                i += 1
+            w = (x - axis[i]) / (axis[i + 1] - axis[i])
+            lower.append(i)
+            weights.append(0.0 if w < 0.0 else 1.0 if w > 1.0 else w)
+
+        # the weights of the 2**6 corners, in the same order as _corners
+        corner_weights = [1.0]
+        for w in weights:
+            corner_weights = ([c * (1.0 - w) for c in corner_weights]
+                              + [c * w for c in corner_weights])
+
+        base = sum(i * stride for i, stride in zip(lower, self._strides))
+        flat = self._flat
+        y = z = t = by = bz = 0.0
+        for weight, corner in zip(corner_weights, self._corners):
+            if weight:
+                i = base + corner
+                y += weight * flat[i]
+                z += weight * flat[i + 1]
+                t += weight * flat[i + 2]
+                by += weight * flat[i + 3]
+                bz += weight * flat[i + 4]
+        return [y, z, t, by, bz]
+
+    def sample_points(self, n, seed=None):
+        """Return an (n, 6) array of random inputs within the grid."""
+        rng = default_rng(seed)
+        return column_stack([rng.uniform(a[0], a[-1], n) for a in self.axes])
+
+    def validate(self, n=200, seed=None):
+        """Compare interpolated outcomes against direct Pitch.throw results at
+        random points within the grid.
+
+        Returns
+        -------
+            (numpy.ndarray, numpy.ndarray)
+                The (n, 6) sample points and the (n, 5) absolute errors.
+        """
+        points = self.sample_points(n, seed)
+        direct = zeros((n, len(outputs)))
+        metadata = self.metadata
+        for k, (p, v, s) in enumerate(zip(*pitch_arrays(points))):
+            pitch = Pitch(p.tolist(), v.tolist(), s.tolist())
+            pitch.throw(metadata['distance'], metadata['dt'], self.integrator)
+            outcome = pitch.outcome
+            direct[k, :3] = outcome.plate_y, outcome.plate_z, outcome.time
+            direct[k, 3:] = calculate_break(p, v, outcome.position)
+        return points, abs(self.query(points) - direct)
+
+def refine_axes(axes, points, errors, tolerance):
+    """Split the grid cells that contain a point whose plate location error
+    is above the tolerance. Along each axis, every interval that contains such
+    a point gets a new midpoint.
+
+    Returns
+    -------
+        (list of list of float, int)
+            The refined axes and the number of intervals that were split.
+    """
+    bad = points[plate_distance(errors[:, 0], errors[:, 1]) > tolerance]
+    refined = []
+    splits = 0
+    for d, axis in enumerate(axes):
+        axis = array(axis, dtype=float)
+        if len(axis) < 2 or not len(bad):
+            refined.append(axis.tolist())
+            continue
+        i = unique((searchsorted(axis, bad[:, d]) - 1).clip(0, len(axis) - 2))
+        splits += len(i)
+        refined.append(sorted(axis.tolist()
+                              + ((axis[i] + axis[i + 1]) / 2).tolist()))
+    return refined, splits
+
+def build_refined(path, axes=None, tolerance=0.005, samples=200,
+                  max_refinements=3, seed=None, report=None, **settings):
+    """Build a table, check it against direct simulation, and refine the grid
+    where the plate location error is above tolerance until it is within
+    tolerance or max_refinements is reached.
+
+    Every check draws new sample points, and the final table is scored on a
+    held-out sample that no refinement has seen: a grid refined where some
+    points failed would look better than it is on those same points.
+
+    Parameters
+    ----------
+        seed : int
+            The seed of the samples; each check gets its own stream of it.
+        report : function
+            If given, called as report(table, errors, held_out) after every
+            check, with held_out True for the final one.
+
+    Returns
+    -------
+        (SurrogateTable, numpy.ndarray)
+            The final table and its errors on the held-out sample.
+    """
+    held_out, *seeds = SeedSequence(seed).spawn(max_refinements + 2)
+    table = build(path, axes, **settings)
+    for refinement in range(max_refinements + 1):
+        points, errors = table.validate(samples, seeds[refinement])
+        if report is not None:
+            report(table, errors, False)
+        if refinement == max_refinements:
+            break
+        new_axes, splits = refine_axes(table.axes, points, errors, tolerance)
+        if not splits:
+            break
+        table = build(path, dict(zip(inputs, new_axes)), **settings)
+    errors = table.validate(samples, held_out)[1]
+    if report is not None:
+        report(table, errors, True)
+    return table, errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help="build a table")
+    build_parser.add_argument('path')
+    build_parser.add_argument('--validate', type=int, default=200,
+                              help="number of validation samples")
+    build_parser.add_argument('--tolerance', type=float,
+                              help="refine until the plate location error "
+                                   "(m) is below this")
+    build_parser.add_argument('--max-refinements', type=int, default=2)
+    build_parser.add_argument('--seed', type=int, default=0,
+                              help="seed of the validation samples; every "
+                                   "check draws new ones from it")
+    query_parser = commands.add_parser('query', help="query a table")
+    query_parser.add_argument('path')
+    query_parser.add_argument('values', nargs=len(inputs), type=float,
+                              metavar='X', help=' '.join(inputs))
+    args = parser.parse_args(argv)
+
+    if args.command == 'query':
+        table = SurrogateTable(args.path)
+        start = time.perf_counter()
+        result = table.lookup(*args.values)
+        elapsed = time.perf_counter() - start
+        for name, value in zip(outputs, result):
+            print("%-8s %.6f" % (name, value))
+        print("lookup took %.1f us" % (elapsed * 1e6))
+        return 0
+
+    def report(table, errors, held_out=True):
+        plate = plate_distance(errors[:, 0], errors[:, 1])
+        print("grid %s (%d points), %s: plate error max %.2e m, mean "
+              "%.2e m; time error max %.2e s"
+              % ('x'.join(map(str, table.shape)), table.values[..., 0].size,
+                 'held-out sample' if held_out else 'refinement sample',
+                 plate.max(), plate.mean(), errors[:, 2].max()))
+
+    start = time.perf_counter()
+    if args.tolerance is None:
+        table = build(args.path)
+        report(table, table.validate(args.validate, args.seed)[1])
+    else:
+        build_refined(args.path, tolerance=args.tolerance,
+                      samples=args.validate,
+                      max_refinements=args.max_refinements, seed=args.seed,
+                      report=report)
+    print("built in %.1f s" % (time.perf_counter() - start))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
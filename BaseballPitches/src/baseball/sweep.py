@@ -0,0 +1,349 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module runs parameter sweeps over a grid of release points, velocities
+and spins. The grid is never built in memory: every pitch is identified by its
+index in the grid, the index range is split into chunks, and a process pool
+simulates one chunk at a time as a PitchBatch. The summary of each pitch (plate
+location, time to plate and break) is appended to a CSV file as soon as its
+chunk finishes, and a log of finished chunks lets an interrupted sweep resume
+where it stopped.
+
+Run it from the src directory, for example:
+    python -m baseball.sweep sweep.csv --vx 36:44:9 --sy=-0.03:0.03:25 \\
+        --sz=-0.03:0.03:25 --processes 8
+
+(Use --name=value for ranges that start with a minus sign.) With --dt auto,
+the increment is the coarsest one that meets --tolerance for a sample of the
+grid (see baseball.stepsize).
+"""
+
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from numpy import arange, array, column_stack, linspace, savetxt, unique, \
+    unravel_index
+from baseball import stepsize
+from baseball.batch import PitchBatch
+from baseball.pitches import Pitch
+from npgmath import integrators
+
+# names of the nine swept parameters, in the order of the grid axes
+parameters = ['px', 'py', 'pz', 'vx', 'vy', 'vz', 'sx', 'sy', 'sz']
+
+columns = (['index'] + parameters
+           + ['event', 'time', 'plate_y', 'plate_z', 'break_y', 'break_z'])
+
+def axis_values(start, stop, num):
+    """Return num evenly spaced values from start to stop as a list."""
+    if num == 1:
+        return [float(start)]
+    return [start + (stop - start) * i / (num - 1) for i in range(num)]
+
+def parse_range(text):
+    """Parse a range given as 'value' or 'start:stop:num'.
+
+    Examples
+    --------
+        >>> parse_range('38:42:3')
+        [38.0, 40.0, 42.0]
+        >>> parse_range('0.02')
+        [0.02]
+    """
+    parts = text.split(':')
+    if len(parts) == 1:
+        return [float(parts[0])]
+    if len(parts) != 3:
+        raise ValueError("expected 'value' or 'start:stop:num', got %r"
+                         % text)
+    return axis_values(float(parts[0]), float(parts[1]), int(parts[2]))
+
+class Grid:
+    """A rectangular grid over the nine pitch parameters. Axes that are not
+    given default to Pitch.default_position, Pitch.default_velocity and zero
+    spin.
+    """
+
+    def __init__(self, **axes):
+        """Define the grid.
+
+        Parameters
+        ----------
+            **axes : list of float
+                The values of each parameter, keyed by its name in the
+                parameters list (e.g. vx=[38.0, 40.0, 42.0]).
+        """
+        defaults = Pitch.default_position + Pitch.default_velocity + [0.0] * 3
+        unknown = set(axes) - set(parameters)
+        if unknown:
+            raise ValueError("unknown parameters: %s"
+                             % ', '.join(sorted(unknown)))
+        self.axes = [array(axes.get(name, [default]), dtype=float)
+                     for name, default in zip(parameters, defaults)]
+        self.shape = tuple(len(a) for a in self.axes)
+
+    def __len__(self):
+        size = 1
+        for n in self.shape:
+            size *= n
+        return size
+
+    def values(self, start, stop):
+        """Return a (stop - start, 9) array with the parameters of the pitches
+        with grid indices start to stop - 1.
+        """
+        indices = unravel_index(arange(start, stop), self.shape)
+        return column_stack([axis[index]
+                             for axis, index in zip(self.axes, indices)])
+
+    def chunks(self, chunk_size):
+        """Return the (chunk id, start, stop) index ranges of the chunks."""
+        return [(i, start, min(start + chunk_size, len(self)))
+                for i, start in enumerate(range(0, len(self), chunk_size))]
+
+def simulate_chunk(task):
+    """Simulate one chunk of the grid and return its summary rows. This runs in
+    a worker process.
+
+    Parameters
+    ----------
+        task : tuple
+            (grid, chunk id, start, stop, distance, dt, integrator)
+
+    Returns
+    -------
+        (int, numpy.ndarray)
+            The chunk id and an array with one row per pitch and one column
+            per entry of the columns list.
+    """
+    grid, chunk, start, stop, distance, dt, integrator = task
+    values = grid.values(start, stop)
+    batch = PitchBatch(values[:, 0:3], values[:, 3:6], values[:, 6:9])
+    batch.throw(distance, dt, keep_trails=False, integrator=integrator)
+    return chunk, column_stack((arange(start, stop), values, batch.events,
+                                batch.times, batch.plate_y, batch.plate_z,
+                                batch.breaks))
+
+def choose_increment(grid, distance, integrator, tolerance, samples=32):
+    """Return the coarsest increment that meets the tolerance for evenly
+    spaced samples of the grid, including its first and last pitch. See
+    stepsize.study."""
+    indices = unique(linspace(0, len(grid) - 1, min(samples, len(grid)))
+                     .round().astype(int))
+    pitch_list = [Pitch(row[0:3].tolist(), row[3:6].tolist(),
+                        row[6:9].tolist())
+                  for row in (grid.values(i, i + 1)[0] for i in indices)]
+    result = stepsize.study(pitch_list, distance, tolerance, integrator)
+    if not result.converged:
+        raise ValueError("no increment down to %g s meets a tolerance of "
+                         "%g m" % (result.dt, tolerance))
+    return result.dt
+
+def sweep_settings(grid, distance, dt, integrator, chunk_size):
+    """Return the settings that the rows of a sweep depend on, as a dict of
+    strings: the chunk size (which the chunk ids refer to), the distance,
+    the increment, the settings of the integrator and the grid axes."""
+    settings = {'chunk_size': '%d' % chunk_size,
+                'distance': repr(float(distance)),
+                'dt': repr(float(dt)),
+                'integrator': repr(
+                    integrators.get_integrator(integrator).settings())}
+    for name, axis in zip(parameters, grid.axes):
+        settings[name] = ' '.join(repr(v) for v in axis.tolist())
+    return settings
+
+def read_progress(log_path):
+    """Read the log of finished chunks.
+
+    Returns
+    -------
+        (set of int, int, dict)
+            The ids of the finished chunks, the size of the output file once
+            the last of them was written, and the settings in the header of
+            the log (see sweep_settings; empty if there is no log).
+    """
+    finished = set()
+    size = 0
+    settings = {}
+    if os.path.exists(log_path):
+        with open(log_path) as log:
+            for line in log:
+                if line.startswith('# '):
+                    name, _, value = line[2:].rstrip('\n').partition(' ')
+                    settings[name] = value
+                    continue
+                fields = line.split()
+                if len(fields) == 2:
+                    finished.add(int(fields[0]))
+                    size = max(size, int(fields[1]))
+    return finished, size, settings
+
+def resume(log_path, settings):
+    """Check the log of a sweep before it is run with the given settings.
+
+    If chunks are finished, they must have been written with the same
+    settings. Otherwise the log is started again with a header of the
+    settings, replacing one left by a sweep that stopped before finishing a
+    chunk.
+
+    Returns
+    -------
+        (set of int, int)
+            The ids of the finished chunks and the size of the output file
+            once the last of them was written.
+
+    Raises
+    ------
+        ValueError
+            If chunks are finished with other settings.
+
+    Examples
+    --------
+        >>> import os, tempfile
+        >>> log_path = os.path.join(tempfile.mkdtemp(), 'sweep.csv.done')
+        >>> settings = {'chunk_size': '4', 'dt': '0.01'}
+        >>> with open(log_path, 'w') as log:    # a stale header
+        ...     _ = log.write('# chunk_size 10\\n')
+        >>> resume(log_path, settings)
+        (set(), 0)
+        >>> with open(log_path, 'a') as log:
+        ...     _ = log.write('0 120\\n')
+        >>> resume(log_path, settings)
+        ({0}, 120)
+        >>> resume(log_path, dict(settings, chunk_size='10'))
+        Traceback (most recent call last):
+        ValueError: cannot resume with chunk_size 10: the log has 4
+        >>> resume(log_path, dict(settings, dt='0.005'))
+        Traceback (most recent call last):
+        ValueError: cannot resume with dt 0.005: the log has 0.01
+    """
+    finished, size, logged = read_progress(log_path)
+    if finished:
+        for name, value in settings.items():
+            if logged.get(name) != value:
+                # the finished rows would not match the remaining ones
+                raise ValueError("cannot resume with %s %s: the log has %s"
+                                 % (name, value, logged.get(name)))
+        return finished, size
+    with open(log_path, 'w') as log:
+        for name, value in settings.items():
+            log.write("# %s %s\n" % (name, value))
+    return finished, 0
+
+def run(grid, output, distance=18, dt=0.01, integrator='rk4',
+        processes=None, chunk_size=4096, progress=None,
+        tolerance=stepsize.default_tolerance):
+    """Run a sweep and append the summary of every pitch to a CSV file.
+
+    The ids of finished chunks are recorded in output + '.done' along with the
+    size of the CSV file at that point. If the same sweep is run again, the
+    finished chunks are skipped and any rows written after the last finished
+    chunk are discarded, so a sweep can be restarted after it is interrupted.
+    The log also records the settings of the sweep (see sweep_settings), and
+    a sweep cannot be resumed with other ones.
+
+    Parameters
+    ----------
+        grid : Grid
+            The grid to sweep.
+        output : string
+            The path of the CSV file.
+        distance : float
+            The distance (in meters) to throw each pitch.
+        dt : float or string
+            The time increment (in seconds), or 'auto' for the increment
+            chosen by choose_increment. A sweep that is resumed must use the
+            same increment.
+        integrator : string or npgmath.integrators.Integrator
+            The integrator to use. RK4 with a 0.01 s increment locates the
+            plate to well under a millimeter.
+        processes : int
+            The number of worker processes. Defaults to the number of CPUs.
+        chunk_size : int
+            The number of pitches simulated per task. Larger chunks spread
+            the inter-process overhead over more pitches.
+        progress : function
+            If given, called as progress(finished pitches, total pitches)
+            after each chunk.
+        tolerance : float
+            The plate location tolerance (in meters) for dt = 'auto'.
+
+    Returns
+    -------
+        int
+            The number of pitches simulated by this call.
+    """
+    if dt == 'auto':
+        dt = choose_increment(grid, distance, integrator, tolerance)
+    log_path = output + '.done'
+    finished, size = resume(log_path, sweep_settings(grid, distance, dt,
+                                                     integrator, chunk_size))
+    tasks = [(grid, chunk, start, stop, distance, dt, integrator)
+             for chunk, start, stop in grid.chunks(chunk_size)
+             if chunk not in finished]
+    done = len(grid) - sum(task[3] - task[2] for task in tasks)
+
+    mode = 'r+' if os.path.exists(output) else 'w'
+    with open(output, mode) as out, open(log_path, 'a') as log:
+        if mode == 'r+':
+            out.truncate(size)
+            out.seek(size)
+        if size == 0:
+            out.write(','.join(columns) + '\n')
+
+        simulated = 0
+        with Pool(processes) as pool:
+            for chunk, rows in pool.imap_unordered(simulate_chunk, tasks):
+                savetxt(out, rows, delimiter=',', fmt='%.10g')
+                out.flush()
+                os.fsync(out.fileno())
+                log.write("%d %d\n" % (chunk, out.tell()))
+                log.flush()
+                simulated += len(rows)
+                if progress is not None:
+                    progress(done + simulated, len(grid))
+    return simulated
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('output', help="CSV file for the pitch summaries")
+    for name in parameters:
+        parser.add_argument('--' + name, type=parse_range,
+                            metavar='START:STOP:NUM',
+                            help="values of %s (or a single value)" % name)
+    parser.add_argument('--distance', type=float, default=18)
+    parser.add_argument('--dt', type=stepsize.parse_increment, default=0.01,
+                        help="time increment in seconds, or auto")
+    parser.add_argument('--tolerance', type=float,
+                        default=stepsize.default_tolerance,
+                        help="plate location tolerance in meters for --dt "
+                             "auto")
+    parser.add_argument('--integrator', default='rk4')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--chunk-size', type=int, default=4096)
+    args = parser.parse_args(argv)
+
+    grid = Grid(**{name: getattr(args, name) for name in parameters
+                   if getattr(args, name) is not None})
+    start = time.perf_counter()
+    if args.dt == 'auto':
+        args.dt = choose_increment(grid, args.distance, args.integrator,
+                                   args.tolerance)
+        sys.stderr.write("using dt = %g s\n" % args.dt)
+
+    def progress(done, total):
+        sys.stderr.write("\r%d / %d pitches" % (done, total))
+
+    count = run(grid, args.output, args.distance, args.dt, args.integrator,
+                args.processes, args.chunk_size, progress)
+    elapsed = time.perf_counter() - start
+    sys.stderr.write("\nsimulated %d pitches in %.2f s (%.0f pitches/s)\n"
+                     % (count, elapsed, count / elapsed if elapsed else 0))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module stores many pitch definitions in a single NumPy structured array
+(https://numpy.org/doc/stable/user/basics.rec.html) instead of one Pitch object
+per pitch. A row takes 108 bytes, where a Pitch with its lists and trail takes
+nearly 800, and a whole column (e.g. every spin) is one array that
+can be passed to PitchBatch without a Python loop. Labels, colors and pitch
+classes are stored as small integer ids into lists of distinct values.
+"""
+
+from numbers import Integral
+
+from numpy import array, concatenate, dtype, zeros
+from numpy import load as load_arrays, savez
+from baseball import pitches
+from baseball.batch import PitchBatch
+
+row_type = dtype([('position', 'f8', 3),
+                  ('velocity', 'f8', 3),
+                  ('spin', 'f8', 3),
+                  ('mass', 'f8'),
+                  ('drag_coefficient', 'f8'),
+                  ('radius', 'f8'),
+                  ('label_id', 'i4'),
+                  ('color_id', 'i4'),
+                  ('kind_id', 'i4')])
+
+def vocabulary_ids(values, vocabulary):
+    """Return the index of each value in vocabulary, adding values that are
+    not in it yet."""
+    index = {v: i for i, v in enumerate(vocabulary)}
+    ids = []
+    for v in values:
+        if v not in index:
+            index[v] = len(vocabulary)
+            vocabulary.append(v)
+        ids.append(index[v])
+    return ids
+
+class PitchTable:
+    """A table of pitch definitions with one row per pitch.
+
+    Attributes
+    ----------
+        data : numpy.ndarray
+            A structured array with the fields of row_type: position,
+            velocity and spin (3 floats each), mass, drag_coefficient and
+            radius, and label_id, color_id and kind_id.
+        labels : list of string
+            The distinct labels. label_id is an index into this list.
+        colors : list of color constant
+            The distinct colors. color_id is an index into this list.
+        kinds : list of string
+            The names of the pitch classes in baseball.pitches (e.g. 'Slider'
+            or 'Pitch'). kind_id is an index into this list.
+    """
+
+    def __init__(self, data=None, labels=None, colors=None, kinds=None):
+        """Create a table.
+
+        Parameters
+        ----------
+            data : numpy.ndarray
+                A structured array with dtype row_type. Defaults to an empty
+                table.
+            labels, colors, kinds : list
+                The vocabularies that the id columns of data refer to.
+        """
+        self.data = zeros(0, row_type) if data is None else data
+        self.labels = list(labels) if labels is not None else []
+        self.colors = list(colors) if colors is not None else []
+        self.kinds = list(kinds) if kinds is not None else []
+
+    @classmethod
+    def from_arrays(cls, p, v, s, mass=None, drag_coefficient=None,
+                    radius=None, label="Custom Pitch", color='gray',
+                    kind='Pitch'):
+        """Build a table from columns.
+
+        Parameters
+        ----------
+            p, v, s : array_like
+                (N, 3) arrays with the release point, initial velocity and
+                spin of each pitch.
+            mass, drag_coefficient, radius : float or array_like
+                The constants of all pitches or of each pitch. Default to the
+                constants of the kind.
+            label, color, kind : string or list of string
+                The label, color and pitch class name of all pitches or of
+                each pitch.
+        """
+        p = array(p, dtype=float).reshape(-1, 3)
+        n = len(p)
+        table = cls()
+        data = zeros(n, row_type)
+        data['position'] = p
+        data['velocity'] = v
+        data['spin'] = s
+        for name, values, vocabulary in (('label_id', label, table.labels),
+                                         ('color_id', color, table.colors),
+                                         ('kind_id', kind, table.kinds)):
+            if isinstance(values, str):
+                values = [values] * n
+            data[name] = vocabulary_ids(values, vocabulary)
+        kinds = [getattr(pitches, k) for k in table.kinds]
+        for name, values in (('mass', mass),
+                             ('drag_coefficient', drag_coefficient),
+                             ('radius', radius)):
+            if values is None:
+                values = array([getattr(k, name) for k in kinds])[
+                    data['kind_id']] if kinds else 0.0
+            data[name] = values
+        table.data = data
+        return table
+
+    @classmethod
+    def from_pitches(cls, pitch_list):
+        """Build a table from Pitch objects, including the predefined
+        subclasses in the pitches module. Pitches made with
+        pitches.with_constants keep their constants.
+        """
+        table = cls()
+        data = zeros(len(pitch_list), row_type)
+        data['position'] = [p.position for p in pitch_list]
+        data['velocity'] = [p.velocity for p in pitch_list]
+        data['spin'] = [p.spin for p in pitch_list]
+        data['mass'] = [p.mass for p in pitch_list]
+        data['drag_coefficient'] = [p.drag_coefficient for p in pitch_list]
+        data['radius'] = [p.radius for p in pitch_list]
+        data['label_id'] = vocabulary_ids([p.label for p in pitch_list],
+                                          table.labels)
+        data['color_id'] = vocabulary_ids([p.color for p in pitch_list],
+                                          table.colors)
+        data['kind_id'] = vocabulary_ids([_kind(p) for p in pitch_list],
+                                         table.kinds)
+        table.data = data
+        return table
+
+    @classmethod
+    def concatenate(cls, tables):
+        """Join several tables into one, merging their vocabularies."""
+        result = cls()
+        parts = []
+        for t in tables:
+            part = t.data.copy()
+            for name, own, merged in (('label_id', t.labels, result.labels),
+                                      ('color_id', t.colors, result.colors),
+                                      ('kind_id', t.kinds, result.kinds)):
+                ids = array(vocabulary_ids(own, merged) or [0])
+                part[name] = ids[part[name]]
+            parts.append(part)
+        if parts:
+            result.data = concatenate(parts)
+        return result
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        """Return a single row as a Pitch if index is an integer, or a table
+        with the selected rows if it is a slice, mask or index array. Slices
+        are views of this table."""
+        if isinstance(index, Integral):
+            return self.pitch(int(index))
+        return PitchTable(self.data[index], self.labels, self.colors,
+                          self.kinds)
+
+    @property
+    def position(self):
+        return self.data['position']
+
+    @property
+    def velocity(self):
+        return self.data['velocity']
+
+    @property
+    def spin(self):
+        return self.data['spin']
+
+    def pitch(self, i):
+        """Return row i as an unthrown Pitch of its class."""
+        row = self.data[i]
+        kind = getattr(pitches, self.kinds[row['kind_id']])
+        cls = pitches.with_constants(kind, row['mass'],
+                                     row['drag_coefficient'], row['radius'])
+        pitch = cls.__new__(cls)
+        pitches.Pitch.__init__(pitch, row['position'].tolist(),
+                               row['velocity'].tolist(),
+                               row['spin'].tolist(),
+                               self.labels[row['label_id']],
+                               self.colors[row['color_id']])
+        return pitch
+
+    def to_pitches(self):
+        """Return every row as an unthrown Pitch of its class."""
+        return [self.pitch(i) for i in range(len(self))]
+
+    def to_batch(self):
+        """Return a PitchBatch with every row of the table. The per-pitch
+        constants are only passed on if they differ between rows or from
+        those of Pitch, so the common case keeps the faster scalar
+        constants."""
+        names = ('mass', 'drag_coefficient', 'radius')
+        constants = {}
+        if any((self.data[name] != getattr(PitchBatch, name)).any()
+               for name in names):
+            constants = {name: self.data[name] for name in names}
+        labels = self.labels
+        colors = self.colors
+        return PitchBatch(self.data['position'], self.data['velocity'],
+                          self.data['spin'],
+                          [labels[i] for i in self.data['label_id']],
+                          [colors[i] for i in self.data['color_id']],
+                          **constants)
+
+    def chunks(self, size):
+        """Yield the table as consecutive views of at most size rows, e.g.
+        to simulate a large table one PitchBatch at a time."""
+        for start in range(0, len(self), size):
+            yield self[start:start + size]
+
+    def save(self, path):
+        """Write the table to a .npz file."""
+        savez(path, data=self.data, labels=array(self.labels, dtype=str),
+              colors=array(self.colors, dtype=str),
+              kinds=array(self.kinds, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """Read a table written by save."""
+        with load_arrays(path) as f:
+            return cls(f['data'], f['labels'].tolist(), f['colors'].tolist(),
+                       f['kinds'].tolist())
+
+def _kind(pitch):
+    """Return the name of the class in baseball.pitches that a pitch is an
+    instance of."""
+    for cls in type(pitch).__mro__:
+        if getattr(pitches, cls.__name__, None) is cls:
+            return cls.__name__
+    return 'Pitch'
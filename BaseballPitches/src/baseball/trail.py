@@ -0,0 +1,118 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module stores the trajectory of a pitch. Growing a NumPy array by one row
+per step copies the whole array every time, which made the NumPy version of
+Pitch.throw run in quadratic time. A Trail instead writes each point into a
+preallocated buffer and only reallocates, by doubling, when the buffer is full.
+"""
+
+from math import ceil
+from numpy import empty
+
+def estimate_steps(position, velocity, distance, dt, margin=1.25):
+    """Estimate how many steps a pitch needs to travel to the plate.
+
+    Parameters
+    ----------
+        position : list of float
+            The release point of the pitch.
+        velocity : list of float
+            The initial velocity of the pitch.
+        distance : float
+            The distance (in meters) the pitch will be thrown.
+        dt : float
+            The time (in seconds) between calculations.
+        margin : float
+            A factor applied to the straight-line estimate to account for the
+            ball slowing down due to air resistance.
+
+    Returns
+    -------
+        int
+            The estimated number of steps.
+
+    Examples
+    --------
+        >>> estimate_steps([0.0, 1.9, -0.6], [42.0, -0.2, 1.3], 18, 0.001)
+        536
+    """
+    if velocity[0] <= 0:
+        return 1
+    return int(ceil(margin * (distance - position[0]) / (velocity[0] * dt)))
+
+class Trail:
+    """A growable list of 3-D points backed by an (N, 3) float64 buffer. It
+    can be indexed and iterated like the list of positions that it replaces.
+    """
+
+    def __init__(self, point, capacity=16):
+        """Start a new trail.
+
+        Parameters
+        ----------
+            point : list of float
+                The first point of the trail (e.g. the release point).
+            capacity : int
+                The number of points to allocate space for.
+        """
+        self._buffer = empty((max(capacity, 1), 3))
+        self._buffer[0] = point
+        self._size = 1
+
+    def reserve(self, capacity):
+        """Make sure the buffer can hold at least capacity points without
+        reallocating.
+        """
+        if capacity > len(self._buffer):
+            buffer = empty((capacity, 3))
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+
+    def append(self, point):
+        """Add a point to the end of the trail. If the buffer is full, its
+        capacity is doubled so that appending stays linear overall.
+        """
+        if self._size == len(self._buffer):
+            self.reserve(2 * self._size)
+        self._buffer[self._size] = point
+        self._size += 1
+
+    def extend(self, points):
+        """Add an (N, 3) array of points to the end of the trail."""
+        n = len(points)
+        if self._size + n > len(self._buffer):
+            self.reserve(max(2 * self._size, self._size + n))
+        self._buffer[self._size:self._size + n] = points
+        self._size += n
+
+    def thin(self):
+        """Drop every other point, keeping the first one. This is used to
+        keep a bounded number of evenly spaced points."""
+        kept = self._buffer[:self._size:2].copy()
+        self._size = len(kept)
+        self._buffer[:self._size] = kept
+
+    @property
+    def array(self):
+        """An (N, 3) view of the points in the trail."""
+        return self._buffer[:self._size]
+
+    def tolist(self):
+        """Return the trail as a list of [x, y, z] lists."""
+        return self.array.tolist()
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        return self.array[i]
+
+    def __iter__(self):
+        return iter(self.array)
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.array
+        return self.array.astype(dtype)
@@ -0,0 +1,396 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module measures pitch tunneling: how long two pitches look the same to
+the batter. Two pitches tunnel well if they are close together at the point
+where the batter has to commit to a swing (about 7.2 m, or 175 ms, before the
+plate) and far apart when they cross the plate.
+
+The trajectories are first resampled to common checkpoints, at given depths
+(x) or times, in one vectorized pass over all of them. Pairs are then only
+compared where they can tunnel: a spatial index over the positions at the
+decision point finds the pairs that are within a radius of each other there,
+so pairs that diverge before the decision point are never looked at. The
+index is one of
+    'kdtree'  scipy.spatial.cKDTree, if SciPy is installed. This is the
+              default when it is.
+    'grid'    a uniform grid of radius-sized cells; only pitches in the same
+              or neighboring cells are compared, in vectorized blocks. It
+              finds the same pairs with NumPy alone, and is the default
+              without SciPy.
+    'dense'   every pair, in vectorized blocks of rows (for reference).
+
+Run it from the src directory, for example:
+    python -m baseball.tunneling --pitches 10000 --radius 0.1
+"""
+
+import argparse
+import sys
+import time
+from importlib.util import find_spec
+
+from numpy import arange, array, asarray, concatenate, cumsum, floor, \
+    int64, isfinite, maximum, median, minimum, nan, nonzero, repeat, \
+    searchsorted, sqrt, unique, where, zeros
+from numpy.random import default_rng
+from baseball import montecarlo, play_ball
+from baseball.batch import PitchBatch
+
+decision_distance = 7.2     # meters before the plate at which the batter
+                            # commits to a swing
+default_radius = 0.1        # largest separation (in meters) at the decision
+                            # point of a pair that tunnels
+
+indexes = ['grid', 'kdtree', 'dense']
+
+def available_indexes():
+    """Return the names of the indexes that can be used on this machine."""
+    return [i for i in indexes
+            if i != 'kdtree' or find_spec('scipy') is not None]
+
+def default_index():
+    """Return 'kdtree' if SciPy is installed, and 'grid' otherwise."""
+    return 'kdtree' if 'kdtree' in available_indexes() else 'grid'
+
+def _concatenate_trails(trails):
+    """Return all points of the trails as one (M, 3) array, and the offset
+    and length of each trail in it."""
+    lengths = array([len(t) for t in trails], dtype=int64)
+    points = concatenate([asarray(t, dtype=float).reshape(-1, 3)
+                          for t in trails])
+    return points, cumsum(lengths) - lengths, lengths
+
+def resample_depths(trails, depths):
+    """Interpolate the trajectories at given depths.
+
+    Parameters
+    ----------
+        trails : list of array_like
+            The trajectory of each pitch as an (n, 3) array or Trail, e.g.
+            PitchBatch.trails, Pitch.trail or TrajectoryStore.trails. x must
+            increase along each trajectory.
+        depths : array_like
+            The K depths (x, in meters) of the checkpoints.
+
+    Returns
+    -------
+        numpy.ndarray
+            An (N, K, 2) array with the height y and width z of each pitch
+            at each depth, nan where the trajectory does not reach it.
+    """
+    depths = asarray(depths, dtype=float).ravel()
+    points, offsets, lengths = _concatenate_trails(trails)
+    n = len(lengths)
+    x = points[:, 0]
+    # x increases along each trail, so (trail, x) keys are sorted and every
+    # checkpoint of every trail is found with one binary search
+    low = min(x.min(), depths.min())
+    span = max(x.max(), depths.max()) - low + 1.0
+    keys = repeat(arange(n) * span, lengths) + (x - low)
+    queries = (arange(n) * span)[:, None] + (depths - low)
+    after = searchsorted(keys, queries)
+    # a checkpoint that falls exactly on a point (e.g. the first one) is
+    # that point
+    exact = keys[minimum(after, len(keys) - 1)] == queries
+    valid = (((after > offsets[:, None]) | exact)
+             & (after < (offsets + lengths)[:, None]))
+    after[~valid] = 1
+    before = where(exact & valid, after, after - 1)
+    a = points[before]
+    b = points[after]
+    dx = b[..., 0] - a[..., 0]
+    dx[before == after] = 1.0
+    f = (depths - a[..., 0]) / dx
+    result = a[..., 1:] + f[..., None] * (b[..., 1:] - a[..., 1:])
+    result[~valid] = nan
+    return result
+
+def resample_times(trails, dt, times):
+    """Interpolate trajectories with one point every dt seconds (e.g. thrown
+    with retention 'full') at given times since release.
+
+    Returns
+    -------
+        numpy.ndarray
+            An (N, K, 3) array with the position of each pitch at each time,
+            nan after the end of its trajectory.
+    """
+    times = asarray(times, dtype=float).ravel()
+    points, offsets, lengths = _concatenate_trails(trails)
+    steps = times / dt
+    before = floor(steps).astype(int64)
+    valid = (steps >= 0) & (before[None, :] < lengths[:, None] - 1)
+    index = offsets[:, None] + before[None, :]
+    index[~valid] = 0
+    f = (steps - before)[None, :, None]
+    result = points[index] + f * (points[index + 1] - points[index])
+    result[~valid] = nan
+    return result
+
+def _dense_pairs(points, radius, block_size):
+    """Every pair within radius, comparing blocks of rows with the rows
+    after them."""
+    first, second = [], []
+    for start in range(0, len(points), block_size):
+        block = points[start:start + block_size]
+        d = block[:, None, :] - points[None, start:, :]
+        close = (d * d).sum(axis=2) <= radius * radius
+        i, j = nonzero(close)
+        later = i < j
+        first.append(start + i[later])
+        second.append(start + j[later])
+    return (concatenate(first) if first else zeros(0, int64),
+            concatenate(second) if second else zeros(0, int64))
+
+def _grid_pairs(points, radius, block_size):
+    """Every pair within radius, comparing only pitches in the same or
+    neighboring cells of a grid with radius-sized cells."""
+    cells = floor(points / radius).astype(int64)
+    cells -= cells.min(axis=0)
+    width = cells[:, 1].max() + 3
+    keys = (cells[:, 0] + 1) * width + cells[:, 1] + 1
+    order = keys.argsort(kind='stable')
+    keys = keys[order]
+    occupied, starts, counts = unique(keys, return_index=True,
+                                      return_counts=True)
+    first, second = [], []
+    # each pair of neighboring cells once: the cell itself, and the
+    # neighbors to the right and in the next row
+    for dy, dz in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+        neighbor = searchsorted(occupied, occupied + dy * width + dz)
+        neighbor[neighbor == len(occupied)] = 0
+        found = nonzero(occupied[neighbor] == occupied + dy * width + dz)[0]
+        a, b = found, neighbor[found]
+        sizes = counts[a] * counts[b]
+        # expand the cell pairs into member pairs, a block at a time
+        ends = cumsum(sizes)
+        offsets = ends - sizes
+        start = 0
+        while start < len(a):
+            stop = max(searchsorted(ends, offsets[start]
+                                    + block_size * block_size, 'right'),
+                       start + 1)
+            cell = repeat(arange(start, stop), sizes[start:stop])
+            within = arange(offsets[start], ends[stop - 1]) - offsets[cell]
+            i = order[starts[a[cell]] + within // counts[b[cell]]]
+            j = order[starts[b[cell]] + within % counts[b[cell]]]
+            d = points[i] - points[j]
+            close = (d * d).sum(axis=1) <= radius * radius
+            if dy == 0 and dz == 0:
+                close &= i < j
+            first.append(i[close])
+            second.append(j[close])
+            start = stop
+    return (concatenate(first) if first else zeros(0, int64),
+            concatenate(second) if second else zeros(0, int64))
+
+def _kdtree_pairs(points, radius):
+    from scipy.spatial import cKDTree
+    pairs = cKDTree(points).query_pairs(radius, output_type='ndarray')
+    return pairs[:, 0], pairs[:, 1]
+
+def close_pairs(points, radius, index=None, block_size=1024):
+    """Find every pair of points within radius of each other.
+
+    Parameters
+    ----------
+        points : numpy.ndarray
+            An (N, 2) array of points.
+        radius : float
+            The largest distance of a pair.
+        index : string or None
+            'grid', 'kdtree' or 'dense', or None for default_index().
+        block_size : int
+            The number of rows compared at once by 'dense', and the square
+            root of the number of pairs compared at once by 'grid'.
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray)
+            The indices i < j of the points of each pair, in no particular
+            order.
+    """
+    if index is None:
+        index = default_index()
+    if index not in indexes:
+        raise ValueError("unknown index %r, expected one of: %s"
+                         % (index, ', '.join(indexes)))
+    if index not in available_indexes():
+        raise ValueError("index %r needs SciPy, which is not installed"
+                         % index)
+    if len(points) < 2:
+        return zeros(0, int64), zeros(0, int64)
+    if index == 'kdtree':
+        i, j = _kdtree_pairs(points, radius)
+    elif index == 'grid':
+        i, j = _grid_pairs(points, radius, block_size)
+    else:
+        i, j = _dense_pairs(points, radius, block_size)
+    # pairs of neighboring grid cells come out in cell order
+    return minimum(i, j), maximum(i, j)
+
+class Tunnels:
+    """The pairs of pitches that tunnel.
+
+    Attributes
+    ----------
+        first, second : numpy.ndarray
+            The indices of the two pitches of each pair, first < second.
+        tunnel : numpy.ndarray
+            Their separation (in meters) at the decision point.
+        plate : numpy.ndarray
+            Their separation (in meters) at the plate.
+        decision, distance : float
+            The depths (x, in meters) of the decision point and the plate.
+        radius : float
+            The largest separation at the decision point that was searched.
+        pitches : int
+            The number of pitches compared; pitches that hit the ground
+            before the plate are left out.
+    """
+
+    def __init__(self, first, second, tunnel, plate, decision, distance,
+                 radius, pitches):
+        self.first = first
+        self.second = second
+        self.tunnel = tunnel
+        self.plate = plate
+        self.decision = decision
+        self.distance = distance
+        self.radius = radius
+        self.pitches = pitches
+
+    def __len__(self):
+        return len(self.first)
+
+    @property
+    def ratio(self):
+        """The separation at the plate divided by the separation at the
+        decision point; the larger, the better the tunnel."""
+        return self.plate / (self.tunnel + 1e-3)
+
+    def by_labels(self, labels):
+        """Summarize the pairs per pair of pitch labels (e.g. types).
+
+        Parameters
+        ----------
+            labels : list of string
+                The label of each pitch, e.g. PitchBatch.labels.
+
+        Returns
+        -------
+            dict
+                For each (label, label) pair, in sorted order, a tuple with
+                the number of pairs, the median tunnel and plate separations
+                and the index of the pair with the best ratio.
+        """
+        labels = array(labels)
+        a, b = labels[self.first], labels[self.second]
+        swap = a > b
+        a[swap], b[swap] = b[swap], a[swap]
+        summary = {}
+        ratio = self.ratio
+        for pair in sorted(set(zip(a.tolist(), b.tolist()))):
+            selected = nonzero((a == pair[0]) & (b == pair[1]))[0]
+            best = selected[ratio[selected].argmax()]
+            summary[pair] = (len(selected), median(self.tunnel[selected]),
+                             median(self.plate[selected]), int(best))
+        return summary
+
+    def report(self, labels):
+        """Return a table of by_labels, with separations in centimeters."""
+        header = "%-20s %-20s %9s %8s %8s %8s" % (
+            'pitch', 'pitch', 'pairs', 'tunnel', 'plate', 'best')
+        lines = [header, '-' * len(header)]
+        for (a, b), (count, tunnel, plate, best) in self.by_labels(
+                labels).items():
+            lines.append("%-20s %-20s %9d %8.1f %8.1f %8.1f"
+                         % (a[:20], b[:20], count, tunnel * 100,
+                            plate * 100, self.plate[best] * 100))
+        lines.append("(%d pairs of %d pitches within %.1f cm at %.1f m "
+                     "before the plate)"
+                     % (len(self), self.pitches, 100 * self.radius,
+                        self.distance - self.decision))
+        return '\n'.join(lines)
+
+def tunnels(trails, distance=18, radius=default_radius,
+            decision=decision_distance, index=None, block_size=1024):
+    """Find the pairs of pitches that are within radius of each other at
+    the decision point, and their separations there and at the plate.
+
+    Parameters
+    ----------
+        trails : list of array_like
+            The trajectory of each pitch (see resample_depths).
+        distance : float
+            The depth (in meters) of the plate.
+        radius : float
+            The largest separation (in meters) at the decision point.
+        decision : float
+            How far (in meters) before the plate the decision point is.
+        index, block_size
+            As for close_pairs.
+
+    Returns
+    -------
+        Tunnels
+    """
+    samples = resample_depths(trails, [distance - decision, distance])
+    reached = nonzero(isfinite(samples).all(axis=(1, 2)))[0]
+    at_decision = samples[reached, 0]
+    at_plate = samples[reached, 1]
+    i, j = close_pairs(at_decision, radius, index, block_size)
+    d = at_decision[i] - at_decision[j]
+    tunnel = sqrt((d * d).sum(axis=1))
+    d = at_plate[i] - at_plate[j]
+    plate = sqrt((d * d).sum(axis=1))
+    return Tunnels(reached[i], reached[j], tunnel, plate,
+                   distance - decision, distance, radius, len(reached))
+
+def repertoire(n, seed=None, dt=0.005, integrator='rk4'):
+    """Throw n noisy variants of the seven predefined pitches (see
+    montecarlo.sample) and return the thrown batch with its trails."""
+    rng = default_rng(seed)
+    nominal = play_ball.predefined_pitches()
+    parts = []
+    for k, pitch in enumerate(nominal):
+        count = n // len(nominal) + (k < n % len(nominal))
+        parts.append(montecarlo.sample(
+            rng, pitch, count, montecarlo.default_position_sigma,
+            montecarlo.default_velocity_sigma,
+            montecarlo.default_spin_sigma))
+    labels = [p.label for p, (position, _, _) in zip(nominal, parts)
+              for _ in range(len(position))]
+    batch = PitchBatch(*(concatenate(columns) for columns in zip(*parts)),
+                       labels)
+    batch.throw(play_ball.distance, dt, True, integrator)
+    return batch
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--pitches', type=int, default=10000)
+    parser.add_argument('--radius', type=float, default=default_radius)
+    parser.add_argument('--decision', type=float, default=decision_distance,
+                        help="meters before the plate")
+    parser.add_argument('--index', choices=indexes,
+                        help="default: kdtree if SciPy is installed, "
+                             "otherwise grid")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--dt', type=float, default=0.005)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    batch = repertoire(args.pitches, args.seed, args.dt)
+    thrown = time.perf_counter()
+    result = tunnels(batch.trails, play_ball.distance, args.radius,
+                     args.decision, args.index)
+    done = time.perf_counter()
+    print(result.report(batch.labels))
+    sys.stderr.write("threw %d pitches in %.2f s, found %d tunnels in "
+                     "%.2f s\n" % (args.pitches, thrown - start, len(result),
+                                   done - thrown))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
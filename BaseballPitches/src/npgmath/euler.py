@@ -55,4 +55,41 @@ def new_state(x, xp, xpp, increment):
     new_xp = [a + b for a, b in zip(
                                xp, [each_xpp * increment for each_xpp in xpp])]
 
-    return new_x, new_xp
\ No newline at end of file
+    return new_x, new_xp
+
+def new_states(x, xp, xpp, increment):
+    """Given the initial states of many objects, calculate their new states
+    for the next step. This is the vectorized counterpart of new_state and
+    applies the same update to every row at once.
+    
+    Parameters
+    ----------
+        x : numpy.ndarray
+            An (N, M) array with one dependent variable vector per row. For
+            example, the 3-D positions of N objects.
+        xp : numpy.ndarray
+            ``X prime.`` An (N, M) array with the first derivative of each row
+            of x (e.g. velocity).
+        xpp : numpy.ndarray
+            ``X double prime.`` An (N, M) array with the second derivative of
+            each row of x (e.g. acceleration).
+        increment : float
+            The step size by which to increase the independent variable.
+            
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray)
+            The new dependent variables (e.g. positions) and first derivatives
+            (e.g. velocities), respectively.
+            
+    Examples
+    --------
+        >>> import numpy
+        >>> from npgmath import euler
+        >>> x = numpy.array([[10.0, 12.5, 7.2]])
+        >>> v = numpy.array([[1.4, -2.9, 2.0]])
+        >>> a = numpy.array([[0.1, -0.2, -1.0]])
+        >>> euler.new_states(x, v, a, 0.5)
+        (array([[10.7 , 11.05,  8.2 ]]), array([[ 1.45, -3.  ,  1.5 ]]))
+    """
+    return x + xp * increment, xp + xpp * increment
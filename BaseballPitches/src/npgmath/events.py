@@ -0,0 +1,88 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module is used to locate events (e.g. a coordinate crossing a given value)
+that happen inside a single integration step. The solution over the step is
+approximated by a cubic Hermite spline built from the values and derivatives
+at both ends of the step (https://en.wikipedia.org/wiki/Cubic_Hermite_spline),
+so the event can be found much more precisely than the step size.
+
+All functions work element-wise on floats or NumPy arrays. The tangents m0 and
+m1 are the derivatives at both ends multiplied by the step size, so that the
+spline is parameterized by s = (t - t0) / h in [0, 1].
+"""
+
+from numpy import abs as absolute, clip, where
+
+def hermite(p0, p1, m0, m1, s):
+    """Evaluate the cubic Hermite spline between p0 and p1 at s.
+
+    Examples
+    --------
+        >>> hermite(0.0, 1.0, 1.0, 1.0, 0.5)
+        0.5
+    """
+    s2 = s * s
+    s3 = s2 * s
+    return ((2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * m0
+            + (-2 * s3 + 3 * s2) * p1 + (s3 - s2) * m1)
+
+def hermite_derivative(p0, p1, m0, m1, s):
+    """Evaluate the derivative of the cubic Hermite spline between p0 and p1
+    with respect to s. Divide by the step size to get the derivative with
+    respect to the independent variable.
+    """
+    s2 = s * s
+    return ((6 * s2 - 6 * s) * (p0 - p1) + (3 * s2 - 4 * s + 1) * m0
+            + (3 * s2 - 2 * s) * m1)
+
+def find_crossing(p0, p1, m0, m1, target, tolerance=1e-12, iterations=30):
+    """Find where the cubic Hermite spline between p0 and p1 crosses target.
+    The crossing must be bracketed, i.e. p0 and p1 must be on opposite sides
+    of target (or p1 equal to it). Newton's method is used and falls back to
+    bisection whenever a Newton step leaves the bracket.
+
+    Parameters
+    ----------
+        p0, p1 : float or numpy.ndarray
+            The values at the start and end of the step.
+        m0, m1 : float or numpy.ndarray
+            The derivatives at the start and end of the step, multiplied by
+            the step size.
+        target : float
+            The value to find.
+        tolerance : float
+            The largest acceptable distance between the spline and target.
+        iterations : int
+            The maximum number of iterations.
+
+    Returns
+    -------
+        float or numpy.ndarray
+            The fraction s of the step (0 <= s <= 1) at which the crossing
+            happens.
+
+    Examples
+    --------
+        >>> float(find_crossing(0.0, 2.0, 2.0, 2.0, 0.5))
+        0.25
+    """
+    rising = p0 <= p1
+    low = 0.0 * p0
+    high = low + 1.0
+    span = p1 - p0
+    s = clip(where(span != 0, (target - p0) / where(span != 0, span, 1.0),
+                   1.0), 0.0, 1.0)
+    for _ in range(iterations):
+        value = hermite(p0, p1, m0, m1, s) - target
+        if (absolute(value) <= tolerance).all():
+            break
+        below = (value < 0) == rising
+        low = where(below, s, low)
+        high = where(below, high, s)
+        slope = hermite_derivative(p0, p1, m0, m1, s)
+        newton = s - value / where(slope != 0, slope, 1.0)
+        inside = (slope != 0) & (newton > low) & (newton < high)
+        s = where(inside, newton, 0.5 * (low + high))
+    return s
@@ -0,0 +1,239 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module is used to solve ordinary differential equations (ODEs) with a
+choice of integration schemes. Every integrator works on a state vector y whose
+last axis holds a dependent variable followed by its first derivative, e.g.
+[x, y, z, vx, vy, vz] for a position and velocity. The state can also be an
+(N, 2M) array, in which case every row is advanced with the same step.
+
+The derivative function f(t, y) must return dy/dt with the same shape as y,
+e.g. [vx, vy, vz, ax, ay, az].
+"""
+
+from numpy import concatenate, maximum, sqrt
+from npgmath import euler
+
+class Integrator:
+    """The interface shared by all integrators. Subclasses implement step."""
+
+    name = None         # name used to look up the integrator
+    order = None        # order of accuracy of the scheme
+    adaptive = False    # whether the step size is chosen by the integrator
+
+    def step(self, f, t, y, h):
+        """Advance the state y by one step.
+
+        Parameters
+        ----------
+            f : function
+                The derivative function f(t, y).
+            t : float
+                The current value of the independent variable (e.g. time).
+            y : numpy.ndarray
+                The current state.
+            h : float
+                The step size to attempt. Adaptive integrators may take a
+                smaller step than this.
+
+        Returns
+        -------
+            (float, numpy.ndarray, float)
+                The new value of the independent variable, the new state and
+                the step size to attempt next.
+        """
+        raise NotImplementedError
+
+    def settings(self):
+        """Return a tuple of the name of the integrator and every parameter
+        that affects the steps it takes, e.g. to use as a cache key."""
+        return (type(self).__name__,)
+
+    def __repr__(self):
+        return "%s()" % type(self).__name__
+
+class Euler(Integrator):
+    """The Euler Method (https://en.wikipedia.org/wiki/Euler_method). This
+    matches npgmath.euler.new_state and is the default for Pitch.throw.
+    """
+
+    name = 'euler'
+    order = 1
+
+    def step(self, f, t, y, h):
+        m = y.shape[-1] // 2
+        d = f(t, y)
+        x, xp = euler.new_states(y[..., :m], d[..., :m], d[..., m:], h)
+        return t + h, concatenate((x, xp), axis=-1), h
+
+class SemiImplicitEuler(Integrator):
+    """The semi-implicit (symplectic) Euler Method
+    (https://en.wikipedia.org/wiki/Semi-implicit_Euler_method). The first
+    derivative is updated first and the new value is used to update the
+    dependent variable. It costs the same as the Euler Method but conserves
+    energy much better.
+    """
+
+    name = 'semi-implicit-euler'
+    order = 1
+
+    def step(self, f, t, y, h):
+        m = y.shape[-1] // 2
+        d = f(t, y)
+        xp = y[..., m:] + d[..., m:] * h
+        x = y[..., :m] + xp * h
+        return t + h, concatenate((x, xp), axis=-1), h
+
+class RK4(Integrator):
+    """The classic fourth-order Runge-Kutta method
+    (https://en.wikipedia.org/wiki/Runge%E2%80%93Kutta_methods).
+    """
+
+    name = 'rk4'
+    order = 4
+
+    def step(self, f, t, y, h):
+        k1 = f(t, y)
+        k2 = f(t + h / 2, y + k1 * (h / 2))
+        k3 = f(t + h / 2, y + k2 * (h / 2))
+        k4 = f(t + h, y + k3 * h)
+        return t + h, y + (k1 + 2 * k2 + 2 * k3 + k4) * (h / 6), h
+
+class DormandPrince(Integrator):
+    """The adaptive Dormand-Prince method, an embedded Runge-Kutta 5(4) pair
+    (https://en.wikipedia.org/wiki/Dormand%E2%80%93Prince_method). Each step
+    estimates its own error from the difference between the fifth- and
+    fourth-order solutions and is retried with a smaller step if the error is
+    too large. The step size returned for the next step is chosen so that the
+    error stays near the tolerance.
+    """
+
+    name = 'rk45'
+    order = 5
+    adaptive = True
+
+    c = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+    a = ((),
+         (1 / 5,),
+         (3 / 40, 9 / 40),
+         (44 / 45, -56 / 15, 32 / 9),
+         (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+         (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+         (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84))
+    # difference between the fifth- and fourth-order weights
+    e = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525,
+         -1 / 40)
+
+    def __init__(self, rtol=1e-6, atol=1e-9, max_step=float('inf'),
+                 min_step=1e-12, safety=0.9, min_factor=0.2, max_factor=5.0):
+        """Set the error tolerances and step size limits.
+
+        Parameters
+        ----------
+            rtol : float
+                The relative error tolerance per step.
+            atol : float
+                The absolute error tolerance per step.
+            max_step : float
+                The largest step size the integrator may take.
+            min_step : float
+                The smallest step size the integrator may take. Steps that
+                still fail the error test at this size are accepted anyway.
+            safety : float
+                The factor applied to the optimal step size estimate.
+            min_factor, max_factor : float
+                The limits on how much the step size may change per step.
+        """
+        self.rtol = rtol
+        self.atol = atol
+        self.max_step = max_step
+        self.min_step = min_step
+        self.safety = safety
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.rejected = 0
+        self._last = None
+
+    def settings(self):
+        return ('DormandPrince', self.rtol, self.atol, self.max_step,
+                self.min_step, self.safety, self.min_factor, self.max_factor)
+
+    def __repr__(self):
+        return "DormandPrince(rtol=%r, atol=%r)" % (self.rtol, self.atol)
+
+    def error_norm(self, error, y, y_new):
+        """Return the scaled RMS norm of the error estimate. For an (N, 2M)
+        state the largest row norm is used so that every row meets the
+        tolerance.
+        """
+        scale = self.atol + self.rtol * maximum(abs(y), abs(y_new))
+        ratio = (error / scale)**2
+        return sqrt(ratio.mean(axis=-1).max())
+
+    def step(self, f, t, y, h):
+        h = min(h, self.max_step)
+
+        # the last stage of an accepted step is the first stage of the next
+        # (first same as last)
+        if (self._last is not None and self._last[0] == t
+                and self._last[1] is y):
+            k1 = self._last[2]
+        else:
+            k1 = f(t, y)
+
+        while True:
+            k = [k1]
+            for i in range(1, 7):
+                dy = k[0] * self.a[i][0]
+                for j in range(1, i):
+                    dy = dy + k[j] * self.a[i][j]
+                k.append(f(t + self.c[i] * h, y + dy * h))
+            # the seventh stage is evaluated at the fifth-order solution
+            y_new = y + dy * h
+            error = k[0] * self.e[0]
+            for j in range(2, 7):
+                error = error + k[j] * self.e[j]
+            norm = self.error_norm(error * h, y, y_new)
+
+            if norm <= 1.0 or h <= self.min_step:
+                factor = (self.max_factor if norm == 0.0 else
+                          self.safety * norm**-0.2)
+                factor = min(self.max_factor, max(self.min_factor, factor))
+                h_next = min(max(h * factor, self.min_step), self.max_step)
+                self._last = (t + h, y_new, k[6])
+                return t + h, y_new, h_next
+
+            self.rejected += 1
+            factor = max(self.min_factor, self.safety * norm**-0.2)
+            h = max(h * factor, self.min_step)
+
+RK45 = DormandPrince
+
+integrators = {c.name: c for c in (Euler, SemiImplicitEuler, RK4,
+                                   DormandPrince)}
+
+def get_integrator(integrator=None):
+    """Return an integrator instance.
+
+    Parameters
+    ----------
+        integrator : string, Integrator, or None
+            An integrator instance (returned as is), the name of an integrator
+            ('euler', 'semi-implicit-euler', 'rk4' or 'rk45'), or None for the
+            Euler Method.
+
+    Examples
+    --------
+        >>> get_integrator('rk4')
+        RK4()
+    """
+    if integrator is None:
+        return Euler()
+    if isinstance(integrator, Integrator):
+        return integrator
+    try:
+        return integrators[integrator]()
+    except KeyError:
+        raise ValueError("unknown integrator %r; expected one of %s"
+                         % (integrator, ', '.join(sorted(integrators))))
@@ -5,9 +5,10 @@ Created on Sep 5, 2018
 This module is used to calculate the forces acting on an object.
 """
 
-from numpy import sqrt, cross, dot
-from scipy.constants import g       # acceleration due to gravity
+from math import sqrt as scalar_sqrt
+from numpy import sqrt, cross, dot, einsum, newaxis, ndarray
 
+g = 9.80665         # standard acceleration due to gravity in m/s^2
 air_density = 1.2
 
 def calculate_gravity(mass):
@@ -173,4 +174,89 @@ def calculate_drag_and_magnus(velocity,area,drag_coefficient,spin):
             Magnus effect for an object.
     """
     return add_forces([calculate_drag(velocity, area, drag_coefficient),
-                       calculate_magnus(velocity, spin)])
\ No newline at end of file
+                       calculate_magnus(velocity, spin)])
+
+def acceleration_constants(mass,area,drag_coefficient):
+    """Precompute the constants used by acceleration for an object. These only
+    need to be calculated once per object (or whenever air_density changes).
+    
+    Parameters
+    ----------
+        mass : float or numpy.ndarray
+            The mass of the object in kilograms.
+        area : float or numpy.ndarray
+            The cross-sectional surface area of the object in square meters.
+        drag_coefficient: float or numpy.ndarray
+            The drag coefficient of the object. This quantity is unitless.
+            
+    Returns
+    -------
+        (float, float, float)
+            The drag constant 0.5 * drag_coefficient * area * air_density /
+            mass, the acceleration due to gravity, and 1 / mass.
+            
+    Examples
+    --------
+        >>> acceleration_constants(0.14529, 0.0041465, 0.4)
+        (0.006849473466859384, 9.80665, 6.882786151834263)
+    """
+    return (0.5 * drag_coefficient * area * air_density / mass, g, 1.0 / mass)
+
+def acceleration(velocity,spin,params,wind=None):
+    """Calculate the acceleration of an object due to gravity, air resistance,
+    and the Magnus effect in a single pass. This gives the same result as
+    dividing calculate_net_force by the mass, without building a list for
+    every force.
+    
+    Parameters
+    ----------
+        velocity : list of float or numpy.ndarray
+            The 3-D velocity of the object in meters per second. If it is a
+            list (or tuple), plain Python floats are used, which is fastest
+            for a single object. If it is an (N, 3) NumPy array, the
+            acceleration of all N objects is calculated at once.
+        spin : list of float or numpy.ndarray
+            The 3-D spin of the object converted to units of kilograms per
+            second, or an (N, 3) array with one spin per object.
+        params : (float, float, float)
+            The constants returned by acceleration_constants.
+        wind : list of float or numpy.ndarray
+            The velocity of the air at the object (see npgphysics.wind), with
+            the same type and shape as velocity. Air resistance and the Magnus
+            effect act on the velocity relative to the air. None for still
+            air.
+            
+    Returns
+    -------
+        list of float or numpy.ndarray
+            The acceleration in meters per second squared, with the same type
+            and shape as velocity.
+            
+    Examples
+    --------
+        >>> params = acceleration_constants(0.14529, 0.0041465, 0.4)
+        >>> acceleration([42.0, -0.2, 1.3], [0.01, 0.02, 0.03], params)
+        [-12.308643695009913, -18.33192054782232, 5.421141346996912]
+    """
+    k_drag, gravity, inverse_mass = params
+    if wind is not None:
+        # gravity does not depend on the velocity, so the relative velocity
+        # can be used for everything
+        if isinstance(velocity, ndarray):
+            velocity = velocity - wind
+        else:
+            velocity = [v - w for v, w in zip(velocity, wind)]
+    if isinstance(velocity, ndarray):
+        speed = sqrt(einsum('...i,...i->...', velocity,
+                            velocity))[..., newaxis]
+        result = cross(velocity, spin) * inverse_mass - (k_drag * speed
+                                                         * velocity)
+        result[..., 1] -= gravity
+        return result
+    
+    vx, vy, vz = velocity
+    sx, sy, sz = spin
+    drag = k_drag * scalar_sqrt(vx * vx + vy * vy + vz * vz)
+    return [(vy * sz - vz * sy) * inverse_mass - drag * vx,
+            (vz * sx - vx * sz) * inverse_mass - drag * vy - gravity,
+            (vx * sy - vy * sx) * inverse_mass - drag * vz]
@@ -0,0 +1,258 @@
+"""
+Created on Oct 16, 2026
+@author: Nick Geary
+
+This module describes the wind in a stadium as a 3-D grid of wind velocities,
+optionally with one grid per frame of a time series. The wind velocity at any
+point is interpolated trilinearly between the eight grid points around it
+(and linearly between the two frames around the time), for all pitches of a
+batch in one call. Points outside the grid (or times outside the frames) get
+the wind of the nearest grid point (or frame).
+
+A steady wind that changes linearly across the grid (including a uniform
+wind, which does not change at all) is the same everywhere as its trilinear
+interpolation. Such a field is recognized when it is created and evaluated
+directly: a uniform wind is a single vector, and a linear one (e.g. a shear
+that grows with height) is one small matrix product per call, without the
+gather of the corners of each cell.
+
+Drag and the Magnus effect depend on the velocity of the ball relative to the
+air, so the wind velocity is subtracted from the velocity of the ball before
+they are calculated (see forces.acceleration); gravity does not change.
+
+For example, a steady 3 m/s crosswind towards third base and a gust that
+moves towards the plate:
+    calm = WindField.uniform([0.0, 0.0, -3.0])
+    gust = WindField.from_function(
+        lambda x, y, z, t: (2 * exp(-(x - 10 * t) ** 2), 0 * x, 0 * x),
+        origin=(0, 0, -2), spacing=0.25, shape=(81, 13, 17),
+        times=arange(0, 1, 0.05))
+    pitch.throw(18, 0.001, 'rk4', wind=gust)
+"""
+
+from numpy import abs as absolute, arange, array, asarray, broadcast_to, \
+    column_stack, concatenate, einsum, empty, float64, indices, maximum, \
+    minimum, multiply, ones, pad, stack, subtract
+from numpy.linalg import lstsq
+
+# the largest deviation from a linear fit, relative to the largest wind speed,
+# for which a steady field is evaluated as linear
+linear_tolerance = 1e-12
+
+def linear_fit(velocities, spacing):
+    """Fit a steady grid of wind velocities with a linear function of the
+    position.
+
+    Parameters
+    ----------
+        velocities : numpy.ndarray
+            An (X, Y, Z, 3) array of wind velocities.
+        spacing : numpy.ndarray
+            The distance between grid points along x, y and z.
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray) or None
+            The (3, 3) gradient G and the (3,) wind w0 at the first grid point
+            such that the wind at an offset d from it is w0 + d @ G, or None
+            if the velocities are not linear in the position.
+    """
+    offsets = (indices(velocities.shape[:3]).reshape(3, -1).T * spacing)
+    values = velocities.reshape(-1, 3)
+    design = column_stack((offsets, ones(len(offsets))))
+    coefficients = lstsq(design, values, rcond=None)[0]
+    scale = max(float(absolute(values).max()), 1.0)
+    if absolute(design @ coefficients - values).max() > (linear_tolerance
+                                                         * scale):
+        return None
+    return coefficients[:3], coefficients[3]
+
+class WindField:
+    """Wind velocities on a regular grid.
+
+    Attributes
+    ----------
+        velocities : numpy.ndarray
+            A (T, X, Y, Z, 3) array with the wind velocity in meters per
+            second at each grid point of each frame. T is 1 for a steady
+            wind.
+        origin : numpy.ndarray
+            The position (in meters) of the first grid point.
+        spacing : numpy.ndarray
+            The distance (in meters) between grid points along x, y and z.
+        start, interval : float
+            The time (in seconds since release) of the first frame and the
+            time between frames.
+        gradient, offset : numpy.ndarray
+            For a steady field that is linear in the position, the (3, 3)
+            gradient and the wind at the first grid point (see linear_fit);
+            None otherwise.
+    """
+
+    def __init__(self, velocities, origin=(0.0, 0.0, 0.0), spacing=1.0,
+                 start=0.0, interval=1.0):
+        """Create a wind field.
+
+        Parameters
+        ----------
+            velocities : array_like
+                An (X, Y, Z, 3) array for a steady wind, or a
+                (T, X, Y, Z, 3) array with one grid per frame. Every axis
+                needs at least two points.
+            origin : array_like
+                The position of the first grid point.
+            spacing : float or array_like
+                The distance between grid points, the same along every axis
+                or one per axis.
+            start, interval : float
+                The time of the first frame and the time between frames.
+        """
+        velocities = asarray(velocities, dtype=float64)
+        if velocities.ndim == 4:
+            velocities = velocities[None]
+        if velocities.ndim != 5 or velocities.shape[-1] != 3:
+            raise ValueError("expected an (X, Y, Z, 3) or (T, X, Y, Z, 3) "
+                             "array of velocities, got shape %s"
+                             % (velocities.shape,))
+        if min(velocities.shape[1:4]) < 2:
+            raise ValueError("every axis of the grid needs at least two "
+                             "points")
+        self.velocities = velocities
+        self.origin = array(origin, dtype=float64)
+        self.spacing = array(spacing, dtype=float64) * [1.0, 1.0, 1.0]
+        self.start = float(start)
+        self.interval = float(interval)
+        self.gradient = self.offset = None
+        if len(velocities) == 1:
+            fit = linear_fit(velocities[0], self.spacing)
+            if fit is not None:
+                self.gradient, self.offset = fit
+                self._uniform = not self.gradient.any()
+                self._extent = (array(velocities.shape[1:4]) - 1.0) \
+                    * self.spacing
+
+        # the grid is padded with a copy of its last frame and its last
+        # point along each axis, so that a position clamped to the last grid
+        # point (or a time clamped to the last frame) falls in a cell of its
+        # own with a fraction of 0 and gets the value there exactly
+        padded = pad(velocities, ((0, 1), (0, 1), (0, 1), (0, 1), (0, 0)),
+                     mode='edge')
+        nx, ny, nz = padded.shape[1:4]
+        # one row per component, so that a gather of the corners of every
+        # cell is a single take
+        self._columns = padded.reshape(-1, 3).T.copy()
+        self._frames = len(velocities)
+        self._frame_size = nx * ny * nz
+        self._inverse_spacing = 1 / self.spacing
+        self._limits = array(velocities.shape[1:4]) - 1.0
+        self._strides = array([ny * nz, nz, 1])
+        # the offsets of the corners of a cell, in the order of the weights
+        # in velocity: x outermost, then y, then z
+        corners = (arange(2)[:, None, None] * self._strides[0]
+                   + arange(2)[None, :, None] * self._strides[1]
+                   + arange(2)[None, None, :]).ravel()
+        self._corners = corners[:, None]
+        self._frame_corners = concatenate((corners,
+                                           corners + self._frame_size)
+                                          )[:, None]
+
+    @classmethod
+    def uniform(cls, velocity):
+        """Return a field with the same wind velocity everywhere."""
+        return cls(broadcast_to(array(velocity, dtype=float64), (2, 2, 2, 3)))
+
+    @classmethod
+    def from_function(cls, function, origin, spacing, shape, times=None):
+        """Sample a function on a grid.
+
+        Parameters
+        ----------
+            function : function
+                f(x, y, z) for a steady wind, or f(x, y, z, t), returning
+                the three components of the wind velocity. It is called once
+                with arrays of grid coordinates (and times).
+            origin, spacing
+                As for WindField.
+            shape : (int, int, int)
+                The number of grid points along x, y and z.
+            times : array_like
+                Evenly spaced frame times, or None for a steady wind.
+        """
+        spacing = array(spacing, dtype=float64) * [1.0, 1.0, 1.0]
+        axes = [origin[i] + arange(shape[i]) * spacing[i] for i in range(3)]
+        if times is None:
+            x, y, z = (axes[0][:, None, None], axes[1][None, :, None],
+                       axes[2][None, None, :])
+            components = function(x, y, z)
+            start, interval = 0.0, 1.0
+        else:
+            times = asarray(times, dtype=float64)
+            x, y, z = (axes[0][None, :, None, None],
+                       axes[1][None, None, :, None],
+                       axes[2][None, None, None, :])
+            components = function(x, y, z, times[:, None, None, None])
+            start = times[0]
+            interval = times[1] - times[0] if len(times) > 1 else 1.0
+        grid_shape = tuple(shape)
+        if times is not None:
+            grid_shape = (len(times),) + grid_shape
+        velocities = stack([broadcast_to(c, grid_shape) for c in components],
+                           axis=-1)
+        return cls(velocities, origin, spacing, start, interval)
+
+    def velocity(self, positions, t=0.0):
+        """Interpolate the wind velocity.
+
+        Parameters
+        ----------
+            positions : numpy.ndarray
+                A (3,) position or an (N, 3) array of positions in meters.
+            t : float
+                The time in seconds since release, shared by all positions.
+
+        Returns
+        -------
+            numpy.ndarray
+                The wind velocity at each position, with the same shape as
+                positions.
+        """
+        shape = positions.shape
+        if self.gradient is not None:
+            if self._uniform:
+                return broadcast_to(self.offset, shape)
+            d = positions - self.origin
+            maximum(d, 0.0, out=d)
+            minimum(d, self._extent, out=d)
+            return d @ self.gradient + self.offset
+        # positions is often a slice of the state, so it is only copied once,
+        # by the subtraction
+        g = (positions - self.origin).reshape(-1, 3)
+        g *= self._inverse_spacing
+        maximum(g, 0.0, out=g)
+        minimum(g, self._limits, out=g)
+        cells = g.astype(int)
+        g -= cells
+        index = cells @ self._strides
+
+        # the weight of each corner is the product of (1 - f, f) along the
+        # three axes, for all points at once
+        n = len(g)
+        fractions = empty((3, 2, n))
+        fractions[:, 1] = g.T
+        subtract(1.0, g.T, out=fractions[:, 0])
+        fx, fy, fz = fractions
+        weights = fx[:, None, None] * fy[None, :, None]
+        weights = (weights * fz[None, None, :]).reshape(8, n)
+
+        if self._frames > 1:
+            s = min(max((t - self.start) / self.interval, 0.0),
+                    self._frames - 1.0)
+            frame = int(s)
+            s -= frame
+            index += frame * self._frame_size
+            # the corners in the two frames around t
+            weights = multiply.outer([1.0 - s, s], weights).reshape(16, n)
+            v = self._columns.take(self._frame_corners + index, axis=1)
+        else:
+            v = self._columns.take(self._corners + index, axis=1)
+        return einsum('ckn,kn->nc', v, weights).reshape(shape)